@@ -12,7 +12,9 @@ class UserAdmin(BaseUserAdmin):
         ('Doğrulama', {'fields': ('email_verified', 'phone_verified')}),
         ('Yetkiler', {'fields': ('is_active', 'is_staff', 'is_superuser', 'groups', 'user_permissions')}),
         ('Önemli Tarihler', {'fields': ('last_login', 'date_joined')}),
+        ('Rezervasyon İstatistikleri', {'fields': ('booking_count', 'lifetime_value', 'first_booking_at', 'last_booking_at')}),
     )
+    readonly_fields = ('booking_count', 'lifetime_value', 'first_booking_at', 'last_booking_at')
     add_fieldsets = (
         (None, {
             'classes': ('wide',),
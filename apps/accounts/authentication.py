@@ -0,0 +1,54 @@
+"""
+JWT authentication with cached user lookups.
+
+``JWTAuthentication`` loads the user row on every request; this backend
+keeps it in the cache for ``AUTH_USER_CACHE_TIMEOUT`` seconds. The token
+version is the password hash claim (``CHECK_REVOKE_TOKEN``): a cached user
+is only returned for tokens issued for its current password, and saving or
+deleting a user (password change, deactivation, profile edits) drops the
+cache entry, so those take effect on the next request.
+
+Queryset ``.update()`` and ``bulk_update`` on User send no signal: after
+them a cached user stays stale for up to ``AUTH_USER_CACHE_TIMEOUT``
+unless ``invalidate_cached_user`` is called for the changed ids.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+def user_cache_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def invalidate_cached_user(user_id):
+    cache.delete(user_cache_key(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(validated_token)
+            cache.set(key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+            return user
+
+        # Same checks as JWTAuthentication.get_user, against the cached row
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+        return user
@@ -0,0 +1,61 @@
+"""
+Measure database queries spent on JWT authentication.
+
+    python manage.py bench_auth --requests 1000
+
+Authenticates the same access token repeatedly with simplejwt's
+``JWTAuthentication`` and with ``CachedJWTAuthentication`` and reports the
+share of requests that hit the database and the time per authentication.
+"""
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.accounts.authentication import CachedJWTAuthentication, invalidate_cached_user
+
+
+class Command(BaseCommand):
+    help = 'Compare database hits of JWT authentication with and without the user cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=1000,
+            help='Authentications per backend (default: 1000)'
+        )
+        parser.add_argument('--email', type=str, help='User to authenticate as (default: first active user)')
+
+    def handle(self, *args, **options):
+        users = get_user_model().objects.filter(is_active=True)
+        user = users.filter(email=options['email']).first() if options['email'] else users.first()
+        if user is None:
+            raise CommandError('No active user found')
+
+        request = APIRequestFactory().get(
+            '/', HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}'
+        )
+        invalidate_cached_user(user.pk)
+        requests = options['requests']
+
+        for name, backend in (
+            ('JWTAuthentication', JWTAuthentication()),
+            ('CachedJWTAuthentication', CachedJWTAuthentication()),
+        ):
+            db_hits = 0
+            start = time.perf_counter()
+            for _ in range(requests):
+                with CaptureQueriesContext(connections['default']) as queries:
+                    backend.authenticate(request)
+                db_hits += bool(queries.captured_queries)
+            elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f'{name:>24}: DB hit rate {db_hits / requests:6.1%} '
+                f'({db_hits}/{requests}), {elapsed / requests * 1e6:.0f} µs per authentication'
+            )
@@ -0,0 +1,104 @@
+# Generated by Django 4.2.9 on 2026-10-19 10:00
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, Max, Min, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_booking_stats(apps, schema_editor):
+    User = apps.get_model("accounts", "User")
+    Booking = apps.get_model("bookings", "Booking")
+
+    bookings = Booking.objects.filter(user=OuterRef("pk")).order_by().values("user")
+    User.objects.update(
+        booking_count=Coalesce(
+            Subquery(bookings.annotate(value=Count("id")).values("value")), 0
+        ),
+        first_booking_at=Subquery(
+            bookings.annotate(value=Min("created_at")).values("value")
+        ),
+        last_booking_at=Subquery(
+            bookings.annotate(value=Max("created_at")).values("value")
+        ),
+        lifetime_value=Coalesce(
+            Subquery(
+                bookings.exclude(status="cancelled")
+                .annotate(value=Sum("total"))
+                .values("value")
+            ),
+            Decimal("0.00"),
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("accounts", "0002_alter_address_options_alter_paymentmethod_options_and_more"),
+        ("bookings", "0003_alter_booking_pickup_time_slot"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="booking_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Rezervasyon Sayısı"
+            ),
+        ),
+        migrations.AddField(
+            model_name="user",
+            name="first_booking_at",
+            field=models.DateTimeField(
+                blank=True, editable=False, null=True, verbose_name="İlk Rezervasyon"
+            ),
+        ),
+        migrations.AddField(
+            model_name="user",
+            name="last_booking_at",
+            field=models.DateTimeField(
+                blank=True, editable=False, null=True, verbose_name="Son Rezervasyon"
+            ),
+        ),
+        migrations.AddField(
+            model_name="user",
+            name="lifetime_value",
+            field=models.DecimalField(
+                decimal_places=2,
+                default=Decimal("0.00"),
+                editable=False,
+                help_text="Total of non-cancelled bookings",
+                max_digits=12,
+                verbose_name="Toplam Harcama",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(
+                fields=["booking_count", "is_active"],
+                name="accounts_us_booking_61a374_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(
+                fields=["user_type", "booking_count"],
+                name="accounts_us_user_ty_209253_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(
+                fields=["user_type", "last_booking_at"],
+                name="accounts_us_user_ty_fdda64_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(
+                fields=["user_type", "lifetime_value"],
+                name="accounts_us_user_ty_0cf5f6_idx",
+            ),
+        ),
+        migrations.RunPython(backfill_booking_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.9 on 2026-10-19 04:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_user_booking_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RevokedToken',
+            fields=[
+                ('jti', models.CharField(max_length=255, primary_key=True, serialize=False, verbose_name='Token ID')),
+                ('expires_at', models.DateTimeField(db_index=True, verbose_name='Geçerlilik Sonu')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Oluşturulma Tarihi')),
+            ],
+            options={
+                'verbose_name': 'İptal Edilmiş Token',
+                'verbose_name_plural': 'İptal Edilmiş Tokenlar',
+            },
+        ),
+    ]
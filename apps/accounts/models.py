@@ -1,7 +1,10 @@
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.db import models
+from django.db.models import Count, Max, Min, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
 from django.utils.translation import gettext_lazy as _
 from phonenumber_field.modelfields import PhoneNumberField
+from decimal import Decimal
 
 
 class UserManager(BaseUserManager):
@@ -27,6 +30,21 @@ class UserManager(BaseUserManager):
             raise ValueError(_('Superuser must have is_superuser=True.'))
         
         return self.create_user(email, password, **extra_fields)
+    
+    def refresh_booking_stats(self, user_ids):
+        """Recompute the denormalized booking stats for the given users in one UPDATE."""
+        from apps.bookings.models import Booking
+        
+        bookings = Booking.objects.filter(user=OuterRef('pk')).order_by().values('user')
+        return self.filter(pk__in=user_ids).update(
+            booking_count=Coalesce(Subquery(bookings.annotate(value=Count('id')).values('value')), 0),
+            first_booking_at=Subquery(bookings.annotate(value=Min('created_at')).values('value')),
+            last_booking_at=Subquery(bookings.annotate(value=Max('created_at')).values('value')),
+            lifetime_value=Coalesce(
+                Subquery(bookings.exclude(status='cancelled').annotate(value=Sum('total')).values('value')),
+                Decimal('0.00')
+            ),
+        )
 
 
 class User(AbstractUser):
@@ -47,6 +65,19 @@ class User(AbstractUser):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Kayıt Tarihi")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Güncellenme Tarihi")
     
+    # Denormalized booking stats (kept up to date by apps.accounts.signals)
+    first_booking_at = models.DateTimeField(null=True, blank=True, editable=False, verbose_name="İlk Rezervasyon")
+    last_booking_at = models.DateTimeField(null=True, blank=True, editable=False, verbose_name="Son Rezervasyon")
+    booking_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Rezervasyon Sayısı")
+    lifetime_value = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        editable=False,
+        help_text='Total of non-cancelled bookings',
+        verbose_name="Toplam Harcama"
+    )
+    
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['first_name', 'last_name']
     
@@ -56,6 +87,12 @@ class User(AbstractUser):
         verbose_name = 'Kullanıcı'
         verbose_name_plural = 'Kullanıcılar'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['booking_count', 'is_active']),
+            models.Index(fields=['user_type', 'booking_count']),
+            models.Index(fields=['user_type', 'last_booking_at']),
+            models.Index(fields=['user_type', 'lifetime_value']),
+        ]
     
     def __str__(self):
         return self.email
@@ -127,3 +164,18 @@ class PaymentMethod(models.Model):
             # Ensure only one default payment method per user
             PaymentMethod.objects.filter(user=self.user, is_default=True).update(is_default=False)
         super().save(*args, **kwargs)
+
+
+class RevokedToken(models.Model):
+    """Refresh tokens revoked while the cache was unavailable (see apps.accounts.token_denylist)."""
+    
+    jti = models.CharField(max_length=255, primary_key=True, verbose_name="Token ID")
+    expires_at = models.DateTimeField(db_index=True, verbose_name="Geçerlilik Sonu")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Oluşturulma Tarihi")
+    
+    class Meta:
+        verbose_name = 'İptal Edilmiş Token'
+        verbose_name_plural = 'İptal Edilmiş Tokenlar'
+    
+    def __str__(self):
+        return self.jti
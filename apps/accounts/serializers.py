@@ -1,6 +1,13 @@
+from datetime import datetime, timezone
+
 from rest_framework import serializers
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
+from django.utils.translation import gettext_lazy as _
+from . import token_denylist
 from .models import Address, PaymentMethod
 
 User = get_user_model()
@@ -65,6 +72,26 @@ class ChangePasswordSerializer(serializers.Serializer):
         return user
 
 
+class DenylistTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Token refresh that revokes the used refresh token in the token denylist
+    (``BLACKLIST_AFTER_ROTATION`` without simplejwt's token_blacklist tables).
+    """
+    
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        jti = refresh[api_settings.JTI_CLAIM]
+        
+        if api_settings.ROTATE_REFRESH_TOKENS and api_settings.BLACKLIST_AFTER_ROTATION:
+            expires_at = datetime.fromtimestamp(refresh['exp'], tz=timezone.utc)
+            if not token_denylist.revoke(jti, expires_at):
+                raise InvalidToken(_("Token is blacklisted"))
+        elif token_denylist.is_revoked(jti):
+            raise InvalidToken(_("Token is blacklisted"))
+        
+        return super().validate(attrs)
+
+
 class AddressSerializer(serializers.ModelSerializer):
     """Address serializer."""
     
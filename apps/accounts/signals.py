@@ -0,0 +1,24 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from apps.bookings.models import Booking
+from .authentication import invalidate_cached_user
+from .models import User
+
+
+@receiver(post_save, sender=Booking)
+def refresh_stats_on_booking_save(sender, instance, created, update_fields=None, **kwargs):
+    """Keep the customer's booking stats current on booking create, cancel and total changes."""
+    if created or update_fields is None or {'status', 'total'} & set(update_fields):
+        User.objects.refresh_booking_stats([instance.user_id])
+
+
+@receiver(post_delete, sender=Booking)
+def refresh_stats_on_booking_delete(sender, instance, **kwargs):
+    User.objects.refresh_booking_stats([instance.user_id])
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_auth_user(sender, instance, **kwargs):
+    """Drop the user cached for JWT authentication (password change, deactivation, edits)."""
+    invalidate_cached_user(instance.pk)
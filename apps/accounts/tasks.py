@@ -0,0 +1,8 @@
+"""Background tasks for accounts."""
+from .token_denylist import purge_expired
+
+
+def purge_revoked_tokens():
+    """Delete expired refresh token revocations kept in the database."""
+    deleted = purge_expired()
+    return f"Purged {deleted} expired revoked tokens"
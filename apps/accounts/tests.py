@@ -0,0 +1,181 @@
+from datetime import timedelta
+
+import pytest
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.accounts import token_denylist
+from apps.accounts.authentication import CachedJWTAuthentication, invalidate_cached_user, user_cache_key
+from apps.accounts.models import RevokedToken, User
+
+pytestmark = pytest.mark.django_db
+
+REFRESH_URL = '/api/auth/token/refresh/'
+
+
+@pytest.fixture(autouse=True)
+def clean_state(monkeypatch):
+    cache.clear()
+    monkeypatch.setitem(token_denylist._fallback_state, 'checked_at', float('-inf'))
+    monkeypatch.setitem(token_denylist._fallback_state, 'has_rows', False)
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user(
+        email='customer@example.com', password='secret', first_name='Ayşe', last_name='Yılmaz'
+    )
+
+
+class FailingCache:
+    def __getattr__(self, name):
+        def fail(*args, **kwargs):
+            raise ConnectionError('cache down')
+        return fail
+
+
+@pytest.fixture
+def cache_down(monkeypatch):
+    """Make the denylist's cache fail; call the returned function to bring it back."""
+    monkeypatch.setattr(token_denylist, 'cache', FailingCache())
+    return lambda: monkeypatch.setattr(token_denylist, 'cache', cache)
+
+
+def refresh(token):
+    return APIClient().post(REFRESH_URL, {'refresh': str(token)}, format='json')
+
+
+def test_rotated_refresh_token_cannot_be_reused(user):
+    token = RefreshToken.for_user(user)
+
+    response = refresh(token)
+    assert response.status_code == 200
+    assert response.json()['refresh'] != str(token)
+
+    assert refresh(token).status_code == 401
+    # The rotated one still works
+    assert refresh(response.json()['refresh']).status_code == 200
+
+
+def test_concurrent_refreshes_are_decided_by_cache_add(user, monkeypatch):
+    token = RefreshToken.for_user(user)
+    added = []
+    add = cache.add
+
+    def recording_add(*args, **kwargs):
+        added.append(add(*args, **kwargs))
+        return added[-1]
+
+    monkeypatch.setattr(cache, 'add', recording_add)
+
+    assert [refresh(token).status_code for _ in range(2)] == [200, 401]
+    assert added == [True, False]
+    assert not RevokedToken.objects.exists()
+
+
+def test_revocation_falls_back_to_the_database(user, cache_down):
+    token = RefreshToken.for_user(user)
+
+    assert refresh(token).status_code == 200
+    row = RevokedToken.objects.get()
+    assert row.jti == token['jti']
+    assert refresh(token).status_code == 401
+    assert token_denylist.is_revoked(token['jti'])
+
+    cache_down()
+    # Honored after the cache is back, also by a process that never saw the outage
+    token_denylist._fallback_state.update(checked_at=float('-inf'), has_rows=False)
+    assert token_denylist.is_revoked(token['jti'])
+    assert refresh(token).status_code == 401
+
+
+def test_revoke(user):
+    expires_at = timezone.now() + timedelta(hours=1)
+
+    assert token_denylist.revoke('jti-1', expires_at)
+    assert not token_denylist.revoke('jti-1', expires_at)
+    assert token_denylist.is_revoked('jti-1')
+    assert not token_denylist.is_revoked('jti-2')
+
+
+def test_purge_expired():
+    now = timezone.now()
+    RevokedToken.objects.create(jti='expired', expires_at=now - timedelta(seconds=1))
+    RevokedToken.objects.create(jti='live', expires_at=now + timedelta(hours=1))
+
+    assert token_denylist.purge_expired() == 1
+    assert list(RevokedToken.objects.values_list('jti', flat=True)) == ['live']
+
+
+def authenticate(token):
+    request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+    return CachedJWTAuthentication().authenticate(request)
+
+
+def test_cached_user_needs_no_query(user, django_assert_num_queries):
+    token = RefreshToken.for_user(user).access_token
+    with django_assert_num_queries(1):
+        assert authenticate(token)[0] == user
+
+    with django_assert_num_queries(0):
+        assert authenticate(token)[0] == user
+
+
+def test_password_change_rejects_older_tokens(user):
+    old = RefreshToken.for_user(user).access_token
+    authenticate(old)
+
+    user.set_password('new secret')
+    user.save()
+    new = RefreshToken.for_user(user).access_token
+    # Caches the user with the new password
+    authenticate(new)
+
+    with pytest.raises(AuthenticationFailed, match='password has been changed'):
+        authenticate(old)
+    assert authenticate(new)[0] == user
+
+
+def test_deactivated_user_is_rejected(user):
+    token = RefreshToken.for_user(user).access_token
+    authenticate(token)
+
+    user.is_active = False
+    user.save()
+
+    with pytest.raises(AuthenticationFailed, match='inactive'):
+        authenticate(token)
+    # Also when the inactive user is served from the cache
+    with pytest.raises(AuthenticationFailed, match='inactive'):
+        authenticate(token)
+
+
+def test_saving_or_deleting_user_drops_cached_user(user):
+    key = user_cache_key(user.pk)
+    authenticate(RefreshToken.for_user(user).access_token)
+    assert cache.get(key) == user
+
+    user.first_name = 'Ayşegül'
+    user.save()
+    assert cache.get(key) is None
+
+    authenticate(RefreshToken.for_user(user).access_token)
+    user.delete()
+    assert cache.get(key) is None
+
+
+def test_queryset_update_leaves_cached_user_stale(user):
+    token = RefreshToken.for_user(user).access_token
+    authenticate(token)
+
+    User.objects.filter(pk=user.pk).update(is_active=False)
+    assert authenticate(token)[0].is_active
+
+    invalidate_cached_user(user.pk)
+    with pytest.raises(AuthenticationFailed, match='inactive'):
+        authenticate(token)
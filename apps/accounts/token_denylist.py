@@ -0,0 +1,82 @@
+"""
+Revocation store for refresh tokens.
+
+Revoked JTIs are kept in the cache until the token would have expired
+anyway, so the store never grows beyond the live tokens and needs no
+cleanup. Revoking is a single atomic ``cache.add``: a refresh token that
+was already used fails to add and is rejected, even when two refreshes race.
+
+If the cache is unavailable, revocations go to the ``RevokedToken`` table
+instead, and every check that cannot reach the cache reads the table. While
+the table holds unexpired rows it is consulted before the cache too, so
+tokens revoked during an outage stay revoked after the cache comes back.
+Whether it holds any is checked once per ``FALLBACK_CHECK_INTERVAL`` per
+process: in the first minute after the cache recovers, a worker that has
+not seen the outage itself can still accept a token another worker revoked
+in the table. ``run_periodic_tasks --task=purge_tokens`` deletes expired rows.
+"""
+import logging
+import time
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import RevokedToken
+
+logger = logging.getLogger(__name__)
+
+FALLBACK_CHECK_INTERVAL = 60  # seconds
+_fallback_state = {'checked_at': float('-inf'), 'has_rows': False}
+
+
+def denylist_key(jti):
+    return f'auth:revoked:{jti}'
+
+
+def revoke(jti, expires_at):
+    """
+    Revoke a token until ``expires_at``.
+    Returns: False if it was already revoked
+    """
+    if _revoked_in_db(jti):
+        return False
+    timeout = max(1, int((expires_at - timezone.now()).total_seconds()))
+    try:
+        return cache.add(denylist_key(jti), 1, timeout)
+    except Exception:
+        logger.warning('Token denylist cache unavailable, using the database', exc_info=True)
+
+    _fallback_state['has_rows'] = True
+    try:
+        with transaction.atomic():
+            RevokedToken.objects.create(jti=jti, expires_at=expires_at)
+    except IntegrityError:
+        return False
+    return True
+
+
+def is_revoked(jti):
+    if _revoked_in_db(jti):
+        return True
+    try:
+        return cache.get(denylist_key(jti)) is not None
+    except Exception:
+        logger.warning('Token denylist cache unavailable, using the database', exc_info=True)
+        return RevokedToken.objects.filter(jti=jti).exists()
+
+
+def _revoked_in_db(jti):
+    now = time.monotonic()
+    if now - _fallback_state['checked_at'] > FALLBACK_CHECK_INTERVAL:
+        _fallback_state['has_rows'] = RevokedToken.objects.filter(expires_at__gt=timezone.now()).exists()
+        _fallback_state['checked_at'] = now
+    return _fallback_state['has_rows'] and RevokedToken.objects.filter(jti=jti).exists()
+
+
+def purge_expired():
+    """
+    Delete fallback rows of tokens that have expired.
+    Returns: number of rows deleted
+    """
+    return RevokedToken.objects.filter(expires_at__lte=timezone.now()).delete()[0]
@@ -21,6 +21,7 @@ class LoginView(generics.GenericAPIView):
     """Custom login endpoint that returns user data with tokens."""
     
     permission_classes = (AllowAny,)
+    throttle_scope = 'login'
     
     def post(self, request, *args, **kwargs):
         email = request.data.get('email')
@@ -67,6 +68,7 @@ class RegisterView(generics.CreateAPIView):
     
     queryset = User.objects.all()
     permission_classes = (AllowAny,)
+    throttle_scope = 'register'
     serializer_class = UserRegistrationSerializer
     
     def create(self, request, *args, **kwargs):
@@ -1,5 +1,6 @@
 from django.contrib import admin
 from .models import Booking, BookingItem, TimeSlot, BookingStatusHistory
+from .policy import BookingPolicy
 
 
 class BookingItemInline(admin.TabularInline):
@@ -18,7 +19,7 @@ class BookingStatusHistoryInline(admin.TabularInline):
 class BookingAdmin(admin.ModelAdmin):
     list_display = (
         'booking_number', 'user', 'status', 'pickup_date', 
-        'total', 'assigned_technician', 'created_at'
+        'cancellable_until', 'total', 'assigned_technician', 'created_at'
     )
     list_filter = ('status', 'pickup_date', 'created_at')
     search_fields = ('booking_number', 'user__email', 'user__first_name', 'user__last_name')
@@ -50,6 +51,19 @@ class BookingAdmin(admin.ModelAdmin):
             'fields': ('created_at', 'updated_at', 'confirmed_at', 'completed_at', 'cancelled_at')
         }),
     )
+    
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request).select_related('user', 'assigned_technician')
+        if request.resolver_match and request.resolver_match.url_name.endswith('changelist'):
+            # Deadlines computed in SQL for the whole page
+            queryset = BookingPolicy().annotate(queryset)
+        return queryset
+    
+    @admin.display(description='İptal Son Tarihi', ordering='cancellable_until')
+    def cancellable_until(self, obj):
+        if not getattr(obj, 'is_cancellable', False):
+            return '-'
+        return obj.cancellable_until
 
 
 @admin.register(BookingItem)
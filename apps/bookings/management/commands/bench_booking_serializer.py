@@ -0,0 +1,141 @@
+"""
+Compare BookingDetailSerializer time and queries per booking before and
+after the detail view optimizations, on the same bookings.
+
+    python manage.py bench_booking_serializer --limit 100 --repeat 5
+
+- ``before``: the previous serializer (reproduced below: user details
+  printed to stdout, settings and cancel/reschedule rules looked up by each
+  field, a pricing query per subtype) on the previous BookingViewSet queryset;
+- ``queryset``: the previous serializer on the current queryset, so only the
+  queryset changed; the gap to ``after`` is the serializer changes alone;
+- ``after``: the current serializer and BookingViewSet queryset.
+
+The previous serializer's prints go to a buffer while timing, so ``before``
+is a lower bound: writing them to a terminal or log costs more.
+"""
+import contextlib
+import io
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.bookings.models import Booking
+from apps.bookings.serializers import BookingDetailSerializer, BookingItemSerializer
+from apps.services.models import BookingSettings
+from apps.services.serializers import PricingSerializer, SubTypeSerializer
+
+
+class BaselineSubTypeSerializer(SubTypeSerializer):
+
+    def get_current_price(self, obj):
+        active_pricing = obj.pricing.filter(is_active=True).first()
+        if active_pricing:
+            return PricingSerializer(active_pricing).data
+        return None
+
+
+class BaselineBookingItemSerializer(BookingItemSerializer):
+    subtype_details = BaselineSubTypeSerializer(source='subtype', read_only=True)
+
+
+class BaselineBookingDetailSerializer(BookingDetailSerializer):
+    items = BaselineBookingItemSerializer(many=True, read_only=True)
+
+    def get_user_details(self, obj):
+        user = obj.user
+        result = {
+            'id': user.id,
+            'first_name': user.first_name or '',
+            'last_name': user.last_name or '',
+            'email': user.email or '',
+            'phone': str(user.phone) if user.phone else '',
+        }
+        print(f"✅ User details for booking {obj.id}: {result}")
+        return result
+
+    def get_can_cancel(self, obj):
+        return obj.can_cancel()[0]
+
+    def get_can_reschedule(self, obj):
+        return obj.can_reschedule()[0]
+
+    def get_cancellation_info(self, obj):
+        settings = BookingSettings.get_settings()
+        can_cancel, message = obj.can_cancel()
+        return {
+            'can_cancel': can_cancel,
+            'message': message,
+            'min_notice_hours': settings.min_cancellation_notice_hours,
+            'cancellation_fee_percentage': float(settings.cancellation_fee_percentage),
+        }
+
+
+def baseline_queryset():
+    return Booking.objects.select_related(
+        'user', 'pickup_address', 'pickup_time_slot'
+    ).prefetch_related('items__subtype')
+
+
+def current_queryset():
+    return Booking.objects.select_related(
+        'user', 'pickup_address__district', 'pickup_time_slot',
+        'delivery_address__district', 'assigned_technician'
+    ).prefetch_related('items__subtype__pricing')
+
+
+class Command(BaseCommand):
+    help = 'Benchmark BookingDetailSerializer time and queries per booking before and after its optimizations'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=100,
+            help='Number of bookings to serialize (default: 100)'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Number of timed runs per mode (default: 5)'
+        )
+
+    def handle(self, *args, **options):
+        limit = options['limit']
+        repeat = options['repeat']
+
+        ids = list(Booking.objects.order_by('-created_at').values_list('id', flat=True)[:limit])
+        if not ids:
+            self.stdout.write(self.style.WARNING('No bookings found, nothing to benchmark'))
+            return
+
+        modes = [
+            ('before', BaselineBookingDetailSerializer, baseline_queryset),
+            ('queryset', BaselineBookingDetailSerializer, current_queryset),
+            ('after', BookingDetailSerializer, current_queryset),
+        ]
+
+        self.stdout.write(f'Serializing {len(ids)} bookings, best of {repeat} runs')
+        results = {}
+        for name, serializer_class, queryset in modes:
+            best = None
+            queries = 0
+            for _ in range(repeat):
+                with CaptureQueriesContext(connection) as captured, contextlib.redirect_stdout(io.StringIO()):
+                    start = time.perf_counter()
+                    data = serializer_class(queryset().filter(id__in=ids), many=True).data
+                    elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+                queries = len(captured)
+            results[name] = data
+
+            self.stdout.write(
+                f'{name:>10}: {best * 1000 / len(ids):.3f} ms/booking, '
+                f'{queries / len(ids):.2f} queries/booking'
+            )
+
+        if results['before'] != results['after']:
+            self.stdout.write(self.style.WARNING('The serializers returned different data'))
@@ -3,7 +3,6 @@ from django.db import models
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import MinValueValidator
 from django.utils import timezone
-from datetime import timedelta
 from decimal import Decimal
 import uuid
 
@@ -115,59 +114,19 @@ class Booking(models.Model):
         
         super().save(*args, **kwargs)
     
-    def can_cancel(self):
+    def can_cancel(self, settings=None):
         """Check if booking can be cancelled based on admin-defined rules."""
-        from apps.services.models import BookingSettings
+        from .policy import BookingPolicy
         
-        if self.status in ['completed', 'cancelled']:
-            return False, 'Booking is already completed or cancelled'
-        
-        settings = BookingSettings.get_settings()
-        now = timezone.now()
-        
-        # If no time slot (e.g., carpet cleaning), use pickup date at midnight
-        from datetime import datetime, time
-        if self.pickup_time_slot:
-            pickup_datetime = datetime.combine(self.pickup_date, self.pickup_time_slot.start_time)
-        else:
-            pickup_datetime = datetime.combine(self.pickup_date, time(0, 0))
-        pickup_datetime = timezone.make_aware(pickup_datetime)
-        
-        time_until_pickup = pickup_datetime - now
-        min_notice = timedelta(hours=settings.min_cancellation_notice_hours)
-        
-        if time_until_pickup < min_notice:
-            hours_needed = settings.min_cancellation_notice_hours
-            return False, f'Cancellation requires at least {hours_needed} hours notice'
-        
-        return True, ''
+        decision = BookingPolicy(settings).evaluate(self)
+        return decision['can_cancel'], decision['cancel_message']
     
-    def can_reschedule(self):
+    def can_reschedule(self, settings=None):
         """Check if booking can be rescheduled based on admin-defined rules."""
-        from apps.services.models import BookingSettings
-        
-        if self.status in ['completed', 'cancelled']:
-            return False, 'Booking is already completed or cancelled'
-        
-        settings = BookingSettings.get_settings()
-        now = timezone.now()
-        
-        # If no time slot (e.g., carpet cleaning), use pickup date at midnight
-        from datetime import datetime, time
-        if self.pickup_time_slot:
-            pickup_datetime = datetime.combine(self.pickup_date, self.pickup_time_slot.start_time)
-        else:
-            pickup_datetime = datetime.combine(self.pickup_date, time(0, 0))
-        pickup_datetime = timezone.make_aware(pickup_datetime)
-        
-        time_until_pickup = pickup_datetime - now
-        min_notice = timedelta(hours=settings.min_reschedule_notice_hours)
-        
-        if time_until_pickup < min_notice:
-            hours_needed = settings.min_reschedule_notice_hours
-            return False, f'Rescheduling requires at least {hours_needed} hours notice'
+        from .policy import BookingPolicy
         
-        return True, ''
+        decision = BookingPolicy(settings).evaluate(self)
+        return decision['can_reschedule'], decision['reschedule_message']
 
 
 class BookingItem(models.Model):
@@ -0,0 +1,136 @@
+"""Cancellation and reschedule rules for bookings."""
+from datetime import datetime, time, timedelta
+
+from django.db import NotSupportedError
+from django.db.models import BooleanField, Case, DateTimeField, F, Func, Q, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+
+class PickupAt(Func):
+    """
+    Pickup moment of a booking in SQL, like ``BookingPolicy.pickup_datetime``:
+    pickup date plus slot start (midnight without a slot) in the current time zone.
+    """
+
+    output_field = DateTimeField()
+
+    def __init__(self):
+        super().__init__(F('pickup_date'), Coalesce(F('pickup_time_slot__start_time'), Value(time(0, 0))))
+
+    def compile_parts(self, compiler):
+        (date_sql, date_params), (time_sql, time_params) = (
+            compiler.compile(expression) for expression in self.get_source_expressions()
+        )
+        return date_sql, time_sql, (*date_params, *time_params)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        raise NotSupportedError(f'Pickup deadlines cannot be computed in SQL on {connection.vendor}')
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        date_sql, time_sql, params = self.compile_parts(compiler)
+        return f'(({date_sql} + {time_sql}) AT TIME ZONE %s)', (*params, timezone.get_current_timezone_name())
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        date_sql, time_sql, params = self.compile_parts(compiler)
+        # The function Django registers for its Trunc lookups; reading the
+        # value in the current time zone and writing it in the connection's
+        # turns local wall time into the stored (UTC) format
+        return (
+            f"django_datetime_trunc('second', {date_sql} || ' ' || {time_sql}, %s, %s)",
+            (*params, connection.timezone_name, timezone.get_current_timezone_name()),
+        )
+
+
+class BookingPolicy:
+    """
+    Evaluate cancellation/reschedule eligibility, deadlines and fees.
+
+    Built from a single BookingSettings snapshot so that any number of
+    bookings can be evaluated without fetching the settings again.
+    """
+
+    CLOSED_STATUSES = ('completed', 'cancelled')
+
+    def __init__(self, settings=None):
+        from apps.services.models import BookingSettings
+        self.settings = settings or BookingSettings.get_settings()
+        self.cancellation_notice = timedelta(hours=self.settings.min_cancellation_notice_hours)
+        self.reschedule_notice = timedelta(hours=self.settings.min_reschedule_notice_hours)
+
+    @staticmethod
+    def pickup_datetime(booking):
+        """Pickup moment; bookings without a time slot use midnight of the pickup date."""
+        if booking.pickup_time_slot:
+            start_time = booking.pickup_time_slot.start_time
+        else:
+            start_time = time(0, 0)
+        return timezone.make_aware(datetime.combine(booking.pickup_date, start_time))
+
+    def evaluate(self, booking, now=None):
+        """
+        Compute the full rule set for a booking in one pass.
+        Returns: dict with eligibility, messages, deadlines and fee details
+        """
+        now = now or timezone.now()
+        pickup_at = self.pickup_datetime(booking)
+        cancellable_until = pickup_at - self.cancellation_notice
+        reschedulable_until = pickup_at - self.reschedule_notice
+
+        if booking.status in self.CLOSED_STATUSES:
+            closed_message = 'Booking is already completed or cancelled'
+            can_cancel, cancel_message = False, closed_message
+            can_reschedule, reschedule_message = False, closed_message
+        else:
+            can_cancel = now <= cancellable_until
+            cancel_message = '' if can_cancel else (
+                f'Cancellation requires at least {self.settings.min_cancellation_notice_hours} hours notice'
+            )
+            can_reschedule = now <= reschedulable_until
+            reschedule_message = '' if can_reschedule else (
+                f'Rescheduling requires at least {self.settings.min_reschedule_notice_hours} hours notice'
+            )
+
+        fee_percentage = self.settings.cancellation_fee_percentage
+        cancellation_fee = (booking.total * fee_percentage) / 100 if fee_percentage > 0 else 0
+
+        return {
+            'pickup_at': pickup_at,
+            'can_cancel': can_cancel,
+            'cancel_message': cancel_message,
+            'cancellable_until': cancellable_until,
+            'can_reschedule': can_reschedule,
+            'reschedule_message': reschedule_message,
+            'reschedulable_until': reschedulable_until,
+            'min_cancellation_notice_hours': self.settings.min_cancellation_notice_hours,
+            'min_reschedule_notice_hours': self.settings.min_reschedule_notice_hours,
+            'cancellation_fee_percentage': fee_percentage,
+            'cancellation_fee': cancellation_fee,
+            'refund_amount': booking.total - cancellation_fee,
+        }
+
+    def annotate(self, queryset, now=None):
+        """
+        Annotate a Booking queryset with the same deadlines, computed in SQL:
+        pickup_at, cancellable_until, reschedulable_until, is_cancellable
+        and is_reschedulable. PostgreSQL and SQLite.
+        """
+        now = now or timezone.now()
+        open_booking = ~Q(status__in=self.CLOSED_STATUSES)
+        return queryset.annotate(
+            pickup_at=PickupAt(),
+        ).annotate(
+            cancellable_until=F('pickup_at') - Value(self.cancellation_notice),
+            reschedulable_until=F('pickup_at') - Value(self.reschedule_notice),
+        ).annotate(
+            is_cancellable=Case(
+                When(open_booking & Q(cancellable_until__gte=now), then=Value(True)),
+                default=Value(False),
+                output_field=BooleanField(),
+            ),
+            is_reschedulable=Case(
+                When(open_booking & Q(reschedulable_until__gte=now), then=Value(True)),
+                default=Value(False),
+                output_field=BooleanField(),
+            ),
+        )
@@ -79,51 +79,46 @@ class BookingDetailSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at', 'confirmed_at', 'completed_at', 'cancelled_at'
         )
     
+    def get_policy(self):
+        """Return a BookingPolicy built from one settings lookup per serialization."""
+        from .policy import BookingPolicy
+        
+        if 'booking_policy' not in self.context:
+            self.context['booking_policy'] = BookingPolicy()
+        return self.context['booking_policy']
+    
+    def get_decision(self, obj):
+        """Evaluate the booking rules once per booking and reuse the result."""
+        cache = self.context.setdefault('booking_decisions', {})
+        if obj.pk not in cache:
+            cache[obj.pk] = self.get_policy().evaluate(obj)
+        return cache[obj.pk]
+    
     def get_user_details(self, obj):
         """Return user details."""
-        try:
-            if not obj.user:
-                return None
-            
-            user = obj.user
-            # Get phone and convert to string if it's a PhoneNumber object
-            phone = ''
-            if hasattr(user, 'phone') and user.phone:
-                phone = str(user.phone)  # Convert PhoneNumber to string
-            
-            result = {
-                'id': user.id,
-                'first_name': user.first_name or '',
-                'last_name': user.last_name or '',
-                'email': user.email or '',
-                'phone': phone,
-            }
-            print(f"✅ User details for booking {obj.id}: {result}")
-            return result
-        except Exception as e:
-            print(f"❌ Error in get_user_details for booking {obj.id}: {type(e).__name__}: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            return None
+        user = obj.user
+        return {
+            'id': user.id,
+            'first_name': user.first_name or '',
+            'last_name': user.last_name or '',
+            'email': user.email or '',
+            'phone': str(user.phone) if user.phone else '',
+        }
     
     def get_can_cancel(self, obj):
-        can_cancel, _ = obj.can_cancel()
-        return can_cancel
+        return self.get_decision(obj)['can_cancel']
     
     def get_can_reschedule(self, obj):
-        can_reschedule, _ = obj.can_reschedule()
-        return can_reschedule
+        return self.get_decision(obj)['can_reschedule']
     
     def get_cancellation_info(self, obj):
-        from apps.services.models import BookingSettings
-        settings = BookingSettings.get_settings()
-        can_cancel, message = obj.can_cancel()
+        decision = self.get_decision(obj)
         
         return {
-            'can_cancel': can_cancel,
-            'message': message,
-            'min_notice_hours': settings.min_cancellation_notice_hours,
-            'cancellation_fee_percentage': float(settings.cancellation_fee_percentage)
+            'can_cancel': decision['can_cancel'],
+            'message': decision['cancel_message'],
+            'min_notice_hours': decision['min_cancellation_notice_hours'],
+            'cancellation_fee_percentage': float(decision['cancellation_fee_percentage'])
         }
 
 
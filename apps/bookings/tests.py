@@ -0,0 +1,143 @@
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+import pytest
+from django.utils import timezone
+from freezegun import freeze_time
+
+from apps.accounts.models import Address, User
+from apps.bookings.models import Booking, TimeSlot
+from apps.bookings.policy import BookingPolicy
+from apps.services.models import BookingSettings, District
+
+pytestmark = pytest.mark.django_db
+
+PICKUP_DATE = date(2026, 3, 10)
+
+
+@pytest.fixture
+def booking_settings():
+    return BookingSettings.objects.create(
+        pk=1, min_cancellation_notice_hours=24, min_reschedule_notice_hours=6,
+        cancellation_fee_percentage=Decimal('12.50'),
+    )
+
+
+@pytest.fixture
+def address():
+    user = User.objects.create_user(
+        email='customer@example.com', password='secret', first_name='Ayşe', last_name='Yılmaz'
+    )
+    return Address.objects.create(
+        user=user, title='Ev', district=District.objects.create(name='Kadıköy'), full_address='Moda Cd. 1'
+    )
+
+
+@pytest.fixture
+def bookings(address):
+    slot = TimeSlot.objects.create(date=PICKUP_DATE, start_time=time(14, 30), end_time=time(16, 30))
+
+    def create(**fields):
+        return Booking.objects.create(
+            user=address.user, pickup_address=address, pickup_date=PICKUP_DATE,
+            subtotal=Decimal('199.99'), total=0, **fields
+        )
+    return [
+        create(pickup_time_slot=slot),
+        create(),  # Midnight without a slot
+        create(pickup_time_slot=slot, status='confirmed'),
+        create(pickup_time_slot=slot, status='completed'),
+        create(status='cancelled'),
+    ]
+
+
+def local(hour, minute=0, day=PICKUP_DATE):
+    return timezone.make_aware(datetime.combine(day, time(hour, minute)))
+
+
+def test_pickup_datetime(bookings):
+    assert BookingPolicy.pickup_datetime(bookings[0]) == local(14, 30)
+    assert BookingPolicy.pickup_datetime(bookings[1]) == local(0)
+
+
+# Around the deadlines of the 14:30 slot and of midnight, 24h/6h notice
+@pytest.mark.parametrize('now', [
+    local(14, 30, PICKUP_DATE - timedelta(days=1)) - timedelta(seconds=1),
+    local(14, 30, PICKUP_DATE - timedelta(days=1)),
+    local(14, 30, PICKUP_DATE - timedelta(days=1)) + timedelta(seconds=1),
+    local(0, 0, PICKUP_DATE - timedelta(days=1)),
+    local(0, 0, PICKUP_DATE - timedelta(days=1)) + timedelta(microseconds=1),
+    local(8, 30),
+    local(8, 30) + timedelta(seconds=1),
+    local(18, 0, PICKUP_DATE - timedelta(days=1)),
+    local(18, 0, PICKUP_DATE - timedelta(days=1)) + timedelta(seconds=1),
+])
+def test_annotate_agrees_with_evaluate(booking_settings, bookings, now):
+    policy = BookingPolicy()
+
+    annotated = {b.pk: b for b in policy.annotate(Booking.objects.all(), now=now)}
+
+    assert len(annotated) == len(bookings)
+    for booking in bookings:
+        decision = policy.evaluate(booking, now=now)
+        row = annotated[booking.pk]
+        assert row.pickup_at == decision['pickup_at']
+        assert row.cancellable_until == decision['cancellable_until']
+        assert row.reschedulable_until == decision['reschedulable_until']
+        assert row.is_cancellable == decision['can_cancel']
+        assert row.is_reschedulable == decision['can_reschedule']
+        with freeze_time(now):
+            assert booking.can_cancel()[0] == decision['can_cancel']
+            assert booking.can_reschedule()[0] == decision['can_reschedule']
+
+
+def test_deadline_boundaries(booking_settings, bookings):
+    policy = BookingPolicy()
+    booking = bookings[0]
+    deadline = local(14, 30, PICKUP_DATE - timedelta(days=1))
+
+    assert policy.evaluate(booking, now=deadline)['can_cancel']
+    decision = policy.evaluate(booking, now=deadline + timedelta(seconds=1))
+    assert not decision['can_cancel']
+    assert decision['cancel_message'] == 'Cancellation requires at least 24 hours notice'
+    assert decision['can_reschedule']
+    assert policy.evaluate(booking, now=local(8, 30))['can_reschedule']
+    assert not policy.evaluate(booking, now=local(8, 31))['can_reschedule']
+
+    closed = policy.evaluate(bookings[3], now=deadline - timedelta(days=7))
+    assert (closed['can_cancel'], closed['can_reschedule']) == (False, False)
+    assert closed['cancel_message'] == 'Booking is already completed or cancelled'
+
+
+def test_cancellation_fee_and_refund(booking_settings, bookings):
+    booking = bookings[0]
+
+    decision = BookingPolicy().evaluate(booking)
+    assert decision['cancellation_fee_percentage'] == Decimal('12.50')
+    assert decision['cancellation_fee'] == Decimal('24.99875')
+    assert decision['refund_amount'] == Decimal('174.99125')
+    assert decision['cancellation_fee'] + decision['refund_amount'] == booking.total
+
+    booking_settings.cancellation_fee_percentage = 0
+    decision = BookingPolicy(booking_settings).evaluate(booking)
+    assert (decision['cancellation_fee'], decision['refund_amount']) == (0, booking.total)
+
+    booking_settings.cancellation_fee_percentage = 100
+    decision = BookingPolicy(booking_settings).evaluate(booking)
+    assert (decision['cancellation_fee'], decision['refund_amount']) == (booking.total, 0)
+
+
+def test_booking_admin_changelist(client, booking_settings, bookings):
+    client.force_login(User.objects.create_superuser(
+        email='admin@example.com', password='secret', first_name='A', last_name='B'
+    ))
+
+    with freeze_time(local(12, 0, PICKUP_DATE - timedelta(days=2))):
+        # Ordered by cancellable_until (column 0 is the action checkbox)
+        response = client.get('/admin/bookings/booking/', {'o': '5'})
+
+    assert response.status_code == 200
+    rows = list(response.context['cl'].result_list)
+    # Midnight pickups first; closed bookings have no deadline
+    assert {row.pk for row in rows[:2]} == {bookings[1].pk, bookings[4].pk}
+    assert {row.pk for row in rows if row.is_cancellable} == {bookings[0].pk, bookings[1].pk, bookings[2].pk}
@@ -1,15 +1,18 @@
 from rest_framework import viewsets, status, filters
-from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.decorators import action, api_view, permission_classes, renderer_classes
+from rest_framework.parsers import FormParser, MultiPartParser
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from django_filters.rest_framework import DjangoFilterBackend
 from django.utils import timezone
-from django.db.models import Q, Sum, Count, Avg, F, DecimalField
+from django.db.models import Q, Sum, Count, Avg, F, DecimalField, Prefetch
 from django.db.models.functions import TruncDate
 from datetime import datetime, timedelta
 from decimal import Decimal
+from django.conf import settings as django_settings
 from django.contrib.auth import get_user_model
 from .models import Booking, TimeSlot, BookingStatusHistory
+from apps.accounts.models import Address
 from .serializers import (
     BookingListSerializer,
     BookingDetailSerializer,
@@ -19,6 +22,13 @@ from .serializers import (
     BookingStatusHistorySerializer,
 )
 from .permissions import IsBookingOwnerOrAdmin
+from .policy import BookingPolicy
+from apps.core.cache import get_or_compute
+from apps.core.pagination import CreatedAtCursorPagination
+from apps.core.parsers import ORJSONParser
+from apps.core.renderers import ORJSONRenderer
+from config.db import read_replica, statement_timeout
+from config.db_instrumentation import query_budget
 
 User = get_user_model()
 
@@ -26,7 +36,11 @@ User = get_user_model()
 class BookingViewSet(viewsets.ModelViewSet):
     """Booking CRUD operations."""
     
+    query_budget = 20
     permission_classes = (IsAuthenticated,)
+    renderer_classes = [ORJSONRenderer]
+    parser_classes = [ORJSONParser, FormParser, MultiPartParser]
+    throttle_scopes = {'create': 'booking_create'}
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['status', 'pickup_date']
     search_fields = ['booking_number']
@@ -35,13 +49,17 @@ class BookingViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         user = self.request.user
+        queryset = Booking.objects.select_related(
+            'user', 'pickup_address__district', 'pickup_time_slot'
+        )
+        if self.action != 'list':
+            # Detail serializer also renders delivery/technician/item data
+            queryset = queryset.select_related(
+                'delivery_address__district', 'assigned_technician'
+            ).prefetch_related('items__subtype__pricing')
         if user.is_staff or user.user_type == 'admin':
-            return Booking.objects.all().select_related(
-                'user', 'pickup_address', 'pickup_time_slot'
-            ).prefetch_related('items__subtype')
-        return Booking.objects.filter(user=user).select_related(
-            'pickup_address', 'pickup_time_slot'
-        ).prefetch_related('items__subtype')
+            return queryset
+        return queryset.filter(user=user)
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -103,13 +121,14 @@ class BookingViewSet(viewsets.ModelViewSet):
     def cancel(self, request, pk=None):
         """Cancel a booking."""
         booking = self.get_object()
+        policy = BookingPolicy()
         
         # Check if cancellation is allowed
-        can_cancel, message = booking.can_cancel()
-        if not can_cancel:
+        decision = policy.evaluate(booking)
+        if not decision['can_cancel']:
             return Response({
                 'success': False,
-                'error': message
+                'error': decision['cancel_message']
             }, status=status.HTTP_400_BAD_REQUEST)
         
         # Update status
@@ -133,21 +152,15 @@ class BookingViewSet(viewsets.ModelViewSet):
         if booking.delivery_time_slot:
             booking.delivery_time_slot.decrement_bookings()
         
-        # Calculate refund amount (if applicable)
-        from apps.services.models import BookingSettings
-        settings = BookingSettings.get_settings()
-        
-        refund_amount = booking.total
-        if settings.cancellation_fee_percentage > 0:
-            fee = (booking.total * settings.cancellation_fee_percentage) / 100
-            refund_amount = booking.total - fee
+        # Refund amount (if applicable) comes from the same policy evaluation
+        refund_amount = decision['refund_amount']
         
         # TODO: Process refund via payment gateway
         
         return Response({
             'success': True,
             'message': 'Booking cancelled successfully',
-            'data': BookingDetailSerializer(booking).data,
+            'data': BookingDetailSerializer(booking, context={'booking_policy': policy}).data,
             'refund_amount': str(refund_amount)
         })
     
@@ -354,21 +367,36 @@ class TimeSlotViewSet(viewsets.ReadOnlyModelViewSet):
 
 # Admin-only endpoints
 
+ADMIN_CUSTOMER_ORDERING = {
+    'date_joined': 'date_joined',
+    'total_bookings': 'booking_count',
+    'total_spent': 'lifetime_value',
+    'last_booking_date': 'last_booking_at',
+}
+
+
+@query_budget(5)
+@statement_timeout('report')
+@read_replica()
 @api_view(['GET'])
 @permission_classes([IsAdminUser])
 def admin_customers(request):
     """Get all customers with stats."""
+    ordering = request.GET.get('ordering', '-date_joined')
+    order_field = ADMIN_CUSTOMER_ORDERING.get(ordering.lstrip('-'), 'date_joined')
+    if ordering.startswith('-'):
+        order_by = F(order_field).desc(nulls_last=True)
+    else:
+        order_by = F(order_field).asc(nulls_first=True)
+    
+    # Stats are denormalized on the user row (see User.refresh_booking_stats)
     customers = User.objects.filter(
         user_type='customer',
         is_staff=False
-    ).annotate(
-        total_bookings=Count('bookings'),
-        total_spent=Sum('bookings__total')
-    ).order_by('-date_joined')
+    ).order_by(order_by, '-id')
     
     customer_data = []
     for customer in customers:
-        last_booking = customer.bookings.order_by('-created_at').first()
         customer_data.append({
             'id': customer.id,
             'email': customer.email,
@@ -376,9 +404,9 @@ def admin_customers(request):
             'last_name': customer.last_name,
             'phone': str(customer.phone) if customer.phone else '',
             'date_joined': customer.date_joined.isoformat(),
-            'total_bookings': customer.total_bookings or 0,
-            'total_spent': float(customer.total_spent or 0),
-            'last_booking_date': last_booking.created_at.isoformat() if last_booking else None,
+            'total_bookings': customer.booking_count,
+            'total_spent': float(customer.lifetime_value),
+            'last_booking_date': customer.last_booking_at.isoformat() if customer.last_booking_at else None,
         })
     
     return Response({
@@ -387,24 +415,33 @@ def admin_customers(request):
     })
 
 
+@query_budget(5)
+@statement_timeout('report')
 @api_view(['GET'])
 @permission_classes([IsAdminUser])
 def admin_customer_detail(request, customer_id):
-    """Get customer details with bookings and addresses."""
+    """
+    Get customer details with addresses and a cursor-paginated booking history.
+    Query count is constant: customer, addresses (with districts), one booking page.
+    """
     try:
-        customer = User.objects.get(id=customer_id, user_type='customer')
+        customer = User.objects.prefetch_related(
+            Prefetch('addresses', queryset=Address.objects.select_related('district'))
+        ).get(id=customer_id, user_type='customer')
     except User.DoesNotExist:
         return Response({
             'success': False,
             'error': 'Customer not found'
         }, status=status.HTTP_404_NOT_FOUND)
     
-    # Get customer stats
-    total_bookings = customer.bookings.count()
-    total_spent = customer.bookings.aggregate(total=Sum('total'))['total'] or 0
-    
-    # Get bookings
-    bookings = customer.bookings.all().order_by('-created_at')
+    # Get bookings (one page, newest first; ?cursor=...&page_size=...)
+    paginator = CreatedAtCursorPagination()
+    bookings = paginator.paginate_queryset(
+        customer.bookings.select_related('pickup_time_slot').only(
+            'id', 'user', 'pickup_date', 'status', 'total', 'created_at', 'pickup_time_slot__start_time'
+        ),
+        request
+    )
     booking_data = []
     for booking in bookings:
         booking_data.append({
@@ -417,9 +454,8 @@ def admin_customer_detail(request, customer_id):
         })
     
     # Get addresses
-    addresses = customer.addresses.all()
     address_data = []
-    for addr in addresses:
+    for addr in customer.addresses.all():
         address_data.append({
             'id': addr.id,
             'title': addr.title,
@@ -437,15 +473,22 @@ def admin_customer_detail(request, customer_id):
             'last_name': customer.last_name,
             'phone': str(customer.phone) if customer.phone else '',
             'date_joined': customer.date_joined.isoformat(),
-            'total_bookings': total_bookings,
-            'total_spent': float(total_spent),
+            # Denormalized stats (see User.refresh_booking_stats)
+            'total_bookings': customer.booking_count,
+            'total_spent': float(customer.lifetime_value),
             'addresses': address_data,
             'bookings': booking_data,
+            'bookings_next': paginator.get_next_link(),
+            'bookings_previous': paginator.get_previous_link(),
         }
     })
 
 
+@query_budget(10)
+@statement_timeout('report')
+@read_replica()
 @api_view(['GET'])
+@renderer_classes([ORJSONRenderer])
 @permission_classes([IsAdminUser])
 def admin_reports(request):
     """Get admin reports and statistics."""
@@ -489,6 +532,7 @@ def admin_reports(request):
     })
 
 
+@query_budget(5)
 @api_view(['GET', 'PUT'])
 @permission_classes([IsAdminUser])
 def admin_settings(request):
@@ -533,85 +577,89 @@ def admin_settings(request):
         })
 
 
+@query_budget(5)
+@statement_timeout('report')
+@read_replica()
 @api_view(['GET'])
 @permission_classes([IsAdminUser])
 def admin_stats(request):
     """Get admin dashboard statistics."""
     today = timezone.now().date()
+    data = get_or_compute(
+        f'admin_stats:{today.isoformat()}',
+        lambda: compute_admin_stats(today),
+        timeout=django_settings.ADMIN_STATS_CACHE_TIMEOUT
+    )
     
-    # Total bookings
-    total_bookings = Booking.objects.count()
-    
-    # Today's bookings
-    today_bookings = Booking.objects.filter(created_at__date=today).count()
-    
-    # This month's bookings
+    return Response({
+        'success': True,
+        'data': data
+    })
+
+
+def compute_admin_stats(today):
+    """Dashboard statistics: one conditional aggregate, the active-customer count and the revenue trend."""
     month_start = today.replace(day=1)
-    month_bookings = Booking.objects.filter(created_at__date__gte=month_start).count()
-    
-    # Pending bookings
-    pending_bookings = Booking.objects.filter(status='pending').count()
-    
-    # Revenue stats
-    total_revenue = Booking.objects.filter(
-        status__in=['completed', 'confirmed', 'in_progress']
-    ).aggregate(total=Sum('total'))['total'] or Decimal('0')
-    
-    today_revenue = Booking.objects.filter(
-        created_at__date=today,
-        status__in=['completed', 'confirmed', 'in_progress']
-    ).aggregate(total=Sum('total'))['total'] or Decimal('0')
-    
-    month_revenue = Booking.objects.filter(
-        created_at__date__gte=month_start,
-        status__in=['completed', 'confirmed', 'in_progress']
-    ).aggregate(total=Sum('total'))['total'] or Decimal('0')
-    
-    # Active customers
-    active_customers = User.objects.filter(
-        bookings__isnull=False,
-        is_active=True
-    ).distinct().count()
+    seven_days_ago = today - timedelta(days=6)
     
-    # Status breakdown
-    status_breakdown = Booking.objects.values('status').annotate(
-        count=Count('id')
-    ).order_by('-count')
+    is_today = Q(created_at__date=today)
+    is_this_month = Q(created_at__date__gte=month_start)
+    is_revenue = Q(status__in=['completed', 'confirmed', 'in_progress'])
+    
+    aggregates = {
+        'total_bookings': Count('id'),
+        'today_bookings': Count('id', filter=is_today),
+        'month_bookings': Count('id', filter=is_this_month),
+        'total_revenue': Sum('total', filter=is_revenue),
+        'today_revenue': Sum('total', filter=is_revenue & is_today),
+        'month_revenue': Sum('total', filter=is_revenue & is_this_month),
+    }
+    for status_value, _ in Booking.STATUS_CHOICES:
+        aggregates[f'status_{status_value}'] = Count('id', filter=Q(status=status_value))
+    stats = Booking.objects.order_by().aggregate(**aggregates)
+    active_customers = User.objects.filter(is_active=True, booking_count__gt=0).count()
+    
+    # Status breakdown (only statuses that have bookings, most common first)
+    status_breakdown = sorted(
+        (
+            {'status': status_value, 'count': stats[f'status_{status_value}']}
+            for status_value, _ in Booking.STATUS_CHOICES
+            if stats[f'status_{status_value}']
+        ),
+        key=lambda item: -item['count']
+    )
     
     # Recent revenue trend (last 7 days)
-    seven_days_ago = today - timedelta(days=6)
     revenue_trend = Booking.objects.filter(
-        created_at__date__gte=seven_days_ago,
-        status__in=['completed', 'confirmed', 'in_progress']
+        is_revenue,
+        created_at__date__gte=seven_days_ago
     ).annotate(
         date=TruncDate('created_at')
     ).values('date').annotate(
         revenue=Sum('total')
     ).order_by('date')
     
-    return Response({
-        'success': True,
-        'data': {
-            'total_bookings': total_bookings,
-            'today_bookings': today_bookings,
-            'month_bookings': month_bookings,
-            'pending_bookings': pending_bookings,
-            'total_revenue': str(total_revenue),
-            'today_revenue': str(today_revenue),
-            'month_revenue': str(month_revenue),
-            'active_customers': active_customers,
-            'status_breakdown': list(status_breakdown),
-            'revenue_trend': [
-                {
-                    'date': item['date'].isoformat(),
-                    'revenue': str(item['revenue'])
-                }
-                for item in revenue_trend
-            ]
-        }
-    })
+    return {
+        'total_bookings': stats['total_bookings'],
+        'today_bookings': stats['today_bookings'],
+        'month_bookings': stats['month_bookings'],
+        'pending_bookings': stats['status_pending'],
+        'total_revenue': str(stats['total_revenue'] or Decimal('0')),
+        'today_revenue': str(stats['today_revenue'] or Decimal('0')),
+        'month_revenue': str(stats['month_revenue'] or Decimal('0')),
+        'active_customers': active_customers,
+        'status_breakdown': status_breakdown,
+        'revenue_trend': [
+            {
+                'date': item['date'].isoformat(),
+                'revenue': str(item['revenue'])
+            }
+            for item in revenue_trend
+        ]
+    }
 
 
+@query_budget(5)
 @api_view(['GET'])
 @permission_classes([IsAdminUser])
 def admin_recent_bookings(request):
@@ -0,0 +1,65 @@
+"""Cache helpers shared across apps."""
+import time
+
+from django.core.cache import cache, caches
+from django.core.cache.backends.redis import RedisCache
+
+_MISSING = object()
+
+
+def redis_client(backend=None):
+    """
+    The redis-py client behind a ``RedisCache`` (default: the default cache),
+    or None for other backends.
+
+    RedisCache builds a new client on every call (~0.2 ms); one is kept per
+    backend instance (those are per thread). This and ``redis_url`` are the
+    only places that reach into the backend's private attributes.
+    """
+    backend = backend or caches['default']
+    if not isinstance(backend, RedisCache):
+        return None
+    client = getattr(backend, '_redis_client', None)
+    if client is None:
+        client = backend._redis_client = backend._cache.get_client(write=True)
+    return client
+
+
+def redis_url(backend=None):
+    """URL of the (first) server behind a ``RedisCache``, or None for other backends."""
+    backend = backend or caches['default']
+    if not isinstance(backend, RedisCache):
+        return None
+    return backend._servers[0]
+
+
+def get_or_compute(key, compute, timeout, lock_timeout=10, poll_interval=0.05):
+    """
+    Return the cached value for ``key``, computing it at most once at a time.
+
+    On a miss, the first caller takes a short-lived lock (``cache.add``) and
+    computes the value; concurrent callers wait for that result instead of
+    running ``compute`` themselves. If the lock holder does not finish within
+    ``lock_timeout`` seconds the waiter computes the value on its own.
+    """
+    value = cache.get(key, _MISSING)
+    if value is not _MISSING:
+        return value
+
+    lock_key = f'{key}:lock'
+    if cache.add(lock_key, 1, lock_timeout):
+        try:
+            value = compute()
+            cache.set(key, value, timeout)
+            return value
+        finally:
+            cache.delete(lock_key)
+
+    deadline = time.monotonic() + lock_timeout
+    while time.monotonic() < deadline:
+        time.sleep(poll_interval)
+        value = cache.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+    return compute()
@@ -0,0 +1,57 @@
+"""
+Circuit breaker for calls to external services.
+
+State lives in the cache so that all workers stop calling a failing service
+together: after ``failure_threshold`` consecutive failures the circuit opens
+for ``reset_timeout`` seconds and calls fail fast with ``CircuitOpenError``.
+Once it expires, calls go through again (half-open); the next failure
+reopens it immediately, a success closes it.
+"""
+from django.core.cache import cache
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a service whose circuit is open."""
+
+
+class CircuitBreaker:
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures_key = f'circuit:{name}:failures'
+        self.open_key = f'circuit:{name}:open'
+
+    def before_call(self):
+        if cache.get(self.open_key):
+            raise CircuitOpenError(f'{self.name} is unavailable, try again later')
+
+    def record_success(self):
+        cache.delete(self.failures_key)
+
+    def record_failure(self):
+        try:
+            failures = cache.incr(self.failures_key)
+        except ValueError:
+            # Kept longer than the open period so a half-open failure reopens it
+            failures = 1
+            cache.set(self.failures_key, failures, self.reset_timeout * 4)
+        if failures >= self.failure_threshold:
+            cache.set(self.open_key, 1, self.reset_timeout)
+
+    async def abefore_call(self):
+        if await cache.aget(self.open_key):
+            raise CircuitOpenError(f'{self.name} is unavailable, try again later')
+
+    async def arecord_success(self):
+        await cache.adelete(self.failures_key)
+
+    async def arecord_failure(self):
+        try:
+            failures = await cache.aincr(self.failures_key)
+        except ValueError:
+            failures = 1
+            await cache.aset(self.failures_key, failures, self.reset_timeout * 4)
+        if failures >= self.failure_threshold:
+            await cache.aset(self.open_key, 1, self.reset_timeout)
@@ -2,11 +2,14 @@
 from django.http import JsonResponse
 from django.views.decorators.http import require_GET
 
+from config import startup
+
 
 @require_GET
 def health_check(request):
     """Simple health check endpoint."""
     return JsonResponse({
         'status': 'healthy',
-        'service': 'haliyikama-backend'
+        'service': 'haliyikama-backend',
+        'startup': startup.timings,
     })
@@ -0,0 +1,81 @@
+"""
+Weigh the CPU cost of compressing API responses against the bytes saved.
+
+    python manage.py bench_compression --bookings 20 --repeat 20
+
+Compresses the catalog tree, an admin booking list page and the admin
+report (as rendered from the current database) with gzip and brotli at
+several levels. For each it reports the time, the size and the link speed
+at which compressing costs as much time as it saves on the wire: on any
+slower connection (mobile clients, most of ours) compression is a win.
+The levels CompressionMiddleware uses are marked with *.
+"""
+import gzip
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from apps.core.management.commands.bench_json import Command as BenchJSONCommand
+from config import compression
+
+LEVELS = [('gzip', 1), ('gzip', 6), ('gzip', 9), ('br', 1), ('br', 4), ('br', 6), ('br', 11)]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark gzip/brotli response compression: CPU time vs bytes saved'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--bookings',
+            type=int,
+            default=20,
+            help='Bookings in the booking list payload (default: 20, one admin page)'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=20,
+            help='Timed runs per payload and level, best is reported (default: 20)'
+        )
+
+    def handle(self, *args, **options):
+        payloads = BenchJSONCommand()
+        bodies = [
+            ('catalog', JSONRenderer().render(payloads.catalog())),
+            ('booking list', JSONRenderer().render(payloads.booking_list(options['bookings']))),
+            ('admin report', JSONRenderer().render(payloads.admin_report())),
+        ]
+        if compression.brotli is None:
+            self.stdout.write(self.style.WARNING('brotli is not installed, only gzip is measured'))
+
+        defaults = {('gzip', compression.GZIP_LEVEL), ('br', compression.BROTLI_QUALITY)}
+        for name, body in bodies:
+            self.stdout.write(f'{name}: {len(body) / 1024:.1f} KB')
+            for codec, level in LEVELS:
+                if codec == 'br' and compression.brotli is None:
+                    continue
+                elapsed, size = self.measure(codec, level, body, options['repeat'])
+                saved = len(body) - size
+                break_even = saved * 8 / elapsed / 1e6 if elapsed else float('inf')
+                marker = '*' if (codec, level) in defaults else ' '
+                self.stdout.write(
+                    f'  {codec:>4} {level:>2}{marker} {elapsed * 1000:7.3f} ms  {size / 1024:7.1f} KB '
+                    f'({size * 100 / len(body):4.1f}%)  break-even {break_even:8.0f} Mbit/s'
+                )
+
+    def measure(self, codec, level, body, repeat):
+        if codec == 'br':
+            def run():
+                return compression.brotli.compress(body, mode=compression.brotli.MODE_TEXT, quality=level)
+        else:
+            def run():
+                return gzip.compress(body, compresslevel=level, mtime=0)
+
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            compressed = run()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best, len(compressed)
@@ -0,0 +1,68 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.core.signals import request_finished, request_started
+from django.db import connection
+
+
+class Command(BaseCommand):
+    help = 'Benchmark per-request DB latency (p50/p99) with and without connection reuse'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=200,
+            help='Number of simulated requests per mode (default: 200)'
+        )
+        parser.add_argument(
+            '--queries',
+            type=int,
+            default=3,
+            help='Queries per simulated request (default: 3)'
+        )
+
+    def handle(self, *args, **options):
+        requests = options['requests']
+        queries = options['queries']
+        configured_max_age = connection.settings_dict['CONN_MAX_AGE']
+
+        modes = [
+            # Connect (and TLS handshake) on every request
+            ('no reuse', 0),
+            ('reuse', configured_max_age or 60),
+        ]
+
+        self.stdout.write(
+            f'{requests} requests x {queries} queries against '
+            f"{connection.settings_dict['HOST'] or connection.vendor}"
+        )
+        try:
+            for name, max_age in modes:
+                connection.close()
+                connection.settings_dict['CONN_MAX_AGE'] = max_age
+                timings = sorted(self.run_requests(requests, queries))
+                self.stdout.write(
+                    f'{name:>9}: p50 {self.percentile(timings, 50):.2f} ms, '
+                    f'p99 {self.percentile(timings, 99):.2f} ms'
+                )
+        finally:
+            connection.settings_dict['CONN_MAX_AGE'] = configured_max_age
+            connection.close()
+
+    def run_requests(self, requests, queries):
+        """Drive the same connection lifecycle Django applies around each request."""
+        for _ in range(requests):
+            start = time.perf_counter()
+            request_started.send(sender=self.__class__)
+            with connection.cursor() as cursor:
+                for _ in range(queries):
+                    cursor.execute('SELECT 1')
+                    cursor.fetchone()
+            request_finished.send(sender=self.__class__)
+            yield (time.perf_counter() - start) * 1000
+
+    @staticmethod
+    def percentile(sorted_values, pct):
+        index = min(len(sorted_values) - 1, round(pct / 100 * (len(sorted_values) - 1)))
+        return sorted_values[index]
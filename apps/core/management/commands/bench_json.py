@@ -0,0 +1,102 @@
+"""
+Compare DRF's JSONRenderer/JSONParser with the orjson ones.
+
+    python manage.py bench_json --bookings 200 --repeat 50
+
+Renders the catalog tree, a booking list and the admin report from the
+current database with both renderers, checks the bytes are identical and
+reports the time per payload; then parses the rendered bytes back with
+both parsers.
+"""
+import io
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.bookings.models import Booking
+from apps.bookings.serializers import BookingListSerializer
+from apps.bookings.views import admin_reports
+from apps.core.parsers import ORJSONParser
+from apps.core.renderers import ORJSONRenderer, orjson
+from apps.services.models import Category
+from apps.services.serializers import CategorySerializer
+
+
+class Command(BaseCommand):
+    help = 'Benchmark JSON rendering and parsing of API payloads, stdlib vs orjson'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--bookings',
+            type=int,
+            default=100,
+            help='Bookings in the booking list payload (default: 100)'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=20,
+            help='Timed runs per payload and renderer, best is reported (default: 20)'
+        )
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            raise CommandError('orjson is not installed (pip install orjson)')
+
+        payloads = [
+            ('catalog', self.catalog()),
+            ('booking list', self.booking_list(options['bookings'])),
+            ('admin report', self.admin_report()),
+        ]
+        repeat = options['repeat']
+        self.stdout.write(f'Best of {repeat} runs, orjson {orjson.__version__}')
+        for name, data in payloads:
+            expected = JSONRenderer().render(data)
+            actual = ORJSONRenderer().render(data)
+            if actual != expected:
+                at = next((i for i, (a, b) in enumerate(zip(actual, expected)) if a != b), min(len(actual), len(expected)))
+                self.stdout.write(self.style.ERROR(
+                    f'{name}: output differs at byte {at}: {expected[at - 20:at + 20]!r} vs {actual[at - 20:at + 20]!r}'
+                ))
+
+            stdlib = self.best(lambda: JSONRenderer().render(data), repeat)
+            fast = self.best(lambda: ORJSONRenderer().render(data), repeat)
+            parse_stdlib = self.best(lambda: JSONParser().parse(io.BytesIO(expected)), repeat)
+            parse_fast = self.best(lambda: ORJSONParser().parse(io.BytesIO(expected)), repeat)
+            same = 'identical' if actual == expected else 'DIFFERENT'
+            self.stdout.write(
+                f'{name:>13} ({len(expected) / 1024:.1f} KB, {same}): '
+                f'render {stdlib * 1000:.2f} -> {fast * 1000:.2f} ms ({stdlib / fast:.1f}x), '
+                f'parse {parse_stdlib * 1000:.2f} -> {parse_fast * 1000:.2f} ms ({parse_stdlib / parse_fast:.1f}x)'
+            )
+
+    def best(self, run, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    def catalog(self):
+        categories = Category.objects.filter(is_active=True).prefetch_related('subtypes__pricing')
+        return CategorySerializer(categories, many=True, context={'language': 'en'}).data
+
+    def booking_list(self, limit):
+        bookings = Booking.objects.select_related(
+            'user', 'pickup_address__district', 'pickup_time_slot'
+        ).order_by('-created_at')[:limit]
+        return BookingListSerializer(bookings, many=True).data
+
+    def admin_report(self):
+        admin = get_user_model().objects.filter(Q(is_staff=True) | Q(user_type='admin')).first()
+        if admin is None:
+            raise CommandError('No admin user to request the admin report with')
+        request = APIRequestFactory().get('/api/admin/reports/', {'days': 90})
+        force_authenticate(request, user=admin)
+        return admin_reports(request).data
@@ -0,0 +1,140 @@
+"""
+Closed-loop HTTP load test for comparing server modes.
+
+Run the server once per mode with the same memory footprint, e.g.
+
+    SERVER_MODE=wsgi WEB_CONCURRENCY=4 gunicorn --bind 0.0.0.0:8000
+    SERVER_MODE=asgi WEB_CONCURRENCY=1 gunicorn --bind 0.0.0.0:8000
+
+then point this command at it, passing the gunicorn master pid so the
+report includes the resident memory of the whole process tree:
+
+    python manage.py loadtest http://localhost:8000/api/customer/notifications/fcm-token/ \\
+        --method POST --data '{"token": "x"}' --header "Authorization: Bearer ..." \\
+        --concurrency 64 --duration 30 --server-pid 1234
+"""
+import asyncio
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Load test an endpoint and report throughput, latency and server memory'
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', help='Endpoint to call')
+        parser.add_argument('--method', default='GET', help='HTTP method (default: GET)')
+        parser.add_argument('--data', help='JSON request body')
+        parser.add_argument(
+            '--header',
+            action='append',
+            default=[],
+            help='Extra header as "Name: value", may be repeated'
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=32,
+            help='Concurrent in-flight requests (default: 32)'
+        )
+        parser.add_argument(
+            '--duration',
+            type=float,
+            default=20,
+            help='Seconds to run (default: 20)'
+        )
+        parser.add_argument(
+            '--server-pid',
+            type=int,
+            help='Gunicorn master pid; its process tree RSS is reported (Linux only)'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            import aiohttp  # noqa: F401
+        except ImportError:
+            raise CommandError('loadtest requires aiohttp')
+
+        headers = {'Content-Type': 'application/json'}
+        for header in options['header']:
+            name, _, value = header.partition(':')
+            headers[name.strip()] = value.strip()
+        body = json.loads(options['data']) if options['data'] else None
+
+        timings, errors, elapsed = asyncio.run(self.run(
+            options['url'], options['method'].upper(), headers, body,
+            options['concurrency'], options['duration'],
+        ))
+        if not timings:
+            raise CommandError(f'No successful requests ({errors} errors)')
+
+        timings.sort()
+        self.stdout.write(
+            f'{len(timings)} ok, {errors} errors in {elapsed:.1f}s at concurrency {options["concurrency"]}'
+        )
+        self.stdout.write(f'throughput: {len(timings) / elapsed:.1f} req/s')
+        self.stdout.write(
+            f'latency: p50 {self.percentile(timings, 50):.1f} ms, '
+            f'p99 {self.percentile(timings, 99):.1f} ms'
+        )
+        if options['server_pid']:
+            rss_mb = self.tree_rss_kb(options['server_pid']) / 1024
+            self.stdout.write(
+                f'server RSS: {rss_mb:.0f} MB, {len(timings) / elapsed / rss_mb:.2f} req/s per MB'
+            )
+
+    async def run(self, url, method, headers, body, concurrency, duration):
+        import aiohttp
+
+        timings = []
+        errors = 0
+        deadline = time.monotonic() + duration
+
+        async def worker(session):
+            nonlocal errors
+            while time.monotonic() < deadline:
+                start = time.perf_counter()
+                try:
+                    async with session.request(method, url, json=body, headers=headers) as response:
+                        await response.read()
+                        ok = response.status < 500
+                except aiohttp.ClientError:
+                    ok = False
+                if ok:
+                    timings.append((time.perf_counter() - start) * 1000)
+                else:
+                    errors += 1
+
+        connector = aiohttp.TCPConnector(limit=concurrency)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            started = time.monotonic()
+            await asyncio.gather(*(worker(session) for _ in range(concurrency)))
+            elapsed = time.monotonic() - started
+        return timings, errors, elapsed
+
+    def tree_rss_kb(self, pid):
+        """Sum VmRSS of ``pid`` and its direct children (gunicorn workers)."""
+        pids = [pid]
+        children = f'/proc/{pid}/task/{pid}/children'
+        if os.path.exists(children):
+            with open(children) as f:
+                pids += [int(child) for child in f.read().split()]
+
+        total = 0
+        for child_pid in pids:
+            try:
+                with open(f'/proc/{child_pid}/status') as f:
+                    for line in f:
+                        if line.startswith('VmRSS:'):
+                            total += int(line.split()[1])
+            except FileNotFoundError:
+                continue
+        return total
+
+    @staticmethod
+    def percentile(sorted_values, pct):
+        index = min(len(sorted_values) - 1, round(pct / 100 * (len(sorted_values) - 1)))
+        return sorted_values[index]
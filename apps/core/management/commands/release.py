@@ -0,0 +1,65 @@
+"""
+Release-phase command: run once per deploy, before web processes start.
+
+Runs migrations under a PostgreSQL advisory lock so that concurrent releases
+(or a release racing a manual migrate) apply them one at a time.
+
+    python manage.py release
+"""
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from config.db import disable_statement_timeout
+
+# Arbitrary application-wide key for pg_advisory_lock
+MIGRATION_LOCK_KEY = 7241935001
+
+
+class Command(BaseCommand):
+    help = 'Run migrations once per release under an advisory lock'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lock-timeout',
+            type=int,
+            default=300,
+            help='Seconds to wait for another release to finish (default: 300)'
+        )
+
+    def handle(self, *args, **options):
+        start = time.monotonic()
+        # Index builds and data migrations may run longer than a web request may
+        disable_statement_timeout()
+
+        if connection.vendor != 'postgresql':
+            call_command('migrate', interactive=False, verbosity=options['verbosity'])
+        else:
+            self.acquire_lock(options['lock_timeout'])
+            try:
+                call_command('migrate', interactive=False, verbosity=options['verbosity'])
+            finally:
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT pg_advisory_unlock(%s)', [MIGRATION_LOCK_KEY])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Release tasks finished in {time.monotonic() - start:.1f}s'
+        ))
+
+    def acquire_lock(self, timeout):
+        """Session-level lock: needs a direct connection, not a transaction pooler."""
+        deadline = time.monotonic() + timeout
+        waiting = False
+        while True:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_try_advisory_lock(%s)', [MIGRATION_LOCK_KEY])
+                if cursor.fetchone()[0]:
+                    return
+            if time.monotonic() >= deadline:
+                raise CommandError(f'Could not acquire the migration lock within {timeout}s')
+            if not waiting:
+                self.stdout.write('Another release is migrating, waiting for the lock...')
+                waiting = True
+            time.sleep(1)
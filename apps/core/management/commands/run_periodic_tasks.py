@@ -7,10 +7,25 @@ Run this with cron or a task scheduler:
 
 # Every 30 minutes - clean expired slots
 */30 * * * * cd /path/to/project && source venv/bin/activate && python manage.py run_periodic_tasks --task=clean_slots
+
+# Every day at 4 AM - purge expired revoked tokens
+0 4 * * * cd /path/to/project && source venv/bin/activate && python manage.py run_periodic_tasks --task=purge_tokens
+
+# Every 10 minutes - correct drifted unread notification counters
+*/10 * * * * cd /path/to/project && source venv/bin/activate && python manage.py run_periodic_tasks --task=reconcile_unread
+
+# Every day at 3:30 AM - delete admin notifications past their retention
+30 3 * * * cd /path/to/project && source venv/bin/activate && python manage.py run_periodic_tasks --task=purge_admin_notifications
+
+# Every day at 3 AM - delete archived gateway payloads past their retention
+0 3 * * * cd /path/to/project && source venv/bin/activate && python manage.py run_periodic_tasks --task=sweep_payloads
 """
 from django.core.management.base import BaseCommand
-from apps.notifications.tasks import send_booking_reminders
+from apps.accounts.tasks import purge_revoked_tokens
+from apps.notifications.tasks import purge_admin_notifications, reconcile_unread_counts, send_booking_reminders
+from config.db import disable_statement_timeout
 from apps.bookings.tasks import clean_expired_slots, generate_time_slots
+from apps.payments.tasks import sweep_payloads
 import logging
 
 logger = logging.getLogger(__name__)
@@ -23,7 +38,10 @@ class Command(BaseCommand):
         parser.add_argument(
             '--task',
             type=str,
-            choices=['send_reminders', 'clean_slots', 'generate_slots', 'all'],
+            choices=[
+                'send_reminders', 'clean_slots', 'generate_slots', 'purge_tokens', 'reconcile_unread',
+                'purge_admin_notifications', 'sweep_payloads', 'all',
+            ],
             default='all',
             help='Which task to run'
         )
@@ -48,6 +66,29 @@ class Command(BaseCommand):
                 result = clean_expired_slots()
                 self.stdout.write(self.style.SUCCESS(f'✓ {result}'))
             
+            if task == 'purge_tokens' or task == 'all':
+                self.stdout.write('Running purge_revoked_tokens...')
+                result = purge_revoked_tokens()
+                self.stdout.write(self.style.SUCCESS(f'✓ {result}'))
+            
+            if task == 'reconcile_unread' or task == 'all':
+                self.stdout.write('Running reconcile_unread_counts...')
+                result = reconcile_unread_counts()
+                self.stdout.write(self.style.SUCCESS(f'✓ {result}'))
+            
+            if task == 'purge_admin_notifications' or task == 'all':
+                self.stdout.write('Running purge_admin_notifications...')
+                # Batched deletes can outlast the per-request timeout
+                disable_statement_timeout()
+                result = purge_admin_notifications()
+                self.stdout.write(self.style.SUCCESS(f'✓ {result}'))
+            
+            if task == 'sweep_payloads' or task == 'all':
+                self.stdout.write('Running sweep_payloads...')
+                disable_statement_timeout()
+                result = sweep_payloads()
+                self.stdout.write(self.style.SUCCESS(f'✓ {result}'))
+            
             if task == 'generate_slots':
                 days = options['days_ahead']
                 self.stdout.write(f'Running generate_time_slots (days_ahead={days})...')
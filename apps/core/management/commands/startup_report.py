@@ -0,0 +1,112 @@
+"""
+Report web process boot cost: import time per package/app, application
+load time and first-request latency, measured in a fresh interpreter.
+
+Fails if a lazily loaded provider SDK (``apps.core.transports.LAZY_SDKS``)
+is imported while booting, or if imports exceed ``--max-import-ms``, so it
+can run in CI to catch import-time regressions.
+
+    python manage.py startup_report --path /api/services/categories/
+"""
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.transports import LAZY_SDKS
+
+BOOT_SCRIPT = '''
+import json, sys, time
+start = time.perf_counter()
+from config.wsgi import application
+loaded = time.perf_counter()
+from django.test import Client
+response = Client(HTTP_HOST=sys.argv[2]).get(sys.argv[1])
+done = time.perf_counter()
+print(json.dumps({
+    'load_ms': (loaded - start) * 1000,
+    'first_request_ms': (done - loaded) * 1000,
+    'status': response.status_code,
+}))
+'''
+
+
+class Command(BaseCommand):
+    help = 'Measure import time per app, application load time and first-request latency'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default='/api/core/health/',
+            help='Path of the first request (default: /api/core/health/)'
+        )
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=15,
+            help='Number of packages to list (default: 15)'
+        )
+        parser.add_argument(
+            '--max-import-ms',
+            type=float,
+            help='Fail if total import time exceeds this many ms'
+        )
+
+    def handle(self, *args, **options):
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', BOOT_SCRIPT, options['path'], self.host()],
+            capture_output=True,
+            text=True,
+            cwd=settings.BASE_DIR,
+            env={**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'config.settings')},
+        )
+        if result.returncode != 0:
+            raise CommandError(f'Boot failed:\n{result.stderr[-2000:]}')
+
+        timings = json.loads(result.stdout.strip().splitlines()[-1])
+        per_package = self.import_times(result.stderr)
+
+        self.stdout.write(f"application load: {timings['load_ms']:.0f} ms")
+        self.stdout.write(
+            f"first request ({options['path']}): {timings['first_request_ms']:.0f} ms, "
+            f"status {timings['status']}"
+        )
+        total_ms = sum(per_package.values()) / 1000
+        self.stdout.write(f'import time by package (self time, total {total_ms:.0f} ms):')
+        ranked = sorted(per_package.items(), key=lambda item: item[1], reverse=True)
+        for package, micros in ranked[:options['top']]:
+            self.stdout.write(f'  {package:<30} {micros / 1000:8.1f} ms')
+
+        eager_sdks = [sdk for sdk in LAZY_SDKS if sdk in per_package]
+        if eager_sdks:
+            raise CommandError(
+                f"Provider SDKs imported at boot: {', '.join(eager_sdks)}. "
+                'Load them through apps.core.transports.get_transport.'
+            )
+        if options['max_import_ms'] is not None and total_ms > options['max_import_ms']:
+            raise CommandError(f"Import time {total_ms:.0f} ms exceeds {options['max_import_ms']:.0f} ms")
+
+    @staticmethod
+    def import_times(importtime_output):
+        """Sum ``-X importtime`` self times per top-level package (per app for ``apps.*``)."""
+        totals = defaultdict(int)
+        for line in importtime_output.splitlines():
+            if not line.startswith('import time:') or 'self [us]' in line:
+                continue
+            self_us, _, name = line[len('import time:'):].split('|')
+            module = name.strip()
+            parts = module.split('.')
+            package = '.'.join(parts[:2]) if parts[0] == 'apps' and len(parts) > 1 else parts[0]
+            totals[package] += int(self_us)
+        return totals
+
+    @staticmethod
+    def host():
+        for host in settings.ALLOWED_HOSTS:
+            if host and host not in ('*',) and not host.startswith('.'):
+                return host
+        return 'localhost'
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.9 on 2026-10-19 05:23
+
+import apps.core.uploads
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_systemsettings_delete_contactformsubmission_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='systemsettings',
+            name='notification_sound',
+            field=models.FileField(blank=True, help_text='Yönetici bildirimleri için ses dosyası (.mp3 formatında)', null=True, upload_to=apps.core.uploads.UploadTo('sounds/'), validators=[django.core.validators.FileExtensionValidator(allowed_extensions=['mp3'])], verbose_name='Bildirim Sesi'),
+        ),
+    ]
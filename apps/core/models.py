@@ -2,13 +2,15 @@ from django.db import models
 from django.core.validators import FileExtensionValidator
 from django.utils.translation import gettext_lazy as _
 
+from .uploads import UploadTo
+
 
 class SystemSettings(models.Model):
     """System-wide settings (singleton model)."""
     
     # Notification settings
     notification_sound = models.FileField(
-        upload_to='sounds/',
+        upload_to=UploadTo('sounds/'),
         validators=[FileExtensionValidator(allowed_extensions=['mp3'])],
         null=True,
         blank=True,
@@ -0,0 +1,11 @@
+"""Shared pagination classes."""
+from rest_framework.pagination import CursorPagination
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """Newest-first cursor pagination; cost stays constant however deep the client pages."""
+
+    ordering = '-created_at'
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
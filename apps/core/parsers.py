@@ -0,0 +1,31 @@
+"""
+JSON parsing with orjson (see ``renderers``).
+
+``ORJSONParser`` returns the same data as DRF's ``JSONParser``, except that
+integers beyond 64 bits are read as floats (no field of this API takes them).
+Bodies that are not UTF-8 or that orjson rejects are handed to ``JSONParser``,
+so clients get the same error messages. Select it per view with
+``parser_classes``.
+"""
+import io
+
+from django.conf import settings
+from rest_framework import parsers
+
+from .renderers import orjson
+
+
+class ORJSONParser(parsers.JSONParser):
+    """JSONParser on orjson."""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower().replace('_', '-') not in ('utf-8', 'utf8'):
+            return super().parse(stream, media_type, parser_context)
+
+        body = stream.read()
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            return super().parse(io.BytesIO(body), media_type, parser_context)
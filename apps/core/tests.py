@@ -1,3 +1,342 @@
-from django.test import TestCase
+import json
+from datetime import timedelta
+from decimal import Decimal
 
-# Create your tests here.
+import boto3
+import pytest
+import requests
+from django.core import signing
+from django.core.cache import cache, caches
+from django.core.exceptions import ImproperlyConfigured
+from freezegun import freeze_time
+from moto import mock_aws
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from storages.backends.s3boto3 import S3Boto3Storage
+
+from apps.accounts.models import User
+from apps.core import throttling, uploads
+from apps.core.cache import redis_client
+from apps.core.renderers import ORJSONRenderer
+from apps.notifications import stream
+from apps.services.models import Category
+
+pytestmark = pytest.mark.django_db
+
+BUCKET = 'media'
+WEBP = b'RIFF\x1a\x00\x00\x00WEBPVP8L\x0d\x00\x00\x00/\x00\x00\x00\x10\x07\x10\x11\x11\x88\x88\xfe\x07\x00'
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    """A moto bucket behind the storage of every upload target."""
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'test')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'test')
+    with mock_aws():
+        client = boto3.client('s3', region_name='us-east-1')
+        client.create_bucket(Bucket=BUCKET)
+        storage = S3Boto3Storage(
+            bucket_name=BUCKET,
+            location='haliyikama',
+            default_acl='public-read',
+            object_parameters={'CacheControl': 'max-age=86400'},
+            file_overwrite=True,
+            region_name='us-east-1',
+        )
+        for target in uploads.TARGETS.values():
+            monkeypatch.setattr(uploads._field(target), 'storage', storage)
+        yield client
+
+
+@pytest.fixture
+def category():
+    return Category.objects.create(name='Halı', slug='hali', pricing_type='per_sqm')
+
+
+def put(s3, upload, body=WEBP, content_type='image/webp'):
+    s3.put_object(Bucket=BUCKET, Key=upload['key'], Body=body, ContentType=content_type)
+
+
+def test_create_upload(s3, category, settings):
+    upload = uploads.create_upload('category_image', category.pk, 'image/webp')
+
+    assert upload['key'].startswith('haliyikama/categories/')
+    assert upload['key'].endswith('.webp')
+    assert upload['expires_in'] == settings.DIRECT_UPLOAD_EXPIRES
+    assert upload['max_size'] == 5 * 1024 * 1024
+    fields = upload['fields']
+    assert fields['key'] == upload['key']
+    assert fields['Content-Type'] == 'image/webp'
+    assert fields['acl'] == 'public-read'
+    assert fields['Cache-Control'] == 'max-age=86400'
+    assert 'policy' in fields
+    # Every upload gets a new key
+    assert uploads.create_upload('category_image', category.pk, 'image/webp')['key'] != upload['key']
+
+
+def test_presigned_post_uploads_the_file(s3, category):
+    upload = uploads.create_upload('category_image', category.pk, 'image/webp')
+
+    response = requests.post(upload['url'], data=upload['fields'], files={'file': ('a.webp', WEBP)})
+
+    assert response.status_code == 204
+    head = s3.head_object(Bucket=BUCKET, Key=upload['key'])
+    assert head['ContentType'] == 'image/webp'
+    assert head['ContentLength'] == len(WEBP)
+
+
+@pytest.mark.parametrize('target, object_id, content_type, error', [
+    ('category_image', None, 'image/bmp', 'content_type must be one of'),
+    ('notification_sound', None, 'image/webp', 'content_type must be one of'),
+    ('user_avatar', None, 'image/webp', 'Unknown upload target'),
+    ('category_image', 999, 'image/webp', 'Category 999 not found'),
+    ('category_image', 'x', 'image/webp', 'Category x not found'),
+])
+def test_create_upload_rejects(s3, category, target, object_id, content_type, error):
+    with pytest.raises(uploads.UploadError, match=error):
+        uploads.create_upload(target, object_id or category.pk, content_type)
+
+
+def test_confirm_upload(s3, category):
+    upload = uploads.create_upload('category_image', category.pk, 'image/webp')
+    put(s3, upload)
+
+    image = uploads.confirm_upload(upload['token'])
+
+    category.refresh_from_db()
+    assert image.instance == category
+    assert 'haliyikama/' + category.image.name == upload['key']
+
+
+def test_confirm_upload_missing_object(s3, category):
+    upload = uploads.create_upload('category_image', category.pk, 'image/webp')
+
+    with pytest.raises(uploads.UploadError, match='File not uploaded yet'):
+        uploads.confirm_upload(upload['token'])
+
+
+def test_confirm_upload_rejects_wrong_content_type(s3, category):
+    upload = uploads.create_upload('category_image', category.pk, 'image/webp')
+    put(s3, upload, content_type='text/html')
+
+    with pytest.raises(uploads.UploadError, match='unexpected content type'):
+        uploads.confirm_upload(upload['token'])
+    category.refresh_from_db()
+    assert not category.image
+
+
+def test_confirm_upload_rejects_too_large(s3, category, monkeypatch):
+    monkeypatch.setitem(uploads.TARGETS['category_image'], 'max_size', len(WEBP) - 1)
+    upload = uploads.create_upload('category_image', category.pk, 'image/webp')
+    put(s3, upload)
+
+    with pytest.raises(uploads.UploadError, match='too large'):
+        uploads.confirm_upload(upload['token'])
+
+
+def test_confirm_upload_rejects_forged_token(s3, category):
+    upload = uploads.create_upload('category_image', category.pk, 'image/webp')
+    put(s3, upload)
+    data = signing.loads(upload['token'], salt=uploads.SIGNING_SALT)
+
+    forged = [
+        upload['token'][:-1] + ('A' if upload['token'][-1] != 'A' else 'B'),
+        signing.dumps(data, salt='another.salt'),
+        signing.dumps(data, key='not-the-secret-key', salt=uploads.SIGNING_SALT),
+        'not a token',
+    ]
+    for token in forged:
+        with pytest.raises(uploads.UploadError, match='Invalid upload token'):
+            uploads.confirm_upload(token)
+
+
+def test_confirm_upload_rejects_expired_token(s3, category, settings):
+    with freeze_time() as frozen:
+        upload = uploads.create_upload('category_image', category.pk, 'image/webp')
+        put(s3, upload)
+
+        frozen.tick(timedelta(seconds=settings.DIRECT_UPLOAD_EXPIRES + uploads.CONFIRM_GRACE + 1))
+        with pytest.raises(uploads.UploadError, match='Upload token expired'):
+            uploads.confirm_upload(upload['token'])
+
+
+def test_upload_endpoints(s3, category):
+    api = APIClient()
+    payload = {'target': 'category_image', 'object_id': category.pk, 'content_type': 'image/webp'}
+    assert api.post('/api/core/uploads/', payload, format='json').status_code == 401
+
+    api.force_authenticate(User.objects.create_superuser(
+        email='admin@example.com', password='secret', first_name='A', last_name='B'
+    ))
+    response = api.post('/api/core/uploads/', {**payload, 'content_type': 'image/bmp'}, format='json')
+    assert response.status_code == 400
+    assert response.json()['success'] is False
+
+    upload = api.post('/api/core/uploads/', payload, format='json').json()['data']
+    response = api.post('/api/core/uploads/confirm/', {'token': upload['token']}, format='json')
+    assert response.status_code == 400
+    assert response.json() == {'success': False, 'error': 'File not uploaded yet'}
+
+    put(s3, upload)
+    response = api.post('/api/core/uploads/confirm/', {'token': upload['token']}, format='json')
+    assert response.status_code == 200
+    assert response.json()['data']['id'] == category.pk
+
+
+@pytest.mark.parametrize('data', [
+    {'results': [{'id': 1, 'name': 'Halı\u2028yıkama', 'price': Decimal('125.50'), 'ratio': 0.25, 'note': None}]},
+    [1, -2.5, 0.5, True, None],
+])
+def test_orjson_renderer_matches_json_renderer(data):
+    pytest.importorskip('orjson')
+
+    assert ORJSONRenderer().render(data) == JSONRenderer().render(data)
+
+
+@pytest.mark.parametrize('value', [float('nan'), float('inf'), -float('inf'), Decimal('NaN')])
+def test_orjson_renderer_rejects_non_finite_numbers(value):
+    pytest.importorskip('orjson')
+
+    with pytest.raises(ValueError, match='not JSON compliant'):
+        ORJSONRenderer().render({'results': [{'price': value, 'note': None}]})
+
+
+@pytest.mark.parametrize('rate, expected', [
+    ('10/min', (10, 10 / 60)),
+    ('5/hour', (5, 5 / 3600)),
+    ('2/sec', (2, 2)),
+    ('100/day', (100, 100 / 86400)),
+    (None, None),
+    ('none', None),
+    ('off', None),
+    ('', None),
+])
+def test_parse_rate(rate, expected):
+    assert throttling.parse_rate(rate) == expected
+
+
+@pytest.mark.parametrize('rate', ['10', '10/fortnight', 'ten/min', '1/2/min'])
+def test_parse_rate_rejects_invalid_rates(rate):
+    with pytest.raises(ImproperlyConfigured, match='Invalid throttle rate'):
+        throttling.parse_rate(rate)
+
+
+def test_local_bucket_bursts_then_refills():
+    cache.clear()
+    with freeze_time() as frozen:
+        assert [throttling.take_token('bucket', 3, 1)[0] for _ in range(3)] == [True] * 3
+        assert throttling.take_token('bucket', 3, 1) == (False, pytest.approx(1))
+
+        frozen.tick(0.5)
+        assert throttling.take_token('bucket', 3, 1) == (False, pytest.approx(0.5))
+        frozen.tick(0.5)
+        assert throttling.take_token('bucket', 3, 1) == (True, 0)
+
+        # Refilled up to the capacity, not beyond
+        frozen.tick(60)
+        assert [throttling.take_token('bucket', 3, 1)[0] for _ in range(4)] == [True, True, True, False]
+
+
+@pytest.fixture
+def rates(settings):
+    """Set throttle rates; everything else unthrottled."""
+    cache.clear()
+
+    def set_rates(**rates):
+        settings.REST_FRAMEWORK = {
+            **settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {'ip': None, 'user': None, **rates},
+        }
+    yield set_rates
+    cache.clear()
+
+
+@pytest.fixture
+def api():
+    api = APIClient()
+    api.force_authenticate(User.objects.create_superuser(
+        email='admin@example.com', password='secret', first_name='A', last_name='B'
+    ))
+    return api
+
+
+def test_per_action_scopes(rates, api):
+    rates(booking_create='1/hour', payment='1/min')
+
+    assert api.post('/api/customer/bookings/', {}, format='json').status_code == 400
+    response = api.post('/api/customer/bookings/', {}, format='json')
+    assert response.status_code == 429
+    assert int(response['Retry-After']) > 3500
+    # Other actions of the viewset are not in the scope
+    assert [api.get('/api/customer/bookings/').status_code for _ in range(3)] == [200] * 3
+
+    assert api.post('/api/payments/payment/initiate/', {}, format='json').status_code == 400
+    assert api.post('/api/payments/payment/initiate/', {}, format='json').status_code == 429
+
+
+def test_function_view_scope(rates, api):
+    rates(fcm_token='1/hour')
+
+    assert api.post('/api/admin/notifications/fcm-token/', {}, format='json').status_code == 400
+    assert api.post('/api/admin/notifications/fcm-token/', {}, format='json').status_code == 429
+
+
+def test_webhooks_are_not_throttled(rates, client):
+    rates(ip='1/min')
+    payload = {'iyziReferenceCode': 'ref-1', 'iyziEventType': 'CHECKOUT_FORM_AUTH', 'paymentConversationId': 'c-1'}
+
+    for _ in range(3):
+        response = client.post('/api/payments/webhook/iyzico/', payload, content_type='application/json')
+        assert response.status_code == 200
+    # Other endpoints are
+    assert client.post('/api/auth/login/', {}, content_type='application/json').status_code == 400
+    assert client.post('/api/auth/login/', {}, content_type='application/json').status_code == 429
+
+
+@pytest.fixture
+def fake_redis_cache(settings):
+    fakeredis = pytest.importorskip('fakeredis')
+    pytest.importorskip('lupa')  # Lua scripting
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': 'redis://fake:6379/0',
+            'OPTIONS': {'connection_class': fakeredis.FakeConnection},
+        },
+    }
+    backend = caches['default']
+    backend.clear()
+    yield backend
+    backend.clear()
+    throttling._script = None
+
+
+def test_redis_client_is_kept_per_backend(fake_redis_cache):
+    client = redis_client()
+
+    assert client is redis_client(fake_redis_cache)
+    assert client.ping()
+    assert redis_client(caches['default']) is client
+
+
+def test_redis_client_is_none_for_other_backends():
+    assert redis_client() is None
+
+
+def test_redis_bucket(fake_redis_cache):
+    results = [throttling.take_token('bucket', 3, 0.01) for _ in range(4)]
+
+    assert [allowed for allowed, _ in results] == [True, True, True, False]
+    assert results[-1][1] == pytest.approx(100, abs=0.1)
+    key = fake_redis_cache.make_and_validate_key('bucket')
+    assert 0 < redis_client().pttl(key) <= 300_000
+
+
+def test_stream_events_are_published_to_redis(fake_redis_cache):
+    pubsub = redis_client().pubsub()
+    pubsub.subscribe('notifications:stream:user:1')
+    pubsub.get_message(timeout=1)  # Subscription confirmation
+
+    stream.publish('notifications:stream:user:1', 'unread_count', {'count': 2}, event_id=7)
+
+    message = pubsub.get_message(timeout=1)
+    assert json.loads(message['data']) == {'id': 7, 'frame': 'id: 7\nevent: unread_count\ndata: {"count":2}\n\n'}
@@ -0,0 +1,182 @@
+"""
+Token bucket throttling for DRF views, stored in the shared cache.
+
+A rate of ``N/period`` (DRF's format) is a bucket of N tokens refilled at N
+per period: clients can burst up to N requests, then sustain the average
+rate. Buckets are updated atomically - on Redis with one Lua script using
+the server clock, on other cache backends (per-process caches such as
+locmem) under a process-wide lock.
+
+- ``IPRateThrottle``: every request, per client IP (rate ``ip``)
+- ``UserRateThrottle``: authenticated requests, per user (rate ``user``)
+- ``ScopedRateThrottle``: views with a ``throttle_scope`` (or per-action
+  ``throttle_scopes``), per user or IP (rate named after the scope)
+
+Rates come from ``REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']``; a missing or
+``none`` rate disables the bucket.
+"""
+import math
+import threading
+import time
+
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from .cache import redis_client
+
+TAKE_TOKEN_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local refill_rate = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'stamp')
+local tokens = tonumber(bucket[1]) or capacity
+local stamp = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - stamp) * refill_rate)
+local allowed, wait_ms = 0, 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    wait_ms = math.ceil((1 - tokens) / refill_rate * 1000)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'stamp', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / refill_rate * 1000))
+return {allowed, wait_ms}
+"""
+
+_local_lock = threading.Lock()
+_script = None
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """
+    Parse ``'N/period'`` (period: sec, min, hour or day).
+    Returns: (capacity, refill rate in tokens per second), or None when disabled
+    """
+    if rate is None or str(rate).lower() in ('', 'none', 'off'):
+        return None
+    try:
+        num, period = rate.split('/')
+        capacity = int(num)
+        seconds = PERIODS[period.strip()[0]]
+    except (ValueError, KeyError):
+        raise ImproperlyConfigured(f'Invalid throttle rate: {rate!r}')
+    return capacity, capacity / seconds
+
+
+def take_token(key, capacity, refill_rate):
+    """
+    Take a token from the bucket at ``key``.
+    Returns: (allowed, seconds until a token is available)
+    """
+    cache = caches['default']
+    client = redis_client(cache)
+    if client is not None:
+        return _take_token_redis(client, cache.make_and_validate_key(key), capacity, refill_rate)
+    return _take_token_local(cache, key, capacity, refill_rate)
+
+
+def _take_token_redis(client, key, capacity, refill_rate):
+    global _script
+    if _script is None:
+        # Runs by SHA (EVALSHA), loading the script on the first NOSCRIPT
+        _script = client.register_script(TAKE_TOKEN_SCRIPT)
+    allowed, wait_ms = _script(keys=[key], args=[capacity, refill_rate], client=client)
+    return bool(allowed), wait_ms / 1000
+
+
+def _take_token_local(cache, key, capacity, refill_rate):
+    now = time.time()
+    with _local_lock:
+        tokens, stamp = cache.get(key) or (capacity, now)
+        tokens = min(capacity, tokens + max(0, now - stamp) * refill_rate)
+        if tokens >= 1:
+            allowed, wait = True, 0
+            tokens -= 1
+        else:
+            allowed, wait = False, (1 - tokens) / refill_rate
+        cache.set(key, (tokens, now), math.ceil(capacity / refill_rate))
+    return allowed, wait
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Base class: subclasses name the bucket (scope and key) for a request."""
+
+    def __init__(self):
+        self.wait_seconds = None
+
+    def get_scope(self, request, view):
+        raise NotImplementedError
+
+    def get_cache_key(self, request, view, scope):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        scope = self.get_scope(request, view)
+        if scope is None:
+            return True
+        bucket = parse_rate(api_settings.DEFAULT_THROTTLE_RATES.get(scope))
+        if bucket is None:
+            return True
+
+        key = self.get_cache_key(request, view, scope)
+        if key is None:
+            return True
+        allowed, self.wait_seconds = take_token(key, *bucket)
+        return allowed
+
+    def wait(self):
+        return self.wait_seconds
+
+    def client_key(self, request):
+        if request.user and request.user.is_authenticated:
+            return f'user:{request.user.pk}'
+        return f'ip:{self.get_ident(request)}'
+
+
+class IPRateThrottle(TokenBucketThrottle):
+
+    def get_scope(self, request, view):
+        return 'ip'
+
+    def get_cache_key(self, request, view, scope):
+        return f'throttle:ip:{self.get_ident(request)}'
+
+
+class UserRateThrottle(TokenBucketThrottle):
+
+    def get_scope(self, request, view):
+        return 'user'
+
+    def get_cache_key(self, request, view, scope):
+        if not (request.user and request.user.is_authenticated):
+            return None
+        return f'throttle:user:{request.user.pk}'
+
+
+class ScopedRateThrottle(TokenBucketThrottle):
+    """Bucket per endpoint class, named by the view's ``throttle_scope``/``throttle_scopes``."""
+
+    scope = None  # set for function-based views, see ``scoped_throttle_classes``
+
+    def get_scope(self, request, view):
+        if self.scope:
+            return self.scope
+        scopes = getattr(view, 'throttle_scopes', None)
+        if scopes:
+            return scopes.get(getattr(view, 'action', None))
+        return getattr(view, 'throttle_scope', None)
+
+    def get_cache_key(self, request, view, scope):
+        return f'throttle:{scope}:{self.client_key(request)}'
+
+
+def scoped_throttle_classes(scope):
+    """Throttle classes for a function-based view: the defaults plus a ``scope`` bucket."""
+    scoped = type(f'ScopedRateThrottle[{scope}]', (ScopedRateThrottle,), {'scope': scope})
+    return [*api_settings.DEFAULT_THROTTLE_CLASSES, scoped]
@@ -0,0 +1,32 @@
+"""
+Registry of external provider transports (push, SMS, payment gateways).
+
+Transports are referenced by dotted path and imported on first use, so a
+provider SDK (firebase_admin, twilio) or client is only loaded by processes
+that actually send a push, an SMS or take a payment. Paths can be overridden
+with ``settings.TRANSPORTS``.
+"""
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+DEFAULT_TRANSPORTS = {
+    'push': 'apps.notifications.fcm_service.FCMService',
+    'sms': 'apps.notifications.sms.TwilioSMSService',
+    'iyzico': 'apps.payments.services.IyzicoPaymentService',
+}
+
+# SDKs that must not be imported while the application boots,
+# checked by ``manage.py startup_report``.
+LAZY_SDKS = ('firebase_admin', 'twilio', 'stripe')
+
+
+@lru_cache(maxsize=None)
+def get_transport(name):
+    """Return the transport class registered under ``name``, importing it on first use."""
+    transports = {**DEFAULT_TRANSPORTS, **getattr(settings, 'TRANSPORTS', {})}
+    if name not in transports:
+        raise ImproperlyConfigured(f'Unknown transport: {name}')
+    return import_string(transports[name])
@@ -0,0 +1,178 @@
+"""
+Direct uploads to object storage.
+
+Images and the notification sound are uploaded by the browser straight to
+the bucket with a presigned POST, so no web worker streams the file:
+
+    POST /api/core/uploads/          {"target": "category_image", "object_id": 3, "content_type": "image/webp"}
+        -> url + fields of the presigned POST, and a signed upload token
+    (browser) POST <url> multipart form: <fields>..., file=<the file>
+    POST /api/core/uploads/confirm/  {"token": "..."}
+        -> the object is checked once in the bucket and its key saved on the model
+
+Every file gets a new UUID key (``UploadTo``), also when uploaded through
+the Django admin, so ``MediaStorage`` never probes the bucket for a free name.
+"""
+import posixpath
+import uuid
+
+from botocore.exceptions import ClientError
+from django.apps import apps
+from django.conf import settings
+from django.core import signing
+from django.utils.deconstruct import deconstructible
+
+SIGNING_SALT = 'apps.core.uploads'
+
+# Confirm may come a while after the presigned POST expired
+CONFIRM_GRACE = 3600
+
+IMAGE_TYPES = {'image/jpeg': '.jpg', 'image/png': '.png', 'image/webp': '.webp', 'image/gif': '.gif'}
+
+TARGETS = {
+    'category_image': {
+        'model': 'services.Category',
+        'field': 'image',
+        'content_types': IMAGE_TYPES,
+        'max_size': 5 * 1024 * 1024,
+    },
+    'subtype_image': {
+        'model': 'services.SubType',
+        'field': 'image',
+        'content_types': IMAGE_TYPES,
+        'max_size': 5 * 1024 * 1024,
+    },
+    'notification_sound': {
+        'model': 'core.SystemSettings',
+        'field': 'notification_sound',
+        'content_types': {'audio/mpeg': '.mp3'},
+        'max_size': 2 * 1024 * 1024,
+        'singleton': True,
+    },
+}
+
+
+class UploadError(Exception):
+    """A direct upload could not be created or confirmed."""
+
+
+@deconstructible
+class UploadTo:
+    """``upload_to`` giving every file a unique ``<prefix><uuid><ext>`` name."""
+
+    def __init__(self, prefix):
+        self.prefix = prefix
+
+    def __call__(self, instance, filename):
+        return self.generate(posixpath.splitext(filename)[1])
+
+    def generate(self, extension):
+        return f'{self.prefix}{uuid.uuid4().hex}{extension.lower()}'
+
+    def __eq__(self, other):
+        return isinstance(other, UploadTo) and self.prefix == other.prefix
+
+
+def _target(name):
+    try:
+        return TARGETS[name]
+    except KeyError:
+        raise UploadError(f'Unknown upload target "{name}"')
+
+
+def _get_object(target, object_id):
+    model = apps.get_model(target['model'])
+    if target.get('singleton'):
+        return model.get_settings()
+    try:
+        return model.objects.get(pk=object_id)
+    except (model.DoesNotExist, ValueError, TypeError):
+        raise UploadError(f'{model._meta.object_name} {object_id} not found')
+
+
+def _field(target):
+    return apps.get_model(target['model'])._meta.get_field(target['field'])
+
+
+def _bucket(storage):
+    if not hasattr(storage, 'bucket_name'):
+        raise UploadError('Direct uploads need object storage (USE_S3)')
+    return storage.connection.meta.client, storage.bucket_name
+
+
+def _key(storage, name):
+    return posixpath.join(storage.location, name) if storage.location else name
+
+
+def create_upload(target_name, object_id, content_type):
+    """
+    Presign a POST of one file to a new key.
+    Returns: dict with url, fields, key, token and expires_in
+    """
+    target = _target(target_name)
+    extension = target['content_types'].get(content_type)
+    if extension is None:
+        allowed = ', '.join(target['content_types'])
+        raise UploadError(f'content_type must be one of: {allowed}')
+    obj = _get_object(target, object_id)
+
+    field = _field(target)
+    client, bucket = _bucket(field.storage)
+    name = field.upload_to.generate(extension)
+    key = _key(field.storage, name)
+
+    fields = {'Content-Type': content_type}
+    if field.storage.default_acl:
+        fields['acl'] = field.storage.default_acl
+    cache_control = field.storage.object_parameters.get('CacheControl')
+    if cache_control:
+        fields['Cache-Control'] = cache_control
+    conditions = [{field_name: value} for field_name, value in fields.items()]
+    conditions.append(['content-length-range', 1, target['max_size']])
+
+    expires = settings.DIRECT_UPLOAD_EXPIRES
+    post = client.generate_presigned_post(
+        bucket, key, Fields=fields, Conditions=conditions, ExpiresIn=expires
+    )
+    token = signing.dumps({'target': target_name, 'pk': obj.pk, 'name': name}, salt=SIGNING_SALT)
+    return {
+        'url': post['url'],
+        'fields': post['fields'],
+        'key': key,
+        'token': token,
+        'expires_in': expires,
+        'max_size': target['max_size'],
+    }
+
+
+def confirm_upload(token):
+    """
+    Save the uploaded key on its object once the file is in the bucket.
+    Returns: the saved file (``.instance`` is its object)
+    """
+    try:
+        data = signing.loads(token, salt=SIGNING_SALT, max_age=settings.DIRECT_UPLOAD_EXPIRES + CONFIRM_GRACE)
+    except signing.SignatureExpired:
+        raise UploadError('Upload token expired')
+    except signing.BadSignature:
+        raise UploadError('Invalid upload token')
+
+    target = _target(data['target'])
+    field = _field(target)
+    client, bucket = _bucket(field.storage)
+    try:
+        head = client.head_object(Bucket=bucket, Key=_key(field.storage, data['name']))
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+            raise UploadError('File not uploaded yet')
+        raise
+    # The POST policy already limits both; not every S3-compatible store enforces it
+    if head.get('ContentType') not in target['content_types']:
+        raise UploadError('Uploaded file has an unexpected content type')
+    if head.get('ContentLength', 0) > target['max_size']:
+        raise UploadError('Uploaded file is too large')
+
+    obj = _get_object(target, data['pk'])
+    setattr(obj, target['field'], data['name'])
+    obj.save()
+    return getattr(obj, target['field'])
@@ -1,8 +1,10 @@
 from django.urls import path
-from .views import get_notification_sound
+from .views import get_notification_sound, create_direct_upload, confirm_direct_upload
 from .health import health_check
 
 urlpatterns = [
     path('notification-sound/', get_notification_sound, name='notification-sound'),
     path('health/', health_check, name='health-check'),
+    path('uploads/', create_direct_upload, name='direct-upload'),
+    path('uploads/confirm/', confirm_direct_upload, name='direct-upload-confirm'),
 ]
@@ -1,7 +1,9 @@
+from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAdminUser
 from rest_framework.response import Response
 from .models import SystemSettings
+from .uploads import UploadError, confirm_upload, create_upload
 
 
 @api_view(['GET'])
@@ -21,3 +23,40 @@ def get_notification_sound(request):
             'sound_url': sound_url
         }
     })
+
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def create_direct_upload(request):
+    """Presign a direct upload of an image or the notification sound to object storage."""
+    try:
+        upload = create_upload(
+            request.data.get('target'),
+            request.data.get('object_id'),
+            request.data.get('content_type'),
+        )
+    except UploadError as e:
+        return Response({'success': False, 'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({
+        'success': True,
+        'data': upload
+    })
+
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def confirm_direct_upload(request):
+    """Record a finished direct upload on its object."""
+    try:
+        uploaded = confirm_upload(request.data.get('token', ''))
+    except UploadError as e:
+        return Response({'success': False, 'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({
+        'success': True,
+        'data': {
+            'id': uploaded.instance.pk,
+            'url': request.build_absolute_uri(uploaded.url),
+        }
+    })
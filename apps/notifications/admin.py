@@ -1,13 +1,15 @@
 from django.contrib import admin
 from django.contrib import messages
+from django.db.models import Count
 from .models import Notification, NotificationPreference, AdminNotification, FCMDevice, UserNotification
-from .fcm_service import FCMService
+from apps.core.transports import get_transport
+from .lifecycle import invalidate_admin_counts
 
 
 @admin.register(AdminNotification)
 class AdminNotificationAdmin(admin.ModelAdmin):
-    list_display = ('title', 'notification_type', 'booking', 'is_read', 'created_at')
-    list_filter = ('notification_type', 'is_read', 'created_at')
+    list_display = ('title', 'notification_type', 'booking', 'read_count', 'created_at')
+    list_filter = ('notification_type', 'created_at')
     search_fields = ('title', 'message')
     readonly_fields = ('created_at',)
     ordering = ('-created_at',)
@@ -17,12 +19,27 @@ class AdminNotificationAdmin(admin.ModelAdmin):
             'fields': ('title', 'message', 'notification_type')
         }),
         ('İlişkili Bilgiler', {
-            'fields': ('booking', 'is_read')
+            'fields': ('booking',)
         }),
         ('Zaman Bilgileri', {
             'fields': ('created_at',)
         }),
     )
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(read_count=Count('reads'))
+    
+    @admin.display(description='Okuyan Yönetici', ordering='read_count')
+    def read_count(self, obj):
+        return obj.read_count
+    
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        invalidate_admin_counts()
+    
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        invalidate_admin_counts()
 
 
 @admin.register(UserNotification)
@@ -83,6 +100,7 @@ class FCMDeviceAdmin(admin.ModelAdmin):
         error_messages = []
         
         # Initialize Firebase first
+        FCMService = get_transport('push')
         FCMService.initialize()
         
         for device in queryset:
@@ -0,0 +1,149 @@
+"""
+Read state and retention of admin notifications.
+
+Every admin has their own read state: reading a notification inserts an
+``AdminNotificationRead`` row, and unread means "no row for this admin".
+Bulk marking (by id list, or everything created before a timestamp) inserts
+those rows in chunks of ``chunk_size``, each committed on its own, so no
+statement touches more than one chunk of rows.
+
+Notifications older than ``ADMIN_NOTIFICATION_RETENTION_DAYS`` are deleted
+by ``manage.py purge_admin_notifications`` in batches, each batch in its own
+short transaction, optionally writing every batch to a gzip JSON-lines file
+first.
+"""
+import gzip
+import json
+import os
+import time
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from . import unread_counts
+from .models import AdminNotification, AdminNotificationRead
+
+ARCHIVE_FIELDS = ('id', 'title', 'message', 'notification_type', 'booking_id', 'created_at')
+
+
+def mark_read(user_id, notification):
+    """
+    Mark one notification read for an admin.
+    Returns: False if it was already read
+    """
+    _, created = AdminNotificationRead.objects.get_or_create(notification=notification, user_id=user_id)
+    if created:
+        unread_counts.adjust(unread_counts.admin_key(user_id), -1)
+    return created
+
+
+def bulk_mark_read(user_id, ids=None, before=None, chunk_size=1000):
+    """
+    Mark notifications read for an admin: the given ``ids``, those created
+    before ``before``, or (neither given) all of them.
+    Returns: number of notifications marked
+    """
+    unread = unread_counts.admin_unread_queryset(user_id)
+    if before is not None:
+        unread = unread.filter(created_at__lt=before)
+
+    marked = 0
+    if ids is not None:
+        ids = sorted(set(ids))
+        chunks = (ids[i:i + chunk_size] for i in range(0, len(ids), chunk_size))
+        for chunk in chunks:
+            marked += _insert_reads(user_id, unread.filter(id__in=chunk).values_list('id', flat=True))
+    else:
+        last_id = 0
+        while True:
+            chunk = list(unread.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:chunk_size])
+            if not chunk:
+                break
+            marked += _insert_reads(user_id, chunk)
+            last_id = chunk[-1]
+
+    if marked:
+        unread_counts.invalidate(unread_counts.admin_key(user_id))
+    return marked
+
+
+def _insert_reads(user_id, notification_ids):
+    """
+    Insert read rows, skipping those that exist already.
+    Returns: number of rows inserted (a concurrent mark of the same rows
+    committing in between may be counted by both requests)
+    """
+    notification_ids = list(notification_ids)
+    reads = AdminNotificationRead.objects.filter(user_id=user_id, notification_id__in=notification_ids)
+    with transaction.atomic():
+        existing = reads.count()
+        # A concurrent mark of the same rows is not an error
+        AdminNotificationRead.objects.bulk_create(
+            [AdminNotificationRead(notification_id=pk, user_id=user_id) for pk in notification_ids],
+            ignore_conflicts=True,
+        )
+        return reads.count() - existing
+
+
+def invalidate_admin_counts():
+    """Recount every admin's unread counter, e.g. after notifications were deleted."""
+    for user_id in unread_counts.admin_user_ids():
+        unread_counts.invalidate(unread_counts.admin_key(user_id))
+
+
+def purge(older_than, batch_size=1000, archive_dir=None, pause=0, progress=None):
+    """
+    Delete admin notifications created more than ``older_than`` ago, oldest first.
+
+    With ``archive_dir`` every batch (including who read each notification)
+    is written to its own ``.jsonl.gz`` file before it is deleted; ``pause``
+    sleeps between batches to leave room for other writers and replicas.
+    Returns: (notifications deleted, archive files written)
+    """
+    cutoff = timezone.now() - older_than
+    deleted, files = 0, []
+    while True:
+        batch = list(
+            AdminNotification.objects.filter(created_at__lt=cutoff)
+            .order_by('created_at', 'id').values(*ARCHIVE_FIELDS)[:batch_size]
+        )
+        if not batch:
+            break
+        ids = [row['id'] for row in batch]
+        if archive_dir:
+            files.append(write_archive(archive_dir, batch))
+
+        with transaction.atomic():
+            AdminNotificationRead.objects.filter(notification_id__in=ids).delete()
+            _, counts = AdminNotification.objects.filter(id__in=ids).delete()
+        deleted += counts.get(AdminNotification._meta.label, 0)
+        if progress:
+            progress(deleted)
+        if pause:
+            time.sleep(pause)
+
+    if deleted:
+        invalidate_admin_counts()
+    return deleted, files
+
+
+def write_archive(archive_dir, batch):
+    """Write one batch, durably, before it is deleted. Returns: file path"""
+    read_by = {}
+    reads = AdminNotificationRead.objects.filter(notification_id__in=[row['id'] for row in batch])
+    for notification_id, user_id in reads.values_list('notification_id', 'user_id'):
+        read_by.setdefault(notification_id, []).append(user_id)
+
+    os.makedirs(archive_dir, exist_ok=True)
+    name = f"admin-notifications-{batch[0]['created_at']:%Y%m%d%H%M%S}-{batch[0]['id']}-{batch[-1]['id']}.jsonl.gz"
+    path = os.path.join(archive_dir, name)
+    with open(f'{path}.tmp', 'wb') as raw:
+        with gzip.GzipFile(fileobj=raw, mode='wb') as f:
+            for row in batch:
+                line = json.dumps({**row, 'read_by': read_by.get(row['id'], [])}, cls=DjangoJSONEncoder)
+                f.write(line.encode('utf-8') + b'\n')
+        raw.flush()
+        os.fsync(raw.fileno())
+    os.replace(f'{path}.tmp', path)
+    return path
@@ -0,0 +1,156 @@
+"""
+Hold many idle notification streams open against a running server.
+
+Start one ASGI worker and pass its gunicorn master pid, so the report
+includes the memory each idle stream costs:
+
+    SERVER_MODE=asgi WEB_CONCURRENCY=1 gunicorn --bind 0.0.0.0:8000
+
+    python manage.py loadtest_streams http://localhost:8000/api/customer/notifications/stream/ \\
+        --token <access token> --streams 2000 --hold 60 --server-pid 1234
+
+Streams are opened ``--ramp`` at a time, then held for ``--hold`` seconds
+while counting heartbeats, so set NOTIFICATION_STREAM_HEARTBEAT below the
+hold time.
+"""
+import asyncio
+import resource
+import time
+
+import httpx
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.management.commands.loadtest import Command as LoadTestCommand
+
+
+class Command(BaseCommand):
+    help = 'Open idle notification streams and report how many one server holds'
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', help='Stream endpoint')
+        parser.add_argument('--token', required=True, help='Access token of the streaming user')
+        parser.add_argument(
+            '--streams',
+            type=int,
+            default=1000,
+            help='Streams to open (default: 1000)'
+        )
+        parser.add_argument(
+            '--ramp',
+            type=int,
+            default=100,
+            help='Streams connecting at once (default: 100)'
+        )
+        parser.add_argument(
+            '--hold',
+            type=float,
+            default=30,
+            help='Seconds to hold the streams open once connected (default: 30)'
+        )
+        parser.add_argument(
+            '--server-pid',
+            type=int,
+            help='Gunicorn master pid; its process tree RSS is reported (Linux only)'
+        )
+
+    def handle(self, *args, **options):
+        # Every stream is a socket on this side too
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        wanted = options['streams'] + 100
+        if soft < wanted:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (min(wanted, hard), hard))
+
+        pid = options['server_pid']
+        rss = LoadTestCommand().tree_rss_kb
+        rss_before = rss(pid) if pid else None
+
+        report = asyncio.run(self.run(options, lambda: rss(pid) if pid else None))
+        connected = report['connected']
+        if not connected:
+            raise CommandError(f"No stream connected ({report['failed']} failed: {report['errors'][:3]})")
+
+        timings = sorted(report['connect_ms'])
+        self.stdout.write(
+            f"{len(connected)} of {options['streams']} streams connected, {report['failed']} failed "
+            f"(connect p50 {LoadTestCommand.percentile(timings, 50):.0f} ms, "
+            f"p99 {LoadTestCommand.percentile(timings, 99):.0f} ms)"
+        )
+        alive = sum(1 for stream in connected if stream['open'])
+        heartbeats = sum(stream['heartbeats'] for stream in connected)
+        self.stdout.write(
+            f"after {options['hold']:.0f}s: {alive} still open, {heartbeats / len(connected):.1f} heartbeats per stream"
+        )
+        if rss_before is not None:
+            growth = report['rss_peak'] - rss_before
+            self.stdout.write(
+                f"server RSS: {rss_before / 1024:.0f} MB idle, {report['rss_peak'] / 1024:.0f} MB "
+                f"with {len(connected)} streams ({growth / len(connected):.1f} KB per stream)"
+            )
+
+    async def run(self, options, measure_rss):
+        headers = {'Authorization': f"Bearer {options['token']}", 'Accept': 'text/event-stream'}
+        report = {'connected': [], 'failed': 0, 'errors': [], 'connect_ms': [], 'rss_peak': None}
+        ramp = asyncio.Semaphore(options['ramp'])
+        all_connected = asyncio.Event()
+        release = asyncio.Event()
+        pending = options['streams']
+
+        def settled():
+            nonlocal pending
+            pending -= 1
+            if not pending:
+                all_connected.set()
+
+        async def hold_stream(client):
+            stream = {'heartbeats': 0, 'open': True}
+            response_cm = client.stream('GET', options['url'], headers=headers)
+            response = None
+            try:
+                async with ramp:
+                    start = time.perf_counter()
+                    response = await response_cm.__aenter__()
+                    if response.status_code != 200:
+                        raise CommandError(f'HTTP {response.status_code}')
+                    lines = response.aiter_lines()
+                    async for line in lines:
+                        if line.startswith('event: unread_count'):
+                            break
+                report['connect_ms'].append((time.perf_counter() - start) * 1000)
+                report['connected'].append(stream)
+            except Exception as e:
+                report['failed'] += 1
+                report['errors'].append(str(e) or type(e).__name__)
+                settled()
+                if response is not None:
+                    await response_cm.__aexit__(None, None, None)
+                return
+            settled()
+
+            try:
+                async for line in lines:
+                    if line.startswith(': keep-alive'):
+                        stream['heartbeats'] += 1
+                    if release.is_set():
+                        break
+                else:
+                    stream['open'] = False  # the server closed it
+            except httpx.HTTPError:
+                stream['open'] = False
+            finally:
+                await response_cm.__aexit__(None, None, None)
+
+        limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+        timeout = httpx.Timeout(30, read=None)
+        async with httpx.AsyncClient(limits=limits, timeout=timeout) as client:
+            tasks = [asyncio.create_task(hold_stream(client)) for _ in range(options['streams'])]
+            await all_connected.wait()
+            await asyncio.sleep(min(options['hold'], 5))  # let the server settle
+            report['rss_peak'] = measure_rss()
+            await asyncio.sleep(max(0, options['hold'] - 5))
+            release.set()
+            # Streams only notice on their next line; close the rest
+            _, still_waiting = await asyncio.wait(tasks, timeout=1)
+            for task in still_waiting:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        return report
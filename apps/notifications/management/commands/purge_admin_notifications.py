@@ -0,0 +1,74 @@
+"""
+Delete admin notifications older than ADMIN_NOTIFICATION_RETENTION_DAYS.
+
+    # Every day at 3:30 AM
+    30 3 * * * cd /path/to/project && source venv/bin/activate && python manage.py purge_admin_notifications
+
+    # Keep a copy of what is deleted
+    python manage.py purge_admin_notifications --archive-dir /var/backups/notifications
+
+Rows are deleted oldest first in batches, each in its own transaction, so
+locks are held for one batch at a time.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.notifications.lifecycle import purge
+from apps.notifications.models import AdminNotification
+from config.db import disable_statement_timeout
+
+
+class Command(BaseCommand):
+    help = 'Delete (and optionally archive) old admin notifications in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.ADMIN_NOTIFICATION_RETENTION_DAYS,
+            help=f'Keep notifications of the last N days (default: {settings.ADMIN_NOTIFICATION_RETENTION_DAYS})'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Notifications deleted per transaction (default: 1000)'
+        )
+        parser.add_argument(
+            '--archive-dir',
+            type=str,
+            help='Write every batch to a .jsonl.gz file in this directory before deleting it'
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0,
+            help='Seconds to sleep between batches (default: 0)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only count the notifications that would be deleted'
+        )
+
+    def handle(self, *args, **options):
+        disable_statement_timeout()
+        older_than = timedelta(days=options['days'])
+        if options['dry_run']:
+            count = AdminNotification.objects.filter(created_at__lt=timezone.now() - older_than).count()
+            self.stdout.write(f'{count} notifications older than {options["days"]} days would be deleted')
+            return
+
+        deleted, files = purge(
+            older_than,
+            batch_size=options['batch_size'],
+            archive_dir=options['archive_dir'],
+            pause=options['pause'],
+            progress=lambda done: self.stdout.write(f'  {done} deleted...'),
+        )
+        self.stdout.write(self.style.SUCCESS(f'✓ {deleted} admin notifications deleted'))
+        if files:
+            self.stdout.write(f'  archived to {len(files)} files in {options["archive_dir"]}')
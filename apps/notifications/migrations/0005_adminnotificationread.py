@@ -0,0 +1,98 @@
+# Generated by Django 4.2.9 on 2026-10-19 12:00
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Q
+import django.db.models.deletion
+
+
+def copy_read_flags(apps, schema_editor):
+    """Notifications read under the global flag count as read by every current admin."""
+    AdminNotification = apps.get_model("notifications", "AdminNotification")
+    AdminNotificationRead = apps.get_model("notifications", "AdminNotificationRead")
+    User = apps.get_model("accounts", "User")
+
+    admin_ids = list(
+        User.objects.filter(Q(is_staff=True) | Q(user_type="admin")).values_list("id", flat=True)
+    )
+    read_ids = AdminNotification.objects.filter(is_read=True).values_list("id", flat=True).iterator()
+    batch = []
+    for notification_id in read_ids:
+        batch.extend(
+            AdminNotificationRead(notification_id=notification_id, user_id=user_id) for user_id in admin_ids
+        )
+        if len(batch) >= 1000:
+            AdminNotificationRead.objects.bulk_create(batch)
+            batch = []
+    AdminNotificationRead.objects.bulk_create(batch)
+
+
+def restore_read_flags(apps, schema_editor):
+    AdminNotification = apps.get_model("notifications", "AdminNotification")
+    AdminNotification.objects.filter(reads__isnull=False).update(is_read=True)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("accounts", "0004_revokedtoken"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("notifications", "0004_usernotification"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AdminNotificationRead",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("read_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "notification",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="reads",
+                        to="notifications.adminnotification",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="admin_notification_reads",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "admin notification read",
+                "verbose_name_plural": "admin notification reads",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="adminnotificationread",
+            constraint=models.UniqueConstraint(
+                fields=("user", "notification"), name="unique_admin_notification_read"
+            ),
+        ),
+        migrations.RunPython(copy_read_flags, restore_read_flags),
+        migrations.RemoveIndex(
+            model_name="adminnotification",
+            name="notificatio_is_read_693f9f_idx",
+        ),
+        migrations.RemoveField(
+            model_name="adminnotification",
+            name="is_read",
+        ),
+        migrations.AlterField(
+            model_name="adminnotification",
+            name="created_at",
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+    ]
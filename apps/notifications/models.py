@@ -59,21 +59,36 @@ class AdminNotification(models.Model):
         blank=True,
         related_name='admin_notifications'
     )
-    is_read = models.BooleanField(default=False)
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     
     class Meta:
         verbose_name = _('admin notification')
         verbose_name_plural = _('admin notifications')
         ordering = ['-created_at']
-        indexes = [
-            models.Index(fields=['is_read', 'created_at']),
-        ]
     
     def __str__(self):
         return f"{self.get_notification_type_display()} - {self.title}"
 
 
+class AdminNotificationRead(models.Model):
+    """Read state of an admin notification, one row per admin who read it."""
+    
+    notification = models.ForeignKey(AdminNotification, on_delete=models.CASCADE, related_name='reads')
+    user = models.ForeignKey('accounts.User', on_delete=models.CASCADE, related_name='admin_notification_reads')
+    read_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = _('admin notification read')
+        verbose_name_plural = _('admin notification reads')
+        constraints = [
+            # Also serves the per-admin unread lookups
+            models.UniqueConstraint(fields=['user', 'notification'], name='unique_admin_notification_read'),
+        ]
+    
+    def __str__(self):
+        return f"{self.user_id} - {self.notification_id}"
+
+
 class Notification(models.Model):
     """Email and SMS notifications."""
     
@@ -12,10 +12,15 @@ class FCMDeviceSerializer(serializers.ModelSerializer):
 class AdminNotificationSerializer(serializers.ModelSerializer):
     booking_id = serializers.SerializerMethodField()
     type = serializers.CharField(source='notification_type', read_only=True)
+    # Read state of the requesting admin, annotated by the view
+    is_read = serializers.SerializerMethodField()
     
     def get_booking_id(self, obj):
         """Return booking ID as string (UUID)."""
-        return str(obj.booking.id) if obj.booking else None
+        return str(obj.booking_id) if obj.booking_id else None
+    
+    def get_is_read(self, obj):
+        return getattr(obj, 'is_read', False)
     
     class Meta:
         model = AdminNotification
@@ -28,7 +33,7 @@ class AdminNotificationSerializer(serializers.ModelSerializer):
             'is_read',
             'created_at',
         ]
-        read_only_fields = ['id', 'created_at', 'type', 'booking_id']
+        read_only_fields = ['id', 'created_at', 'type', 'booking_id', 'is_read']
 
 
 class UserNotificationSerializer(serializers.ModelSerializer):
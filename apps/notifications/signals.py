@@ -1,8 +1,10 @@
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from apps.bookings.models import Booking
 from .models import AdminNotification, UserNotification
-from .fcm_service import FCMService
+from .serializers import AdminNotificationSerializer, UserNotificationSerializer
+from . import stream, unread_counts
+from apps.core.transports import get_transport
 import logging
 
 logger = logging.getLogger(__name__)
@@ -18,12 +20,11 @@ def create_booking_notification(sender, instance, created, **kwargs):
             message=f'{instance.user.get_full_name()} tarafından yeni bir sipariş oluşturuldu. Sipariş No: #{instance.id}',
             notification_type='new_order',
             booking=instance,
-            is_read=False
         )
         
         # Send FCM push notification to admins
         try:
-            FCMService.send_to_admin_users(
+            get_transport('push').send_to_admin_users(
                 title='🔔 Yeni Sipariş Geldi!',
                 body=f'{instance.user.get_full_name()} tarafından yeni bir sipariş oluşturuldu. Sipariş No: #{instance.id}',
                 data={
@@ -51,12 +52,11 @@ def create_cancellation_notification(sender, instance, **kwargs):
                     message=f'#{instance.id} numaralı sipariş iptal edildi. Müşteri: {instance.user.get_full_name()}',
                     notification_type='cancelled_order',
                     booking=instance,
-                    is_read=False
                 )
                 
                 # Send FCM push notification
                 try:
-                    FCMService.send_to_admin_users(
+                    get_transport('push').send_to_admin_users(
                         title='❌ Sipariş İptal Edildi',
                         body=f'#{instance.id} numaralı sipariş iptal edildi. Müşteri: {instance.user.get_full_name()}',
                         data={
@@ -106,7 +106,7 @@ def create_cancellation_notification(sender, instance, **kwargs):
                 
                 # Send FCM push notification to CUSTOMER
                 try:
-                    FCMService.send_to_user(
+                    get_transport('push').send_to_user(
                         user=instance.user,
                         title=title,
                         body=f'#{instance.id} numaralı siparişinizin durumu "{new_status}" olarak güncellendi.',
@@ -120,3 +120,33 @@ def create_cancellation_notification(sender, instance, **kwargs):
                     logger.error(f'Error sending FCM notification to customer for status change #{instance.id}: {e}')
         except Booking.DoesNotExist:
             pass
+
+
+@receiver(post_save, sender=AdminNotification)
+def announce_admin_notification(sender, instance, created, **kwargs):
+    """Push new admin notifications to every admin's stream and unread counter."""
+    if created:
+        admin_ids = unread_counts.admin_user_ids()
+        stream.publish_notification(
+            instance, [stream.admin_channel(user_id) for user_id in admin_ids], AdminNotificationSerializer
+        )
+        for user_id in admin_ids:
+            unread_counts.adjust(unread_counts.admin_key(user_id), 1)
+
+
+@receiver(post_save, sender=UserNotification)
+def update_unread_counter(sender, instance, created, **kwargs):
+    """Push new notifications to open streams and count them; other edits make the next read recount."""
+    key = unread_counts.user_key(instance.user_id)
+    if created:
+        stream.publish_notification(instance, [stream.user_channel(instance.user_id)], UserNotificationSerializer)
+        if not instance.is_read:
+            unread_counts.adjust(key, 1)
+    else:
+        unread_counts.invalidate(key)
+
+
+@receiver(post_delete, sender=UserNotification)
+def clear_unread_counter(sender, instance, **kwargs):
+    if not instance.is_read:
+        unread_counts.invalidate(unread_counts.user_key(instance.user_id))
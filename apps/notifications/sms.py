@@ -0,0 +1,29 @@
+"""
+Twilio SMS service. Loaded through ``apps.core.transports`` (``'sms'``).
+"""
+from django.conf import settings
+from twilio.rest import Client
+
+
+class TwilioSMSService:
+    """Service for sending SMS messages through Twilio."""
+
+    @classmethod
+    def send(cls, to, body):
+        """
+        Send an SMS.
+        Returns: dict with the provider message sid and status
+        """
+        if not settings.TWILIO_ACCOUNT_SID:
+            raise ValueError("Twilio not configured")
+
+        client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
+        message = client.messages.create(
+            body=body,
+            from_=settings.TWILIO_PHONE_NUMBER,
+            to=to
+        )
+        return {
+            'sid': message.sid,
+            'status': message.status
+        }
@@ -0,0 +1,223 @@
+"""
+Live notification streams (Server-Sent Events).
+
+Customers and the admin panel open a stream instead of polling the list and
+``unread_count`` endpoints. A stream sends:
+
+- ``notification`` events for new notifications, with the notification id as
+  the SSE event id, so a reconnecting ``EventSource`` resumes with
+  ``Last-Event-ID`` and the missed rows are replayed from the table (a
+  ``reset`` event asks the client to reload the list when too many were missed)
+- ``unread_count`` events whenever the cached unread counter changes
+- a comment line every ``NOTIFICATION_STREAM_HEARTBEAT`` seconds, keeping
+  proxies from closing idle connections
+
+Events are published to one channel per customer and one per admin.
+With a Redis ``CACHE_URL`` every worker holds a single pattern subscription
+and fans messages out to its open streams; otherwise streams only see events
+published in the same process (development). Streams need
+``SERVER_MODE=asgi`` and end after ``NOTIFICATION_STREAM_MAX_AGE`` seconds
+or when the access token expires; clients reconnect with a fresh token.
+"""
+import asyncio
+import json
+import logging
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, transaction
+
+from apps.core.cache import redis_client, redis_url
+from config.streaming import disconnect_event
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = 'notifications:stream:'
+QUEUE_SIZE = 100
+RECONNECT_DELAY = 1  # seconds between Redis subscription attempts
+
+
+def user_channel(user_id):
+    return f'{CHANNEL_PREFIX}user:{user_id}'
+
+
+def admin_channel(user_id):
+    return f'{CHANNEL_PREFIX}admin:{user_id}'
+
+
+def format_event(event, data, event_id=None):
+    """One SSE frame."""
+    lines = [f'id: {event_id}'] if event_id is not None else []
+    lines.append(f'event: {event}')
+    lines.append('data: ' + json.dumps(data, cls=DjangoJSONEncoder, separators=(',', ':')))
+    return '\n'.join(lines) + '\n\n'
+
+
+def publish(channel, event, data, event_id=None):
+    """Send an event to the open streams of ``channel``; failures are logged, never raised."""
+    message = json.dumps({'id': event_id, 'frame': format_event(event, data, event_id)})
+    try:
+        client = redis_client()
+        if client is not None:
+            client.publish(channel, message)
+        else:
+            broker.dispatch(channel, message)
+    except Exception:
+        logger.warning('Notification stream event for %s not published', channel, exc_info=True)
+
+
+def publish_notification(notification, channels, serializer_class):
+    def send():
+        data = serializer_class(notification).data
+        for channel in channels:
+            publish(channel, 'notification', data, notification.id)
+    transaction.on_commit(send)
+
+
+class Broker:
+    """Fans messages out to the queues of the streams open in this process."""
+
+    def __init__(self):
+        self.queues = {}
+        self.loop = None
+        self.listener = None
+
+    def subscribe(self, channel):
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            # First stream in this process (or a new event loop)
+            self.loop, self.listener, self.queues = loop, None, {}
+        queue = asyncio.Queue(QUEUE_SIZE)
+        queue.overflowed = False
+        self.queues.setdefault(channel, set()).add(queue)
+
+        url = redis_url()
+        if self.listener is None and url is not None:
+            self.listener = loop.create_task(self.listen(url))
+        return queue
+
+    def unsubscribe(self, channel, queue):
+        queues = self.queues.get(channel)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self.queues[channel]
+
+    def dispatch(self, channel, message):
+        """Deliver a message from any thread."""
+        loop = self.loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self.deliver, channel, message)
+
+    def deliver(self, channel, message):
+        for queue in self.queues.get(channel, ()):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                queue.overflowed = True  # the stream closes and the client resumes from the table
+
+    def drop_all(self):
+        """Close every stream: events may have been missed, clients resume with Last-Event-ID."""
+        for queues in self.queues.values():
+            for queue in queues:
+                queue.overflowed = True
+                if queue.empty():
+                    queue.put_nowait(None)
+
+    async def listen(self, redis_url):
+        import redis.asyncio as redis
+
+        while True:
+            client = redis.from_url(redis_url)
+            try:
+                async with client.pubsub() as pubsub:
+                    await pubsub.psubscribe(f'{CHANNEL_PREFIX}*')
+                    async for message in pubsub.listen():
+                        if message['type'] == 'pmessage':
+                            self.deliver(message['channel'].decode(), message['data'].decode())
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning('Notification stream subscription lost, reconnecting', exc_info=True)
+                self.drop_all()
+                await asyncio.sleep(RECONNECT_DELAY)
+            finally:
+                await client.aclose()
+
+
+broker = Broker()
+
+
+async def event_stream(request, channel, backlog, unread_count, expires_at):
+    """
+    SSE frames for one client.
+
+    ``backlog(last_id, limit)`` returns the newest ``limit`` notifications
+    after ``last_id``, serialized and oldest first; ``unread_count()`` the
+    current unread count.
+    """
+    disconnected = disconnect_event(request)
+    queue = broker.subscribe(channel)
+    waiter = asyncio.ensure_future(disconnected.wait())
+    getter = None
+    try:
+        yield f"retry: {settings.NOTIFICATION_STREAM_RETRY_MS}\n\n"
+
+        # Subscribed before reading the table, so nothing falls in between
+        sent_id = last_event_id(request)
+        limit = settings.NOTIFICATION_STREAM_BACKLOG
+
+        def initial_state():
+            try:
+                missed = backlog(sent_id, limit + 1) if sent_id is not None else []
+                return missed, unread_count()
+            finally:
+                connections.close_all()  # an idle stream holds no database connection
+
+        missed, count = await sync_to_async(initial_state)()
+        if len(missed) > limit:
+            yield format_event('reset', {'last_id': missed[-1]['id']}, missed[-1]['id'])
+        else:
+            for data in missed:
+                yield format_event('notification', data, data['id'])
+        if missed:
+            sent_id = missed[-1]['id']
+        yield format_event('unread_count', {'count': count})
+
+        deadline = min(time.time() + settings.NOTIFICATION_STREAM_MAX_AGE, expires_at)
+        while True:
+            timeout = min(settings.NOTIFICATION_STREAM_HEARTBEAT, deadline - time.time())
+            if timeout <= 0:
+                return
+            getter = getter or asyncio.ensure_future(queue.get())
+            done, _ = await asyncio.wait({getter, waiter}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if waiter in done or queue.overflowed:
+                return
+            if getter not in done:
+                yield ': keep-alive\n\n'
+                continue
+
+            message = json.loads(getter.result())
+            getter = None
+            event_id = message['id']
+            if event_id is not None:
+                if sent_id is not None and event_id <= sent_id:
+                    continue  # already sent from the backlog
+                sent_id = event_id
+            yield message['frame']
+    finally:
+        broker.unsubscribe(channel, queue)
+        waiter.cancel()
+        if getter is not None:
+            getter.cancel()
+
+
+def last_event_id(request):
+    """``Last-Event-ID`` header (sent by EventSource on reconnect) or ``?last_event_id=``."""
+    value = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
@@ -1,9 +1,12 @@
 """Background tasks for notifications."""
+from datetime import timedelta
+
 from django.core.mail import send_mail
 from django.template.loader import render_to_string
 from django.conf import settings
-from twilio.rest import Client
+from apps.core.transports import get_transport
 from .models import Notification
+from . import lifecycle, unread_counts
 from django.utils import timezone
 import logging
 
@@ -42,23 +45,14 @@ def send_sms_notification(notification_id):
     try:
         notification = Notification.objects.get(id=notification_id)
         
-        if not settings.TWILIO_ACCOUNT_SID:
-            raise ValueError("Twilio not configured")
-        
-        client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
-        
-        message = client.messages.create(
-            body=notification.message,
-            from_=settings.TWILIO_PHONE_NUMBER,
-            to=notification.recipient_phone
+        provider_response = get_transport('sms').send(
+            to=notification.recipient_phone,
+            body=notification.message
         )
         
         notification.status = 'sent'
         notification.sent_at = timezone.now()
-        notification.provider_response = {
-            'sid': message.sid,
-            'status': message.status
-        }
+        notification.provider_response = provider_response
         notification.save()
         
         return f"SMS sent to {notification.recipient_phone}"
@@ -132,3 +126,15 @@ def send_booking_confirmation(booking):
     )
     
     send_email_notification(str(notification.id))
+
+
+def reconcile_unread_counts():
+    """Correct cached unread notification counters that drifted from the database."""
+    checked, corrected = unread_counts.reconcile()
+    return f"Checked {checked} unread counters, corrected {corrected}"
+
+
+def purge_admin_notifications():
+    """Delete admin notifications older than ADMIN_NOTIFICATION_RETENTION_DAYS."""
+    deleted, _ = lifecycle.purge(timedelta(days=settings.ADMIN_NOTIFICATION_RETENTION_DAYS))
+    return f"Purged {deleted} old admin notifications"
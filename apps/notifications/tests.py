@@ -0,0 +1,341 @@
+import io
+import json
+from datetime import timedelta
+from unittest import mock
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import transaction
+from django.test import AsyncClient
+from django.utils import timezone
+from freezegun import freeze_time
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.accounts.models import User
+from apps.core.transports import get_transport
+from apps.notifications import lifecycle, stream, unread_counts
+from apps.notifications.models import AdminNotification, AdminNotificationRead, FCMDevice, UserNotification
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
+@pytest.fixture
+def admin():
+    return User.objects.create_superuser(
+        email='admin@example.com', password='secret', first_name='A', last_name='B'
+    )
+
+
+@pytest.fixture
+def notifications():
+    return [AdminNotification.objects.create(title=f'n{i}', message='m') for i in range(5)]
+
+
+def test_insert_reads_counts_only_new_rows(admin, notifications):
+    ids = [n.pk for n in notifications]
+    AdminNotificationRead.objects.create(notification=notifications[0], user=admin)
+
+    # As when another request marked the first one after the unread ids were read
+    assert lifecycle._insert_reads(admin.pk, ids[:3]) == 2
+    assert lifecycle._insert_reads(admin.pk, ids[:3]) == 0
+    assert AdminNotificationRead.objects.filter(user=admin).count() == 3
+
+
+@pytest.mark.parametrize('ids', [None, 'all'])
+def test_bulk_mark_read(admin, notifications, ids):
+    lifecycle.mark_read(admin.pk, notifications[1])
+    ids = [n.pk for n in notifications] if ids else None
+
+    assert lifecycle.bulk_mark_read(admin.pk, ids=ids, chunk_size=2) == 4
+    assert lifecycle.bulk_mark_read(admin.pk, ids=ids, chunk_size=2) == 0
+    assert AdminNotificationRead.objects.filter(user=admin).count() == 5
+
+
+def test_run_periodic_tasks_purges_admin_notifications(admin, notifications, settings):
+    settings.ADMIN_NOTIFICATION_RETENTION_DAYS = 30
+    AdminNotification.objects.filter(pk=notifications[0].pk).update(created_at=timezone.now() - timedelta(days=31))
+    lifecycle.mark_read(admin.pk, notifications[0])
+    out = io.StringIO()
+
+    call_command('run_periodic_tasks', task='purge_admin_notifications', stdout=out)
+
+    assert 'Purged 1 old admin notifications' in out.getvalue()
+    assert AdminNotification.objects.count() == 4
+    assert not AdminNotificationRead.objects.exists()
+
+
+USER_STREAM = '/api/customer/notifications/stream/'
+ADMIN_STREAM = '/api/admin/notifications/stream/'
+
+
+@pytest.fixture
+def customer():
+    return User.objects.create_user(
+        email='customer@example.com', password='secret', first_name='Ayşe', last_name='Yılmaz'
+    )
+
+
+@pytest.fixture
+def stream_settings(settings):
+    settings.NOTIFICATION_STREAM_HEARTBEAT = 0.2
+    settings.NOTIFICATION_STREAM_MAX_AGE = 0.7
+    return settings
+
+
+def bearer(user, **headers):
+    return {'Authorization': f'Bearer {RefreshToken.for_user(user).access_token}', **headers}
+
+
+def open_stream(path, headers=None, publish=()):
+    """
+    Request a stream over ASGI and read it until it ends. ``publish`` holds
+    ``(channel, data)`` events sent once the initial state was received.
+    """
+    async def read():
+        response = await AsyncClient().get(path, headers=headers)
+        if not response.streaming:
+            return response, []
+        frames = []
+        async for chunk in response.streaming_content:
+            frames.append(chunk.decode())
+            if frames[-1].startswith('event: unread_count'):
+                for channel, data in publish:
+                    stream.publish(channel, 'notification', data, data['id'])
+        return response, frames
+    return async_to_sync(read)()
+
+
+def events(frames):
+    """``(event, data)`` of the frames that are not comments or ``retry``."""
+    parsed = []
+    for frame in frames:
+        fields = dict(line.split(': ', 1) for line in frame.strip().split('\n') if not line.startswith(':'))
+        if 'event' in fields:
+            parsed.append((fields['event'], json.loads(fields['data'])))
+    return parsed
+
+
+@pytest.mark.django_db(transaction=True, databases=['default', 'replica'])
+def test_stream_replays_backlog_and_skips_sent_ids(customer, stream_settings):
+    rows = [UserNotification.objects.create(user=customer, title=f'n{i}', message='m') for i in range(3)]
+    channel = stream.user_channel(customer.pk)
+    live = {'id': rows[-1].pk + 1, 'title': 'live'}
+
+    response, frames = open_stream(
+        USER_STREAM, bearer(customer, **{'Last-Event-ID': str(rows[0].pk)}),
+        publish=[(channel, {'id': rows[-1].pk}), (channel, live)],
+    )
+
+    assert response.status_code == 200
+    assert response['Content-Type'] == 'text/event-stream'
+    assert frames[0] == f'retry: {stream_settings.NOTIFICATION_STREAM_RETRY_MS}\n\n'
+    received = events(frames)
+    # rows[-1] was already sent from the backlog, the live event only once
+    assert [(event, data['id']) for event, data in received if event == 'notification'] == [
+        ('notification', rows[1].pk), ('notification', rows[2].pk), ('notification', live['id']),
+    ]
+    assert ('unread_count', {'count': 3}) in received
+    assert received.index(('unread_count', {'count': 3})) == 2
+    assert ': keep-alive\n\n' in frames
+
+
+@pytest.mark.django_db(transaction=True, databases=['default', 'replica'])
+def test_stream_resets_when_too_many_were_missed(customer, stream_settings):
+    stream_settings.NOTIFICATION_STREAM_BACKLOG = 2
+    rows = [UserNotification.objects.create(user=customer, title=f'n{i}', message='m') for i in range(3)]
+
+    _, frames = open_stream(USER_STREAM, bearer(customer, **{'Last-Event-ID': '0'}))
+
+    assert events(frames)[:2] == [('reset', {'last_id': rows[-1].pk}), ('unread_count', {'count': 3})]
+    assert f'id: {rows[-1].pk}\nevent: reset\n' in frames[1]
+
+
+@pytest.mark.django_db(transaction=True, databases=['default', 'replica'])
+def test_stream_token(customer, stream_settings):
+    @async_to_sync
+    async def request(method, path, headers):
+        return await AsyncClient().generic(method, path, headers=headers)
+
+    response = request('POST', f'{USER_STREAM}token/', headers=bearer(customer))
+    assert response.status_code == 200
+    token = response.json()['data']['token']
+
+    response, frames = open_stream(f'{USER_STREAM}?token={token}')
+    assert response.status_code == 200
+    assert events(frames) == [('unread_count', {'count': 0})]
+
+    # Not an access token
+    response = request('GET', '/api/customer/notifications/', headers={'Authorization': f'Bearer {token}'})
+    assert response.status_code == 401
+
+    with freeze_time(timezone.now() + timedelta(seconds=stream_settings.NOTIFICATION_STREAM_TOKEN_LIFETIME + 1)):
+        response, _ = open_stream(f'{USER_STREAM}?token={token}')
+    assert response.status_code == 401
+
+
+@pytest.mark.django_db(transaction=True, databases=['default', 'replica'])
+def test_stream_errors(admin, customer, client, stream_settings):
+    access_token = RefreshToken.for_user(customer).access_token
+
+    assert open_stream(USER_STREAM)[0].status_code == 401
+    assert open_stream(f'{USER_STREAM}?token=invalid')[0].status_code == 401
+    # Access tokens are not accepted in the URL, they would end up in access logs
+    assert open_stream(f'{USER_STREAM}?token={access_token}')[0].status_code == 401
+    assert open_stream(ADMIN_STREAM, bearer(customer))[0].status_code == 403
+    assert open_stream(ADMIN_STREAM, bearer(admin))[0].status_code == 200
+    # WSGI
+    assert client.get(USER_STREAM, headers=bearer(customer)).status_code == 503
+
+
+def test_unread_counter_counts_created_notifications(customer, django_capture_on_commit_callbacks):
+    key = unread_counts.user_key(customer.pk)
+    assert unread_counts.user_unread_count(customer.pk) == 0
+
+    with django_capture_on_commit_callbacks(execute=True):
+        UserNotification.objects.create(user=customer, title='t', message='m')
+        UserNotification.objects.create(user=customer, title='t', message='m', is_read=True)
+
+    assert cache.get(key) == 1
+
+
+def test_unread_counter_changes_on_commit(customer, django_capture_on_commit_callbacks):
+    key = unread_counts.user_key(customer.pk)
+    cache.set(key, 5)
+
+    with django_capture_on_commit_callbacks() as callbacks:
+        unread_counts.adjust(key, -2)
+        unread_counts.invalidate(key)
+        assert cache.get(key) == 5
+    with transaction.atomic():
+        UserNotification.objects.create(user=customer, title='t', message='m')
+        transaction.set_rollback(True)
+
+    assert len(callbacks) == 2
+    callbacks[0]()
+    assert cache.get(key) == 3
+    callbacks[1]()
+    assert cache.get(key) == 0  # recounted
+
+
+@pytest.mark.django_db(transaction=True, databases=['default', 'replica'])
+def test_mark_read_decrements_once(customer):
+    notifications = [UserNotification.objects.create(user=customer, title='t', message='m') for _ in range(2)]
+    assert unread_counts.user_unread_count(customer.pk) == 2
+    client = APIClient()
+    client.force_authenticate(customer)
+
+    for _ in range(2):
+        response = client.patch(f'/api/customer/notifications/{notifications[0].pk}/mark_read/')
+        assert response.status_code == 200
+
+    assert cache.get(unread_counts.user_key(customer.pk)) == 1
+
+
+def test_admin_mark_read_decrements_once(admin, notifications, django_capture_on_commit_callbacks):
+    assert unread_counts.admin_unread_count(admin.pk) == 5
+
+    with django_capture_on_commit_callbacks(execute=True):
+        assert lifecycle.mark_read(admin.pk, notifications[0])
+        assert not lifecycle.mark_read(admin.pk, notifications[0])
+
+    assert cache.get(unread_counts.admin_key(admin.pk)) == 4
+
+
+def test_reconcile_drops_drifted_counters(admin, customer, notifications):
+    other = User.objects.create_user(email='other@example.com', password='secret', first_name='A', last_name='B')
+    for user in (customer, other):
+        UserNotification.objects.create(user=user, title='t', message='m')
+    cache.set_many({
+        unread_counts.admin_key(admin.pk): 7,
+        unread_counts.user_key(customer.pk): 4,
+        unread_counts.user_key(other.pk): 1,
+    })
+    deleted = []
+    delete = cache.delete
+
+    def recording_delete(key, *args, **kwargs):
+        deleted.append(key)
+        return delete(key, *args, **kwargs)
+
+    with mock.patch.object(cache, 'set') as set_, mock.patch.object(cache, 'delete', recording_delete):
+        assert unread_counts.reconcile(chunk_size=1) == (3, 2)
+
+    # Never written over a counter that may have been incremented meanwhile
+    set_.assert_not_called()
+    assert deleted == [unread_counts.admin_key(admin.pk), unread_counts.user_key(customer.pk)]
+    assert unread_counts.admin_unread_count(admin.pk) == 5
+    assert unread_counts.user_unread_count(customer.pk) == 1
+    assert unread_counts.reconcile() == (3, 0)
+
+
+class FakePush:
+    """``push`` transport recording what would have been sent."""
+    sent = []
+    result = True
+
+    @classmethod
+    def send_to_admin_users(cls, title, body, data=None):
+        cls.sent.append((title, data))
+        return cls.result
+
+
+@pytest.fixture
+def push(settings):
+    settings.TRANSPORTS = {'push': f'{__name__}.FakePush'}
+    get_transport.cache_clear()
+    FakePush.sent, FakePush.result = [], True
+    yield FakePush
+    get_transport.cache_clear()
+
+
+def api_post(path, user, data):
+    async def post():
+        return await AsyncClient().post(path, data, content_type='application/json', headers=bearer(user))
+    return async_to_sync(post)()
+
+
+def test_save_fcm_token(customer):
+    response = api_post('/api/admin/notifications/fcm-token/', customer, {'token': 't-1'})
+    assert response.status_code == 201
+    assert response.json()['data']['device_type'] == 'web'
+
+    # Registering a known token again updates and reactivates its device
+    FCMDevice.objects.filter(token='t-1').update(is_active=False)
+    response = api_post('/api/admin/notifications/fcm-token/', customer, {'token': 't-1', 'device_type': 'android'})
+    assert response.status_code == 200
+    device = FCMDevice.objects.get()
+    assert (device.user, device.device_type, device.is_active) == (customer, 'android', True)
+
+    response = api_post('/api/admin/notifications/fcm-token/', customer, {})
+    assert (response.status_code, response.json()) == (400, {'error': 'Token is required'})
+
+
+def test_send_test_notification(admin, push):
+    response = api_post('/api/admin/notifications/test-notification/', admin, {})
+    assert response.status_code == 400
+    assert response.json()['device_count'] == 0
+
+    FCMDevice.objects.create(user=admin, token='t-1')
+    response = api_post('/api/admin/notifications/test-notification/', admin, {})
+    assert response.status_code == 200
+    assert response.json()['device_count'] == 1
+    assert push.sent == [('🔔 Test Notification', {'type': 'test', 'url': '/admin/dashboard'})]
+    assert AdminNotification.objects.get().title == 'Test Notification'
+
+    push.result = False
+    assert api_post('/api/admin/notifications/test-notification/', admin, {}).status_code == 500
+
+
+def test_send_test_notification_requires_admin(customer, push):
+    FCMDevice.objects.create(user=customer, token='t-1')
+
+    assert api_post('/api/admin/notifications/test-notification/', customer, {}).status_code == 403
+    assert push.sent == []
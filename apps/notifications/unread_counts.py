@@ -0,0 +1,167 @@
+"""
+Unread notification counters kept in the cache.
+
+The unread badge is polled constantly, so its count is a cache read: one
+counter per customer and one per admin (admins keep their own read state,
+see ``AdminNotificationRead``). Counters are created from a COUNT query on
+the first read, incremented when an unread notification is created and
+decremented when ``mark_read`` actually marks one, so concurrent requests
+never count a notification twice. Bulk operations and any other change
+(admin edits, deletes) drop the counter and the next read recounts.
+
+A counter can still drift when the cache misses an update (cache outage, a
+create racing the first recount). Counters expire after
+``NOTIFICATION_COUNT_TIMEOUT`` and ``run_periodic_tasks --task=reconcile_unread``
+drops the ones that drifted in between, so the next read recounts (writing
+the count it found could overwrite an increment made since).
+
+Every change is also pushed to the open notification streams (``stream``).
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+
+from apps.accounts.models import User
+from . import stream
+from .models import AdminNotification, UserNotification
+
+logger = logging.getLogger(__name__)
+
+USER_PREFIX = 'notifications:unread:user:'
+ADMIN_PREFIX = 'notifications:unread:admin:'
+
+
+def user_key(user_id):
+    return f'{USER_PREFIX}{user_id}'
+
+
+def admin_key(user_id):
+    return f'{ADMIN_PREFIX}{user_id}'
+
+
+def admin_user_ids():
+    """Users who see admin notifications (``IsAdminOrStaff``)."""
+    return list(
+        User.objects.filter(Q(is_staff=True) | Q(user_type='admin'), is_active=True).values_list('id', flat=True)
+    )
+
+
+def admin_unread_queryset(user_id):
+    return AdminNotification.objects.exclude(reads__user_id=user_id)
+
+
+def _stream_channel(key):
+    if key.startswith(ADMIN_PREFIX):
+        return stream.admin_channel(key[len(ADMIN_PREFIX):])
+    return stream.user_channel(key[len(USER_PREFIX):])
+
+
+def _count_query(key):
+    if key.startswith(ADMIN_PREFIX):
+        return admin_unread_queryset(key[len(ADMIN_PREFIX):])
+    return UserNotification.objects.filter(user_id=key[len(USER_PREFIX):], is_read=False)
+
+
+def get_count(key):
+    """Cached unread count, counted from the database on a miss."""
+    try:
+        count = cache.get(key)
+    except Exception:
+        logger.warning('Unread counter cache unavailable', exc_info=True)
+        return _count_query(key).count()
+    if count is None:
+        count = _count_query(key).count()
+        cache.add(key, count, settings.NOTIFICATION_COUNT_TIMEOUT)
+    return count
+
+
+def user_unread_count(user_id):
+    return get_count(user_key(user_id))
+
+
+def admin_unread_count(user_id):
+    return get_count(admin_key(user_id))
+
+
+def adjust(key, delta):
+    """
+    Add ``delta`` to a counter once the current transaction commits.
+    Counters that are not cached are counted from the database instead.
+    """
+    if delta:
+        transaction.on_commit(lambda: _adjust(key, delta))
+
+
+def _adjust(key, delta):
+    try:
+        value = cache.incr(key, delta)
+    except ValueError:
+        value = None  # not cached, the count below creates it
+    except Exception:
+        logger.warning('Unread counter %s not updated', key, exc_info=True)
+        return
+    if value is None or value < 0:
+        _delete(key)
+    else:
+        stream.publish(_stream_channel(key), 'unread_count', {'count': value})
+
+
+def invalidate(key):
+    transaction.on_commit(lambda: _delete(key))
+
+
+def _delete(key):
+    try:
+        cache.delete(key)
+    except Exception:
+        logger.warning('Unread counter %s not cleared', key, exc_info=True)
+    stream.publish(_stream_channel(key), 'unread_count', {'count': get_count(key)})
+
+
+def reconcile(chunk_size=1000):
+    """
+    Compare cached counters with the database and drop the ones that drifted.
+    Returns: (counters checked, counters corrected)
+    """
+    checked = corrected = 0
+
+    admin_ids = admin_user_ids()
+    cached = cache.get_many([admin_key(user_id) for user_id in admin_ids])
+    for user_id in admin_ids:
+        key = admin_key(user_id)
+        if key in cached:
+            checked += 1
+            actual = admin_unread_queryset(user_id).count()
+            if cached[key] != actual:
+                _delete(key)
+                corrected += 1
+
+    user_ids = UserNotification.objects.order_by('user_id').values_list('user_id', flat=True).distinct()
+    last_id = None
+    while True:
+        page = user_ids if last_id is None else user_ids.filter(user_id__gt=last_id)
+        chunk = list(page[:chunk_size])
+        if not chunk:
+            break
+        last_id = chunk[-1]
+
+        cached = cache.get_many([user_key(user_id) for user_id in chunk])
+        if not cached:
+            continue
+        cached_ids = [user_id for user_id in chunk if user_key(user_id) in cached]
+        actual = dict(
+            UserNotification.objects.filter(user_id__in=cached_ids, is_read=False)
+            .values('user_id').annotate(count=Count('id')).values_list('user_id', 'count')
+        )
+        drifted = [
+            user_key(user_id) for user_id in cached_ids
+            if cached[user_key(user_id)] != actual.get(user_id, 0)
+        ]
+        for key in drifted:
+            _delete(key)
+        checked += len(cached_ids)
+        corrected += len(drifted)
+    return checked, corrected
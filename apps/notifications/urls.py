@@ -1,6 +1,9 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import AdminNotificationViewSet, UserNotificationViewSet, save_fcm_token, send_test_notification
+from .views import (
+    AdminNotificationViewSet, UserNotificationViewSet, admin_notification_stream, save_fcm_token,
+    send_test_notification, stream_token, user_notification_stream,
+)
 
 # Admin notifications router
 admin_router = DefaultRouter()
@@ -13,10 +16,14 @@ user_router.register('', UserNotificationViewSet, basename='user-notification')
 urlpatterns = [
     path('fcm-token/', save_fcm_token, name='save-fcm-token'),
     path('test-notification/', send_test_notification, name='test-notification'),
+    path('stream/', admin_notification_stream, name='admin-notification-stream'),
+    path('stream/token/', stream_token, name='admin-notification-stream-token'),
     path('', include(admin_router.urls)),
 ]
 
 # User notification URLs (will be included separately)
 user_notification_urls = [
+    path('stream/', user_notification_stream, name='user-notification-stream'),
+    path('stream/token/', stream_token, name='user-notification-stream-token'),
     path('', include(user_router.urls)),
 ]
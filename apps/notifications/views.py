@@ -1,9 +1,27 @@
+from datetime import timedelta
+
+from adrf.decorators import api_view as async_api_view
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Exists, OuterRef
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.dateparse import parse_datetime
 from rest_framework import viewsets, status
-from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.decorators import action, permission_classes, throttle_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAdminUser, IsAuthenticated
-from .models import AdminNotification, FCMDevice, UserNotification
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+from rest_framework_simplejwt.tokens import AccessToken
+from apps.accounts.authentication import CachedJWTAuthentication
+from apps.core.throttling import scoped_throttle_classes
+from apps.core.transports import get_transport
+from apps.core.pagination import CreatedAtCursorPagination
+from .models import AdminNotification, AdminNotificationRead, FCMDevice, UserNotification
 from .serializers import AdminNotificationSerializer, FCMDeviceSerializer, UserNotificationSerializer
+from . import lifecycle, stream, unread_counts
+
+MAX_BULK_IDS = 10000
 
 
 class IsAdminOrStaff(IsAuthenticated):
@@ -19,13 +37,18 @@ class IsAdminOrStaff(IsAuthenticated):
 class AdminNotificationViewSet(viewsets.ModelViewSet):
     """
     ViewSet for admin notifications.
+    Read state is per admin; lists are cursor-paginated, newest first (?cursor=...&page_size=...).
     """
     queryset = AdminNotification.objects.all()
     serializer_class = AdminNotificationSerializer
     permission_classes = [IsAdminOrStaff]
+    pagination_class = CreatedAtCursorPagination
+    ordering_fields = ['created_at']
+    ordering = ['-created_at']
     
     def get_queryset(self):
-        queryset = AdminNotification.objects.all()
+        reads = AdminNotificationRead.objects.filter(notification=OuterRef('pk'), user=self.request.user)
+        queryset = AdminNotification.objects.annotate(is_read=Exists(reads))
         
         # Filter by read status
         is_read = self.request.query_params.get('is_read', None)
@@ -34,18 +57,45 @@ class AdminNotificationViewSet(viewsets.ModelViewSet):
         
         return queryset
     
+    def perform_destroy(self, instance):
+        instance.delete()
+        lifecycle.invalidate_admin_counts()
+    
     @action(detail=False, methods=['post'])
     def mark_all_read(self, request):
-        """Mark all notifications as read."""
-        AdminNotification.objects.filter(is_read=False).update(is_read=True)
-        return Response({'message': 'All notifications marked as read'})
+        """Mark all notifications as read (optionally only those created before "before")."""
+        before = request.data.get('before')
+        if before is not None:
+            before = parse_datetime(str(before))
+            if before is None:
+                return Response({'error': 'before must be an ISO 8601 datetime'}, status=status.HTTP_400_BAD_REQUEST)
+        marked = lifecycle.bulk_mark_read(request.user.pk, before=before)
+        return Response({'message': 'All notifications marked as read', 'marked': marked})
+    
+    @action(detail=False, methods=['post'])
+    def bulk_mark_read(self, request):
+        """Mark the notifications in "ids" as read."""
+        ids = request.data.get('ids')
+        if not isinstance(ids, list) or not all(isinstance(pk, int) for pk in ids):
+            return Response({'error': 'ids must be a list of notification ids'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(ids) > MAX_BULK_IDS:
+            return Response(
+                {'error': f'At most {MAX_BULK_IDS} ids per request'}, status=status.HTTP_400_BAD_REQUEST
+            )
+        marked = lifecycle.bulk_mark_read(request.user.pk, ids=ids)
+        return Response({'message': 'Notifications marked as read', 'marked': marked})
+    
+    @action(detail=False, methods=['get'])
+    def unread_count(self, request):
+        """Get count of unread admin notifications for current admin (cached)."""
+        return Response({'count': unread_counts.admin_unread_count(request.user.pk)})
     
     @action(detail=True, methods=['patch'])
     def mark_read(self, request, pk=None):
         """Mark a single notification as read."""
         notification = self.get_object()
+        lifecycle.mark_read(request.user.pk, notification)
         notification.is_read = True
-        notification.save()
         return Response(self.serializer_class(notification).data)
 
 
@@ -71,27 +121,30 @@ class UserNotificationViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['post'])
     def mark_all_read(self, request):
         """Mark all notifications as read for current user."""
-        UserNotification.objects.filter(user=request.user, is_read=False).update(is_read=True)
+        updated = UserNotification.objects.filter(user=request.user, is_read=False).update(is_read=True)
+        unread_counts.adjust(unread_counts.user_key(request.user.pk), -updated)
         return Response({'message': 'All notifications marked as read'})
     
     @action(detail=False, methods=['get'])
     def unread_count(self, request):
-        """Get count of unread notifications for current user."""
-        count = UserNotification.objects.filter(user=request.user, is_read=False).count()
-        return Response({'count': count})
+        """Get count of unread notifications for current user (cached)."""
+        return Response({'count': unread_counts.user_unread_count(request.user.pk)})
     
     @action(detail=True, methods=['patch'])
     def mark_read(self, request, pk=None):
         """Mark a single notification as read."""
         notification = self.get_object()
+        # Conditional UPDATE: only the request that flips the row adjusts the counter
+        updated = UserNotification.objects.filter(pk=notification.pk, is_read=False).update(is_read=True)
+        unread_counts.adjust(unread_counts.user_key(request.user.pk), -updated)
         notification.is_read = True
-        notification.save()
         return Response(self.serializer_class(notification).data)
 
 
-@api_view(['POST'])
+@async_api_view(['POST'])
 @permission_classes([IsAuthenticated])
-def save_fcm_token(request):
+@throttle_classes(scoped_throttle_classes('fcm_token'))
+async def save_fcm_token(request):
     """
     Save or update FCM device token for push notifications.
     """
@@ -105,7 +158,7 @@ def save_fcm_token(request):
         )
     
     # Get or create device
-    device, created = FCMDevice.objects.update_or_create(
+    device, created = await FCMDevice.objects.aupdate_or_create(
         token=token,
         defaults={
             'user': request.user,
@@ -123,20 +176,19 @@ def save_fcm_token(request):
     }, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
 
 
-@api_view(['POST'])
+@async_api_view(['POST'])
 @permission_classes([IsAdminOrStaff])
-def send_test_notification(request):
+async def send_test_notification(request):
     """
     Send a test FCM notification to all admin users.
     """
-    from .fcm_service import FCMService
     import logging
     
     logger = logging.getLogger(__name__)
     
     try:
         # Check if there are any FCM devices
-        device_count = FCMDevice.objects.filter(is_active=True).count()
+        device_count = await FCMDevice.objects.filter(is_active=True).acount()
         
         if device_count == 0:
             return Response({
@@ -147,7 +199,7 @@ def send_test_notification(request):
         
         logger.info(f'Sending test notification to {device_count} devices')
         
-        result = FCMService.send_to_admin_users(
+        result = await sync_to_async(get_transport('push').send_to_admin_users)(
             title='🔔 Test Notification',
             body='This is a test notification. FCM is working! ✅',
             data={
@@ -157,11 +209,10 @@ def send_test_notification(request):
         )
         
         # Always create an in-app notification for testing
-        AdminNotification.objects.create(
+        await AdminNotification.objects.acreate(
             title='Test Notification',
             message='This is a test notification to verify FCM is working.',
             notification_type='info',
-            is_read=False
         )
         
         if result:
@@ -187,3 +238,109 @@ def send_test_notification(request):
             },
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
+
+
+async def admin_notification_stream(request):
+    """
+    Server-Sent Events stream of new admin notifications and the unread count.
+    """
+    return await notification_stream(request, admin=True)
+
+
+async def user_notification_stream(request):
+    """
+    Server-Sent Events stream of the current user's new notifications and unread count.
+    """
+    return await notification_stream(request, admin=False)
+
+
+async def notification_stream(request, admin):
+    if request.method != 'GET':
+        return JsonResponse({'success': False, 'error': 'Method not allowed'}, status=405)
+    if not isinstance(request, ASGIRequest):
+        # A sync worker would be held for the whole stream
+        return JsonResponse({
+            'success': False,
+            'error': 'Notification streams are not available, poll unread_count instead'
+        }, status=503)
+
+    try:
+        user, token = await sync_to_async(authenticate_stream)(request)
+    except (AuthenticationFailed, InvalidToken) as e:
+        detail = e.detail.get('detail', '') if isinstance(e.detail, dict) else e.detail
+        return JsonResponse({'success': False, 'error': str(detail)}, status=401)
+
+    if admin:
+        if not (user.is_staff or getattr(user, 'user_type', None) == 'admin'):
+            return JsonResponse({'success': False, 'error': 'Permission denied'}, status=403)
+        channel = stream.admin_channel(user.pk)
+
+        def unread_count():
+            return unread_counts.admin_unread_count(user.pk)
+
+        def backlog(last_id, limit):
+            reads = AdminNotificationRead.objects.filter(notification=OuterRef('pk'), user=user)
+            rows = AdminNotification.objects.filter(id__gt=last_id).annotate(is_read=Exists(reads)).order_by('-id')
+            return AdminNotificationSerializer(rows[:limit], many=True).data[::-1]
+    else:
+        channel = stream.user_channel(user.pk)
+
+        def unread_count():
+            return unread_counts.user_unread_count(user.pk)
+
+        def backlog(last_id, limit):
+            rows = UserNotification.objects.filter(user=user, id__gt=last_id).select_related('booking').order_by('-id')
+            return UserNotificationSerializer(rows[:limit], many=True).data[::-1]
+
+    # A stream token's stream lasts as long as the access token it was issued with
+    expires_at = token.get(StreamToken.ACCESS_EXP_CLAIM, token['exp'])
+    response = StreamingHttpResponse(
+        stream.event_stream(request, channel, backlog, unread_count, expires_at=expires_at),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # no proxy buffering
+    return response
+
+
+class StreamToken(AccessToken):
+    """
+    Short-lived token for the ``?token=`` of a stream URL, which ends up in
+    proxy and access logs. Not accepted by the API (wrong token type).
+    """
+    token_type = 'stream'
+    lifetime = timedelta(seconds=settings.NOTIFICATION_STREAM_TOKEN_LIFETIME)
+    ACCESS_EXP_CLAIM = 'access_exp'
+
+
+@async_api_view(['POST'])
+@permission_classes([IsAuthenticated])
+async def stream_token(request):
+    """
+    Issue a stream token for opening a notification stream from EventSource.
+    """
+    token = StreamToken.for_user(request.user)
+    token[StreamToken.ACCESS_EXP_CLAIM] = request.auth['exp']
+    return Response({
+        'success': True,
+        'data': {'token': str(token), 'expires_in': int(StreamToken.lifetime.total_seconds())},
+    })
+
+
+def authenticate_stream(request):
+    """
+    Authenticate with the Authorization header, or a ``?token=`` stream token
+    for EventSource clients, which cannot send headers.
+    """
+    authentication = CachedJWTAuthentication()
+    result = authentication.authenticate(request)
+    if result is None:
+        raw_token = request.GET.get('token')
+        if not raw_token:
+            raise AuthenticationFailed('Authentication credentials were not provided.')
+        try:
+            token = StreamToken(raw_token)
+        except TokenError as e:
+            raise InvalidToken(e.args[0])
+        result = authentication.get_user(token), token
+    return result
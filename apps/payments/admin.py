@@ -1,5 +1,16 @@
+import json
+
 from django.contrib import admin
+from django.utils.html import format_html
+from . import payload_store
 from .models import Transaction, Refund, WebhookLog
+from .webhooks import replay
+
+
+def render_archive(payload):
+    if payload is None:
+        return 'Arşivde yok (saklama süresi dolmuş olabilir)'
+    return format_html('<pre>{}</pre>', json.dumps(payload, indent=2, ensure_ascii=False))
 
 
 @admin.register(Transaction)
@@ -10,7 +21,7 @@ class TransactionAdmin(admin.ModelAdmin):
     )
     list_filter = ('status', 'payment_gateway', 'created_at')
     search_fields = ('transaction_id', 'gateway_transaction_id', 'user__email', 'booking__booking_number')
-    readonly_fields = ('id', 'transaction_id', 'created_at', 'updated_at', 'gateway_response')
+    readonly_fields = ('id', 'transaction_id', 'created_at', 'updated_at', 'gateway_response', 'full_gateway_response')
     ordering = ('-created_at',)
     
     fieldsets = (
@@ -24,7 +35,7 @@ class TransactionAdmin(admin.ModelAdmin):
             'fields': ('status', 'error_message')
         }),
         ('Gateway Yanıtı', {
-            'fields': ('gateway_response',),
+            'fields': ('gateway_response', 'full_gateway_response'),
             'classes': ('collapse',)
         }),
         ('Meta Veriler', {
@@ -34,6 +45,11 @@ class TransactionAdmin(admin.ModelAdmin):
             'fields': ('created_at', 'updated_at', 'completed_at')
         }),
     )
+    
+    def full_gateway_response(self, obj):
+        """Decompress the archived response when the change page is opened."""
+        return render_archive(payload_store.load('transaction', obj.pk))
+    full_gateway_response.short_description = 'Tam Gateway Yanıtı'
 
 
 @admin.register(Refund)
@@ -47,8 +63,20 @@ class RefundAdmin(admin.ModelAdmin):
 
 @admin.register(WebhookLog)
 class WebhookLogAdmin(admin.ModelAdmin):
-    list_display = ('gateway', 'event_type', 'processed', 'created_at')
+    list_display = ('gateway', 'event_type', 'event_id', 'processed', 'attempts', 'next_attempt_at', 'created_at')
     list_filter = ('gateway', 'processed', 'event_type', 'created_at')
-    search_fields = ('gateway', 'event_type')
-    readonly_fields = ('payload', 'headers', 'created_at', 'processed_at')
+    search_fields = ('gateway', 'event_type', 'event_id', 'ordering_key')
+    readonly_fields = ('payload', 'headers', 'full_payload', 'created_at', 'processed_at', 'next_attempt_at')
     ordering = ('-created_at',)
+    actions = ['replay_webhooks']
+    
+    def replay_webhooks(self, request, queryset):
+        """Queue failed events for the webhook worker again."""
+        count = replay(queryset)
+        self.message_user(request, f'{count} olay yeniden işlenmek üzere kuyruğa alındı.')
+    replay_webhooks.short_description = 'Seçili olayları yeniden işle'
+    
+    def full_payload(self, obj):
+        """Decompress the archived payload and headers when the change page is opened."""
+        return render_archive(payload_store.load('webhook', obj.pk))
+    full_payload.short_description = 'Tam İçerik'
@@ -0,0 +1,163 @@
+"""
+HTTP client for the iyzico API.
+
+Requests are signed with IYZWSv2 and sent over a pooled httpx connection
+pool with strict connect/read timeouts, behind a circuit breaker shared by
+all workers. ``get_client()`` is used from sync code, ``get_async_client()``
+from async views; both return per-process (per event loop) singletons so
+TLS connections are reused between payments.
+"""
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import secrets
+import weakref
+
+import httpx
+from django.conf import settings
+
+from apps.core.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+INITIALIZE_3DS_PATH = '/payment/3dsecure/initialize'
+AUTH_3DS_PATH = '/payment/3dsecure/auth'
+RETRIEVE_PAYMENT_PATH = '/payment/detail'
+
+
+class GatewayError(Exception):
+    """The gateway is unavailable, timed out or failed on its side (5xx)."""
+
+
+def sign(path, body, api_key, secret_key, random_key):
+    """Build the IYZWSv2 Authorization header value for a request."""
+    signature = hmac.new(
+        secret_key.encode('utf-8'), (random_key + path + body).encode('utf-8'), hashlib.sha256
+    ).hexdigest()
+    params = f'apiKey:{api_key}&randomKey:{random_key}&signature:{signature}'
+    return 'IYZWSv2 ' + base64.b64encode(params.encode('utf-8')).decode('ascii')
+
+
+class BaseIyzicoClient:
+
+    def __init__(self):
+        base_url = settings.IYZICO_BASE_URL
+        self.base_url = base_url if '://' in base_url else f'https://{base_url}'
+        self.timeout = httpx.Timeout(
+            settings.IYZICO_READ_TIMEOUT, connect=settings.IYZICO_CONNECT_TIMEOUT
+        )
+        self.limits = httpx.Limits(
+            max_connections=settings.IYZICO_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.IYZICO_MAX_CONNECTIONS,
+        )
+        self.breaker = CircuitBreaker(
+            'iyzico',
+            failure_threshold=settings.IYZICO_CIRCUIT_FAILURES,
+            reset_timeout=settings.IYZICO_CIRCUIT_RESET_TIMEOUT,
+        )
+
+    def build_request(self, path, payload):
+        body = json.dumps(payload)
+        random_key = secrets.token_hex(8)
+        headers = {
+            'Accept': 'application/json',
+            'Content-Type': 'application/json',
+            'x-iyzi-rnd': random_key,
+            'Authorization': sign(
+                path, body, settings.IYZICO_API_KEY, settings.IYZICO_SECRET_KEY, random_key
+            ),
+        }
+        return body, headers
+
+    @staticmethod
+    def parse_response(response):
+        # Business failures (declined card etc.) come back as 200 with status=failure
+        if response.status_code >= 500:
+            raise GatewayError(f'iyzico returned HTTP {response.status_code}')
+        return response.json()
+
+
+class IyzicoClient(BaseIyzicoClient):
+
+    def __init__(self):
+        super().__init__()
+        self.session = httpx.Client(base_url=self.base_url, timeout=self.timeout, limits=self.limits)
+
+    def post(self, path, payload):
+        """POST a signed request. Returns: decoded iyzico response dict"""
+        try:
+            self.breaker.before_call()
+        except CircuitOpenError as exc:
+            raise GatewayError(str(exc)) from exc
+
+        body, headers = self.build_request(path, payload)
+        try:
+            result = self.parse_response(self.session.post(path, content=body, headers=headers))
+        except (httpx.HTTPError, ValueError, GatewayError) as exc:
+            self.breaker.record_failure()
+            raise GatewayError(f'iyzico request failed: {exc}') from exc
+        self.breaker.record_success()
+        return result
+
+    def initialize_3ds(self, payload):
+        return self.post(INITIALIZE_3DS_PATH, payload)
+
+    def auth_3ds(self, payload):
+        return self.post(AUTH_3DS_PATH, payload)
+
+    def retrieve_payment(self, payload):
+        return self.post(RETRIEVE_PAYMENT_PATH, payload)
+
+
+class AsyncIyzicoClient(BaseIyzicoClient):
+
+    def __init__(self):
+        super().__init__()
+        self.session = httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout, limits=self.limits)
+
+    async def post(self, path, payload):
+        """POST a signed request. Returns: decoded iyzico response dict"""
+        try:
+            await self.breaker.abefore_call()
+        except CircuitOpenError as exc:
+            raise GatewayError(str(exc)) from exc
+
+        body, headers = self.build_request(path, payload)
+        try:
+            result = self.parse_response(await self.session.post(path, content=body, headers=headers))
+        except (httpx.HTTPError, ValueError, GatewayError) as exc:
+            await self.breaker.arecord_failure()
+            raise GatewayError(f'iyzico request failed: {exc}') from exc
+        await self.breaker.arecord_success()
+        return result
+
+    async def initialize_3ds(self, payload):
+        return await self.post(INITIALIZE_3DS_PATH, payload)
+
+    async def auth_3ds(self, payload):
+        return await self.post(AUTH_3DS_PATH, payload)
+
+    async def retrieve_payment(self, payload):
+        return await self.post(RETRIEVE_PAYMENT_PATH, payload)
+
+
+_client = None
+# An AsyncClient's connections belong to the loop that opened them. Under
+# ASGI there is one loop per worker; under WSGI every async view call runs in
+# its own loop, so there is no reuse there.
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_client():
+    global _client
+    if _client is None:
+        _client = IyzicoClient()
+    return _client
+
+
+def get_async_client():
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = AsyncIyzicoClient()
+    return client
@@ -0,0 +1,91 @@
+"""
+Benchmark gateway client modes against IYZICO_BASE_URL (normally the fake
+server from ``manage.py fake_iyzico --latency 100``).
+
+    python manage.py bench_payment_gateway --requests 200 --concurrency 20
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from apps.payments.gateway import AsyncIyzicoClient, IyzicoClient
+
+PAYLOAD = {'locale': 'tr', 'conversationId': 'bench', 'paymentId': '1'}
+
+
+class Command(BaseCommand):
+    help = 'Compare unpooled, pooled and async iyzico client throughput'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=200,
+            help='Requests per mode (default: 200)'
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=20,
+            help='Concurrent requests (threads for sync modes, tasks for async) (default: 20)'
+        )
+
+    def handle(self, *args, **options):
+        requests = options['requests']
+        concurrency = options['concurrency']
+
+        modes = [
+            # What the iyzipay SDK did: a new connection for every call
+            ('unpooled', lambda: self.run_sync(self.unpooled_call, requests, concurrency)),
+            ('pooled', lambda: self.run_sync(IyzicoClient().auth_3ds, requests, concurrency)),
+            ('async', lambda: asyncio.run(self.run_async(requests, concurrency))),
+        ]
+
+        self.stdout.write(f'{requests} requests per mode, concurrency {concurrency}')
+        for name, run in modes:
+            start = time.perf_counter()
+            timings = sorted(run())
+            elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f'{name:>9}: {requests / elapsed:7.1f} req/s, '
+                f'p50 {self.percentile(timings, 50):.1f} ms, p99 {self.percentile(timings, 99):.1f} ms'
+            )
+
+    @staticmethod
+    def unpooled_call(payload):
+        client = IyzicoClient()
+        try:
+            return client.auth_3ds(payload)
+        finally:
+            client.session.close()
+
+    def run_sync(self, call, requests, concurrency):
+        def timed(_):
+            start = time.perf_counter()
+            call(PAYLOAD)
+            return (time.perf_counter() - start) * 1000
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            return list(executor.map(timed, range(requests)))
+
+    async def run_async(self, requests, concurrency):
+        client = AsyncIyzicoClient()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def timed():
+            async with semaphore:
+                start = time.perf_counter()
+                await client.auth_3ds(PAYLOAD)
+                return (time.perf_counter() - start) * 1000
+
+        try:
+            return await asyncio.gather(*(timed() for _ in range(requests)))
+        finally:
+            await client.session.aclose()
+
+    @staticmethod
+    def percentile(sorted_values, pct):
+        index = min(len(sorted_values) - 1, round(pct / 100 * (len(sorted_values) - 1)))
+        return sorted_values[index]
@@ -0,0 +1,90 @@
+"""
+Move full payloads of existing rows into compressed archives.
+
+    python manage.py compact_payloads
+
+Rows are processed in primary key batches and reduced to their summary
+fields; archives expire PAYLOAD_RETENTION_DAYS after the row was created.
+Run VACUUM (or let autovacuum run) afterwards to reuse the freed space.
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction as db_transaction
+
+from apps.payments import payload_store
+from apps.payments.models import Transaction, WebhookLog
+from config.db import disable_statement_timeout
+
+
+class Command(BaseCommand):
+    help = 'Compress full gateway responses and webhook payloads of existing rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Rows per batch (default: 500)'
+        )
+
+    def handle(self, *args, **options):
+        disable_statement_timeout()
+        batch_size = options['batch_size']
+        for model, kind, compact in (
+            (Transaction, 'transaction', self.compact_transaction),
+            (WebhookLog, 'webhook', self.compact_webhook),
+        ):
+            rows, raw, stored = self.compact(model, kind, compact, batch_size)
+            self.stdout.write(self.style.SUCCESS(
+                f'✓ {model.__name__}: {rows} rows compacted, {raw / 1024:.0f} KiB of payloads '
+                f'stored as {stored / 1024:.0f} KiB'
+            ))
+
+    def compact(self, model, kind, compact, batch_size):
+        rows = raw = stored = 0
+        last_id = None
+        while True:
+            queryset = model.objects.order_by('id')
+            if last_id is not None:
+                queryset = queryset.filter(id__gt=last_id)
+            batch = list(queryset[:batch_size])
+            if not batch:
+                return rows, raw, stored
+            last_id = batch[-1].id
+
+            archives, changed, fields = [], [], None
+            for obj in batch:
+                result = compact(obj)
+                if result is None:
+                    continue
+                payload, fields = result
+                archives.append(payload_store.build(kind, obj.id, payload, created_at=obj.created_at))
+                changed.append(obj)
+            if not changed:
+                continue
+
+            with db_transaction.atomic():
+                # Keep archives written since the row was created (they are newer)
+                payload_store.archive_many(archives, replace=False)
+                model.objects.bulk_update(changed, fields)
+            rows += len(changed)
+            raw += sum(a.raw_size for a in archives)
+            stored += sum(len(a.data) for a in archives)
+
+    @staticmethod
+    def compact_transaction(transaction):
+        summary = payload_store.summarize('transaction', transaction.gateway_response)
+        if summary == transaction.gateway_response:
+            return None
+        payload = transaction.gateway_response
+        transaction.gateway_response = summary
+        return payload, ['gateway_response']
+
+    @staticmethod
+    def compact_webhook(log):
+        summary = payload_store.summarize('webhook', log.payload)
+        if summary == log.payload and not log.headers:
+            return None
+        payload = {'payload': log.payload, 'headers': log.headers}
+        log.payload = summary
+        log.headers = {}
+        return payload, ['payload', 'headers']
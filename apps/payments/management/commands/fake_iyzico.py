@@ -0,0 +1,125 @@
+"""
+Local fake of the iyzico 3DS endpoints for development, tests and benchmarks.
+
+    python manage.py fake_iyzico --port 8089 --latency 200 --failure-rate 0.1
+    IYZICO_BASE_URL=http://127.0.0.1:8089 python manage.py runserver
+
+Requests are checked against the IYZWSv2 signature computed from
+IYZICO_API_KEY/IYZICO_SECRET_KEY. ``--latency`` simulates a slow gateway and
+``--failure-rate`` the share of requests answered with HTTP 503.
+
+Payment lookups (``/payment/detail``) answer with a status derived from the
+conversation id, so reconciliation runs are reproducible: 60% SUCCESS,
+20% FAILURE, 10% INIT_THREEDS (abandoned) and 10% CALLBACK_THREEDS.
+"""
+import hashlib
+import json
+import random
+import time
+import uuid
+from base64 import b64encode
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.payments.gateway import AUTH_3DS_PATH, INITIALIZE_3DS_PATH, RETRIEVE_PAYMENT_PATH, sign
+
+
+class FakeIyzicoHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, like the real gateway
+    disable_nagle_algorithm = True
+    latency = 0
+    failure_rate = 0
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0))).decode('utf-8')
+        if self.latency:
+            time.sleep(self.latency)
+        if random.random() < self.failure_rate:
+            return self.respond(503, {'status': 'failure', 'errorMessage': 'Service unavailable'})
+
+        expected = sign(
+            self.path, body, settings.IYZICO_API_KEY, settings.IYZICO_SECRET_KEY,
+            self.headers.get('x-iyzi-rnd', '')
+        )
+        if self.headers.get('Authorization') != expected:
+            return self.respond(200, {'status': 'failure', 'errorCode': '1001', 'errorMessage': 'Invalid signature'})
+
+        request = json.loads(body or '{}')
+        if self.path == INITIALIZE_3DS_PATH:
+            self.respond(200, {
+                'status': 'success',
+                'conversationId': request.get('conversationId'),
+                'paymentId': str(uuid.uuid4().int)[:8],
+                'threeDSHtmlContent': b64encode(b'<html>fake 3DS</html>').decode('ascii'),
+            })
+        elif self.path == AUTH_3DS_PATH:
+            self.respond(200, {
+                'status': 'success',
+                'conversationId': request.get('conversationId'),
+                'paymentId': request.get('paymentId'),
+            })
+        elif self.path == RETRIEVE_PAYMENT_PATH:
+            conversation_id = request.get('paymentConversationId') or ''
+            self.respond(200, {
+                'status': 'success',
+                'conversationId': request.get('conversationId'),
+                'paymentId': request.get('paymentId') or str(uuid.uuid4().int)[:8],
+                'paymentStatus': self.payment_status(conversation_id),
+            })
+        else:
+            self.respond(404, {'status': 'failure', 'errorMessage': 'Not found'})
+
+    @staticmethod
+    def payment_status(conversation_id):
+        bucket = int(hashlib.md5(conversation_id.encode('utf-8')).hexdigest(), 16) % 10
+        if bucket < 6:
+            return 'SUCCESS'
+        if bucket < 8:
+            return 'FAILURE'
+        return 'INIT_THREEDS' if bucket == 8 else 'CALLBACK_THREEDS'
+
+    def respond(self, status_code, payload):
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = 'Run a fake iyzico server for local development and benchmarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--port', type=int, default=8089, help='Port to listen on (default: 8089)')
+        parser.add_argument(
+            '--latency',
+            type=int,
+            default=0,
+            help='Milliseconds to wait before answering (default: 0)'
+        )
+        parser.add_argument(
+            '--failure-rate',
+            type=float,
+            default=0,
+            help='Share of requests answered with HTTP 503, 0-1 (default: 0)'
+        )
+
+    def handle(self, *args, **options):
+        handler = type('ConfiguredHandler', (FakeIyzicoHandler,), {
+            'latency': options['latency'] / 1000,
+            'failure_rate': options['failure_rate'],
+        })
+        server = ThreadingHTTPServer(('127.0.0.1', options['port']), handler)
+        self.stdout.write(f"Fake iyzico listening on http://127.0.0.1:{options['port']}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,56 @@
+"""
+Process stored payment gateway webhooks.
+
+    python manage.py process_webhooks            # one batch, e.g. from cron
+    python manage.py process_webhooks --loop     # long-running worker (Procfile)
+
+Several workers can run side by side: events of one booking are locked by
+the worker handling them and always processed in arrival order.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.payments.webhooks import process_pending_webhooks
+
+
+class Command(BaseCommand):
+    help = 'Process pending payment gateway webhooks'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=100,
+            help='Events per batch (default: 100)'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling for new events'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=2,
+            help='Seconds to wait when there is nothing to process (default: 2)'
+        )
+
+    def handle(self, *args, **options):
+        if not options['loop']:
+            processed = process_pending_webhooks(limit=options['limit'])
+            self.stdout.write(self.style.SUCCESS(f'✓ {processed} webhook events processed'))
+            return
+
+        self.stdout.write(f"Processing webhooks every {options['interval']}s")
+        try:
+            while True:
+                close_old_connections()
+                processed = process_pending_webhooks(limit=options['limit'])
+                if processed:
+                    self.stdout.write(f'{processed} webhook events processed')
+                else:
+                    time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
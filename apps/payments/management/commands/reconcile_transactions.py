@@ -0,0 +1,115 @@
+"""
+Reconcile transactions stuck in pending/processing with the gateway.
+
+    # Every 15 minutes
+    */15 * * * * cd /path/to/project && source venv/bin/activate && python manage.py reconcile_transactions
+
+    # Against the local fake gateway
+    python manage.py fake_iyzico --latency 100
+    IYZICO_BASE_URL=http://127.0.0.1:8089 python manage.py reconcile_transactions --dry-run
+
+Prints throughput and the age distribution of the stuck backlog.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.payments.reconciliation import reconcile_transactions
+from config.db import disable_statement_timeout
+
+AGE_BUCKETS = (
+    ('< 1h', 3600),
+    ('1h-1d', 86400),
+    ('1d-7d', 7 * 86400),
+    ('> 7d', float('inf')),
+)
+
+
+class Command(BaseCommand):
+    help = 'Reconcile stuck pending/processing transactions with the payment gateway'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than',
+            type=int,
+            default=settings.PAYMENT_RECONCILE_AFTER_MINUTES,
+            help='Only transactions older than this many minutes (default: PAYMENT_RECONCILE_AFTER_MINUTES)'
+        )
+        parser.add_argument(
+            '--abandon-after',
+            type=int,
+            default=settings.PAYMENT_ABANDON_AFTER_MINUTES,
+            help='Fail unfinished 3DS payments older than this many minutes (default: PAYMENT_ABANDON_AFTER_MINUTES)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=200,
+            help='Transactions per batch (default: 200)'
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=10,
+            help='Concurrent gateway lookups (default: 10)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Look transactions up and report without changing them (3DS payments are not finished)'
+        )
+
+    def handle(self, *args, **options):
+        disable_statement_timeout()
+
+        def progress(report):
+            self.stdout.write(
+                f'  {report.scanned} scanned, {report.completed} completed, '
+                f'{report.failed} failed, {report.errors} errors ({report.throughput:.1f}/s)'
+            )
+
+        report = reconcile_transactions(
+            older_than=timedelta(minutes=options['older_than']),
+            abandon_after=timedelta(minutes=options['abandon_after']),
+            batch_size=options['batch_size'],
+            concurrency=options['concurrency'],
+            dry_run=options['dry_run'],
+            progress=progress,
+        )
+
+        prefix = '[dry run] ' if options['dry_run'] else ''
+        finish_3ds = f'{report.finish_3ds} would finish 3DS, ' if options['dry_run'] else ''
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ {prefix}{report.scanned} transactions in {report.elapsed:.1f}s '
+            f'({report.throughput:.1f}/s): {report.completed} completed, {report.failed} failed, '
+            f'{finish_3ds}{report.unchanged} unchanged, {report.errors} gateway errors'
+        ))
+        if report.ages:
+            self.write_age_distribution(sorted(report.ages))
+
+    def write_age_distribution(self, ages):
+        self.stdout.write('Backlog age:')
+        lower = 0
+        for label, upper in AGE_BUCKETS:
+            count = sum(1 for age in ages if lower <= age < upper)
+            self.stdout.write(f'  {label:>6}: {count}')
+            lower = upper
+        self.stdout.write(
+            f'  p50 {self.format_age(self.percentile(ages, 50))}, '
+            f'p90 {self.format_age(self.percentile(ages, 90))}, '
+            f'oldest {self.format_age(ages[-1])}'
+        )
+
+    @staticmethod
+    def percentile(sorted_values, pct):
+        index = min(len(sorted_values) - 1, round(pct / 100 * (len(sorted_values) - 1)))
+        return sorted_values[index]
+
+    @staticmethod
+    def format_age(seconds):
+        if seconds < 3600:
+            return f'{seconds / 60:.0f}m'
+        if seconds < 86400:
+            return f'{seconds / 3600:.1f}h'
+        return f'{seconds / 86400:.1f}d'
@@ -0,0 +1,44 @@
+"""
+Queue failed webhook events for processing again.
+
+    python manage.py replay_webhooks --gateway iyzico --since 2026-10-01
+    python manage.py replay_webhooks --id <uuid> --process
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime, parse_date
+
+from apps.payments.models import WebhookLog
+from apps.payments.webhooks import process_pending_webhooks, replay
+
+
+class Command(BaseCommand):
+    help = 'Replay unprocessed payment gateway webhooks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--gateway', type=str, help='Only events of this gateway')
+        parser.add_argument('--id', type=str, action='append', dest='ids', help='Event log id (repeatable)')
+        parser.add_argument('--since', type=str, help='Only events received after this date/datetime')
+        parser.add_argument(
+            '--process',
+            action='store_true',
+            help='Process the queued events right away instead of leaving them to the worker'
+        )
+
+    def handle(self, *args, **options):
+        queryset = WebhookLog.objects.all()
+        if options['gateway']:
+            queryset = queryset.filter(gateway=options['gateway'])
+        if options['ids']:
+            queryset = queryset.filter(id__in=options['ids'])
+        if options['since']:
+            since = parse_datetime(options['since']) or parse_date(options['since'])
+            if since is None:
+                raise CommandError(f"Invalid --since value: {options['since']}")
+            queryset = queryset.filter(created_at__gte=since)
+
+        count = replay(queryset)
+        self.stdout.write(self.style.SUCCESS(f'✓ {count} webhook events queued'))
+
+        if options['process'] and count:
+            processed = process_pending_webhooks(limit=count)
+            self.stdout.write(self.style.SUCCESS(f'✓ {processed} webhook events processed'))
@@ -0,0 +1,27 @@
+"""
+Delete archived gateway payloads past PAYLOAD_RETENTION_DAYS.
+
+    # Every day at 3 AM
+    0 3 * * * cd /path/to/project && source venv/bin/activate && python manage.py sweep_payloads
+"""
+from django.core.management.base import BaseCommand
+
+from apps.payments.payload_store import sweep
+from config.db import disable_statement_timeout
+
+
+class Command(BaseCommand):
+    help = 'Delete expired archived gateway payloads'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Archives deleted per statement (default: 1000)'
+        )
+
+    def handle(self, *args, **options):
+        disable_statement_timeout()
+        deleted = sweep(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'✓ {deleted} expired payloads deleted'))
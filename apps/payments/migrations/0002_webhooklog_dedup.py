@@ -0,0 +1,35 @@
+# Generated by Django 4.2.9 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("payments", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="webhooklog",
+            name="attempts",
+            field=models.PositiveSmallIntegerField(default=0, verbose_name="Deneme Sayısı"),
+        ),
+        migrations.AddField(
+            model_name="webhooklog",
+            name="event_id",
+            field=models.CharField(blank=True, max_length=255, null=True, verbose_name="Olay ID"),
+        ),
+        migrations.AddField(
+            model_name="webhooklog",
+            name="ordering_key",
+            field=models.CharField(blank=True, default="", max_length=100, verbose_name="Sıralama Anahtarı"),
+        ),
+        migrations.AddIndex(
+            model_name="webhooklog",
+            index=models.Index(fields=["processed", "created_at"], name="payments_we_process_2c41f2_idx"),
+        ),
+        migrations.AddConstraint(
+            model_name="webhooklog",
+            constraint=models.UniqueConstraint(fields=("gateway", "event_id"), name="unique_webhook_event"),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 4.2.9 on 2026-10-19 14:00
+
+from django.db import migrations, models
+import uuid
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("payments", "0002_webhooklog_dedup"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PayloadArchive",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4, editable=False, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[("transaction", "Gateway Response"), ("webhook", "Webhook")],
+                        max_length=20,
+                        verbose_name="Tür",
+                    ),
+                ),
+                ("object_id", models.UUIDField(verbose_name="Kayıt ID")),
+                (
+                    "codec",
+                    models.CharField(
+                        choices=[("gzip", "gzip"), ("zstd", "zstd")], max_length=10, verbose_name="Sıkıştırma"
+                    ),
+                ),
+                ("data", models.BinaryField(verbose_name="Veri")),
+                ("raw_size", models.PositiveIntegerField(verbose_name="Orijinal Boyut")),
+                ("created_at", models.DateTimeField(auto_now_add=True, verbose_name="Oluşturulma Tarihi")),
+                ("expires_at", models.DateTimeField(db_index=True, verbose_name="Silinme Tarihi")),
+            ],
+            options={
+                "verbose_name": "Arşivlenmiş İçerik",
+                "verbose_name_plural": "Arşivlenmiş İçerikler",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="payloadarchive",
+            constraint=models.UniqueConstraint(fields=("kind", "object_id"), name="unique_payload_archive"),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.9 on 2026-10-19 18:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("payments", "0003_payloadarchive"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="webhooklog",
+            name="next_attempt_at",
+            field=models.DateTimeField(blank=True, null=True, verbose_name="Sonraki Deneme"),
+        ),
+    ]
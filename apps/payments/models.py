@@ -122,11 +122,17 @@ class WebhookLog(models.Model):
     
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False, verbose_name="ID")
     gateway = models.CharField(max_length=20, verbose_name="Gateway")
+    # Provider event id; null only for rows received before deduplication
+    event_id = models.CharField(max_length=255, null=True, blank=True, verbose_name="Olay ID")
     event_type = models.CharField(max_length=100, verbose_name="Olay Tipi")
+    ordering_key = models.CharField(max_length=100, blank=True, default='', verbose_name="Sıralama Anahtarı")
     payload = models.JSONField(verbose_name="İçerik")
     headers = models.JSONField(default=dict, verbose_name="Header'lar")
     
     processed = models.BooleanField(default=False, verbose_name="İşlendi")
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="Deneme Sayısı")
+    # Set after a failed attempt; the worker skips the event until then
+    next_attempt_at = models.DateTimeField(null=True, blank=True, verbose_name="Sonraki Deneme")
     error_message = models.TextField(blank=True, verbose_name="Hata Mesajı")
     
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Oluşturulma Tarihi")
@@ -139,7 +145,46 @@ class WebhookLog(models.Model):
         indexes = [
             models.Index(fields=['gateway', 'processed']),
             models.Index(fields=['event_type']),
+            models.Index(fields=['processed', 'created_at']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['gateway', 'event_id'], name='unique_webhook_event'),
         ]
     
     def __str__(self):
         return f"{self.gateway} - {self.event_type}"
+
+
+class PayloadArchive(models.Model):
+    """Compressed full gateway payloads; the source rows keep only a summary."""
+    
+    KIND_CHOICES = [
+        ('transaction', 'Gateway Response'),
+        ('webhook', 'Webhook'),
+    ]
+    
+    CODEC_CHOICES = [
+        ('gzip', 'gzip'),
+        ('zstd', 'zstd'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False, verbose_name="ID")
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, verbose_name="Tür")
+    # Transaction or WebhookLog id
+    object_id = models.UUIDField(verbose_name="Kayıt ID")
+    codec = models.CharField(max_length=10, choices=CODEC_CHOICES, verbose_name="Sıkıştırma")
+    data = models.BinaryField(verbose_name="Veri")
+    raw_size = models.PositiveIntegerField(verbose_name="Orijinal Boyut")
+    
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Oluşturulma Tarihi")
+    expires_at = models.DateTimeField(db_index=True, verbose_name="Silinme Tarihi")
+    
+    class Meta:
+        verbose_name = 'Arşivlenmiş İçerik'
+        verbose_name_plural = 'Arşivlenmiş İçerikler'
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='unique_payload_archive'),
+        ]
+    
+    def __str__(self):
+        return f"{self.kind} - {self.object_id}"
@@ -0,0 +1,122 @@
+"""
+Compressed storage for full gateway payloads.
+
+``Transaction.gateway_response`` and ``WebhookLog.payload`` keep only the
+summary fields below; the full response (including the 3DS HTML) and the
+webhook request headers are stored compressed in ``PayloadArchive``, one row
+per transaction/webhook, and deleted after ``PAYLOAD_RETENTION_DAYS`` by
+``manage.py sweep_payloads``. The admin decompresses them on demand.
+
+The codec is ``PAYLOAD_CODEC``: ``gzip`` (default) or ``zstd``, which needs
+the ``zstandard`` package. Archives remember their codec, so switching does
+not affect rows already written.
+"""
+import gzip
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from .models import PayloadArchive
+
+SUMMARY_FIELDS = {
+    'transaction': (
+        'status', 'paymentStatus', 'paymentId', 'conversationId', 'errorCode', 'errorMessage',
+        'errorGroup', 'fraudStatus', 'mdStatus', 'price', 'paidPrice', 'currency',
+        'cardAssociation', 'cardFamily', 'lastFourDigits', 'systemTime',
+    ),
+    'webhook': (
+        'iyziEventType', 'iyziEventTime', 'iyziReferenceCode', 'paymentId', 'paymentConversationId',
+        'conversationId', 'status', 'event_type', 'event_id', 'id',
+    ),
+}
+
+
+def summarize(kind, payload):
+    """Keep only the summary fields of a payload."""
+    return {key: payload[key] for key in SUMMARY_FIELDS[kind] if key in payload}
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImproperlyConfigured('PAYLOAD_CODEC=zstd requires the zstandard package')
+    return zstandard
+
+
+def compress(payload, codec=None):
+    """Returns: (codec, compressed bytes, uncompressed size)"""
+    codec = codec or settings.PAYLOAD_CODEC
+    raw = json.dumps(payload, cls=DjangoJSONEncoder, separators=(',', ':')).encode('utf-8')
+    if codec == 'zstd':
+        data = _zstandard().ZstdCompressor(level=3).compress(raw)
+    elif codec == 'gzip':
+        data = gzip.compress(raw, compresslevel=6)
+    else:
+        raise ImproperlyConfigured(f'Unknown PAYLOAD_CODEC: {codec}')
+    return codec, data, len(raw)
+
+
+def decompress(codec, data):
+    data = bytes(data)
+    if codec == 'zstd':
+        raw = _zstandard().ZstdDecompressor().decompress(data)
+    else:
+        raw = gzip.decompress(data)
+    return json.loads(raw)
+
+
+def build(kind, object_id, payload, created_at=None):
+    """Unsaved archive row for ``payload``, expiring ``PAYLOAD_RETENTION_DAYS`` after ``created_at``."""
+    codec, data, raw_size = compress(payload)
+    return PayloadArchive(
+        kind=kind,
+        object_id=object_id,
+        codec=codec,
+        data=data,
+        raw_size=raw_size,
+        expires_at=(created_at or timezone.now()) + timedelta(days=settings.PAYLOAD_RETENTION_DAYS),
+    )
+
+
+def archive(kind, object_id, payload):
+    """Store the full payload of one record (replacing an earlier one)."""
+    archive_many([build(kind, object_id, payload)])
+
+
+def archive_many(archives, replace=True):
+    """Insert archives in one query; with ``replace=False`` existing ones are kept."""
+    if replace:
+        PayloadArchive.objects.bulk_create(
+            archives,
+            update_conflicts=True,
+            unique_fields=['kind', 'object_id'],
+            update_fields=['codec', 'data', 'raw_size', 'expires_at'],
+        )
+    else:
+        PayloadArchive.objects.bulk_create(archives, ignore_conflicts=True)
+
+
+def load(kind, object_id):
+    """Full payload of a record, or None when it was never archived or has expired."""
+    row = PayloadArchive.objects.filter(kind=kind, object_id=object_id).values_list('codec', 'data').first()
+    return decompress(*row) if row else None
+
+
+def sweep(batch_size=1000):
+    """
+    Delete expired archives in batches, keeping each DELETE short.
+    Returns: number of archives deleted
+    """
+    deleted = 0
+    while True:
+        ids = list(
+            PayloadArchive.objects.filter(expires_at__lt=timezone.now()).values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return deleted
+        deleted += PayloadArchive.objects.filter(id__in=ids).delete()[0]
@@ -0,0 +1,202 @@
+"""
+Reconciliation of transactions whose 3DS callback never arrived.
+
+Stuck transactions (``pending``/``processing`` older than a cutoff) are read
+in keyset-paginated batches on ``(created_at, id)``, which the
+``(status, created_at)`` index serves without OFFSET scans. Each batch is
+looked up at the gateway with bounded concurrency and the resulting
+transitions are applied with one UPDATE per outcome; paid bookings are
+confirmed through ``confirm_booking`` like after a 3DS callback.
+"""
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from django.db import transaction as db_transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.bookings.models import Booking
+from . import payload_store
+from .gateway import GatewayError, get_client
+from .models import Transaction
+from .services import OPEN_STATUSES, confirm_booking
+
+logger = logging.getLogger(__name__)
+
+STUCK_STATUSES = OPEN_STATUSES
+
+
+@dataclass
+class ReconcileReport:
+    scanned: int = 0
+    completed: int = 0
+    failed: int = 0
+    unchanged: int = 0
+    finish_3ds: int = 0  # dry run: 3DS confirmed by the bank, auth not sent
+    errors: int = 0
+    elapsed: float = 0
+    ages: list = field(default_factory=list)  # seconds, one per scanned transaction
+
+    @property
+    def throughput(self):
+        return self.scanned / self.elapsed if self.elapsed else 0
+
+
+def stuck_transactions(older_than, batch_size):
+    """Yield batches of stuck transactions, oldest first, using keyset pagination."""
+    queryset = Transaction.objects.filter(
+        status__in=STUCK_STATUSES, created_at__lt=timezone.now() - older_than
+    ).order_by('created_at', 'id')
+    last = None
+    while True:
+        page = queryset
+        if last is not None:
+            page = page.filter(
+                Q(created_at__gt=last.created_at) | Q(created_at=last.created_at, id__gt=last.id)
+            )
+        batch = list(page[:batch_size])
+        if not batch:
+            return
+        yield batch
+        last = batch[-1]
+
+
+def lookup(transaction, dry_run=False):
+    """
+    Ask the gateway for the final state of a transaction.
+
+    A payment whose 3DS the bank confirmed is finished here with an auth
+    call, which captures it; with ``dry_run`` it is only looked up and the
+    ``CALLBACK_THREEDS`` response is returned as is.
+    Returns: gateway response dict
+    """
+    client = get_client()
+    result = client.retrieve_payment({
+        'locale': 'tr',
+        'conversationId': str(transaction.id),
+        'paymentConversationId': str(transaction.id),
+        'paymentId': transaction.gateway_transaction_id,
+    })
+    if result.get('paymentStatus') == 'CALLBACK_THREEDS' and not dry_run:
+        # The bank confirmed 3DS but our callback never ran: finish it here
+        auth = client.auth_3ds({
+            'locale': 'tr',
+            'conversationId': str(transaction.id),
+            'paymentId': result.get('paymentId') or transaction.gateway_transaction_id,
+        })
+        # A declined auth is a final answer too
+        result = {
+            **auth,
+            'status': 'success',
+            'paymentStatus': 'SUCCESS' if auth.get('status') == 'success' else 'FAILURE',
+        }
+    return result
+
+
+def outcome(transaction, result, abandon_before):
+    """Map a gateway response to ``'completed'``, ``'failed'`` or ``None`` (leave as is)."""
+    abandoned = transaction.created_at < abandon_before
+    if result.get('status') != 'success':
+        # Only trust "not found" for payments the gateway never gave an id,
+        # not for errors such as a bad signature
+        return 'failed' if abandoned and not transaction.gateway_transaction_id else None
+    payment_status = result.get('paymentStatus')
+    if payment_status == 'SUCCESS':
+        return 'completed'
+    if payment_status == 'FAILURE':
+        return 'failed'
+    return 'failed' if abandoned else None  # 3DS page never completed
+
+
+def apply_transitions(completed, failed, responses):
+    """Write the outcomes of one batch: one UPDATE per outcome, then confirm the paid bookings."""
+    now = timezone.now()
+    with db_transaction.atomic():
+        # Skip rows a late callback is completing right now
+        ids = [t.id for t in completed + failed]
+        open_ids = set(
+            Transaction.objects.select_for_update(skip_locked=True)
+            .filter(id__in=ids, status__in=STUCK_STATUSES)
+            .values_list('id', flat=True)
+        )
+        completed = [t for t in completed if t.id in open_ids]
+        failed = [t for t in failed if t.id in open_ids]
+
+        for t in completed:
+            t.status = 'completed'
+            t.completed_at = now
+            t.gateway_transaction_id = t.gateway_response.get('paymentId') or t.gateway_transaction_id
+        for t in failed:
+            t.status = 'failed'
+            t.error_message = t.gateway_response.get('errorMessage') or 'Ödeme tamamlanmadı (mutabakat)'
+
+        Transaction.objects.bulk_update(
+            completed, ['status', 'completed_at', 'gateway_transaction_id', 'gateway_response']
+        )
+        Transaction.objects.bulk_update(failed, ['status', 'error_message', 'gateway_response'])
+        payload_store.archive_many([
+            payload_store.build('transaction', t.id, responses[t.id]) for t in completed + failed
+        ])
+        # One by one through save(): the customer is notified as after a callback
+        for booking in Booking.objects.select_for_update().filter(
+            id__in={t.booking_id for t in completed}, status='pending'
+        ):
+            confirm_booking(booking, notes='Ödeme alındı (mutabakat)')
+    return len(completed), len(failed)
+
+
+def reconcile_transactions(older_than=timedelta(minutes=15), abandon_after=timedelta(hours=1),
+                           batch_size=200, concurrency=10, dry_run=False, progress=None):
+    """
+    Reconcile stuck transactions with the gateway.
+    Returns: ReconcileReport
+    """
+    report = ReconcileReport()
+    start = time.perf_counter()
+    now = timezone.now()
+    abandon_before = now - abandon_after
+
+    def safe_lookup(transaction):
+        try:
+            return lookup(transaction, dry_run=dry_run)
+        except GatewayError as e:
+            logger.warning('Reconciliation lookup for %s failed: %s', transaction.id, e)
+            return None
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for batch in stuck_transactions(older_than, batch_size):
+            report.scanned += len(batch)
+            report.ages.extend((now - t.created_at).total_seconds() for t in batch)
+
+            completed, failed, responses = [], [], {}
+            for transaction, result in zip(batch, executor.map(safe_lookup, batch)):
+                if result is None:
+                    report.errors += 1
+                    continue
+                if result.get('paymentStatus') == 'CALLBACK_THREEDS':
+                    report.finish_3ds += 1  # dry run only
+                    continue
+                decision = outcome(transaction, result, abandon_before)
+                if decision is None:
+                    report.unchanged += 1
+                    continue
+                transaction.gateway_response = payload_store.summarize('transaction', result)
+                responses[transaction.id] = result
+                (completed if decision == 'completed' else failed).append(transaction)
+
+            if dry_run:
+                done = (len(completed), len(failed))
+            else:
+                done = apply_transitions(completed, failed, responses)
+            report.completed += done[0]
+            report.failed += done[1]
+            report.unchanged += len(completed) + len(failed) - sum(done)
+            report.elapsed = time.perf_counter() - start
+            if progress:
+                progress(report)
+
+    report.elapsed = time.perf_counter() - start
+    return report
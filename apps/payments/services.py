@@ -1,26 +1,72 @@
-import iyzipay
+from asgiref.sync import sync_to_async
 from django.conf import settings
+from django.db import transaction as db_transaction
 from django.utils import timezone
+from . import payload_store
+from .gateway import get_async_client, get_client
 from .models import Transaction
 from apps.accounts.models import PaymentMethod
+from apps.bookings.models import BookingStatusHistory
 from decimal import Decimal
 
+# Transactions still waiting for their 3DS result
+OPEN_STATUSES = ('pending', 'processing')
+
+
+def confirm_booking(booking, notes=''):
+    """
+    Confirm a paid booking.
+
+    Goes through ``save()`` so the status change signals run (customer
+    notification and push, unread counter, stream event), and records the
+    change in the booking's status history.
+    """
+    old_status = booking.status
+    booking.status = 'confirmed'
+    booking.confirmed_at = timezone.now()
+    booking.save()
+    BookingStatusHistory.objects.create(
+        booking=booking, old_status=old_status, new_status='confirmed', notes=notes
+    )
+
 
 class IyzicoPaymentService:
-    """iyzico payment gateway integration."""
-    
-    def __init__(self):
-        self.options = {
-            'api_key': settings.IYZICO_API_KEY,
-            'secret_key': settings.IYZICO_SECRET_KEY,
-            'base_url': settings.IYZICO_BASE_URL
-        }
+    """
+    iyzico payment gateway integration.
+
+    Each operation has a sync and an async (``a``-prefixed) entry point that
+    share the database steps and differ only in the gateway client used.
+    """
     
     def process_payment(self, booking, user, payment_data, ip_address, user_agent):
         """
         Process payment for a booking.
         Returns: dict with success status and transaction details
         """
+        transaction, payment_request = self._prepare_payment(
+            booking, user, payment_data, ip_address, user_agent
+        )
+        try:
+            payment = get_client().initialize_3ds(payment_request)
+        except Exception as e:
+            self._fail_transaction(transaction, str(e))
+            raise
+        return self._finish_payment(transaction, user, payment_data, payment)
+    
+    async def aprocess_payment(self, booking, user, payment_data, ip_address, user_agent):
+        """Async variant of ``process_payment``."""
+        transaction, payment_request = await sync_to_async(self._prepare_payment)(
+            booking, user, payment_data, ip_address, user_agent
+        )
+        try:
+            payment = await get_async_client().initialize_3ds(payment_request)
+        except Exception as e:
+            await sync_to_async(self._fail_transaction)(transaction, str(e))
+            raise
+        return await sync_to_async(self._finish_payment)(transaction, user, payment_data, payment)
+    
+    def _prepare_payment(self, booking, user, payment_data, ip_address, user_agent):
+        """Create the transaction record and build the 3DS initialize request."""
         # Create transaction record
         transaction = Transaction.objects.create(
             booking=booking,
@@ -34,159 +80,188 @@ class IyzicoPaymentService:
         )
         
         try:
-            # Prepare payment request
-            payment_request = {
-                'locale': 'tr',
-                'conversationId': str(transaction.id),
-                'price': str(booking.subtotal),
-                'paidPrice': str(booking.total),
-                'currency': iyzipay.Currency.TRY,
-                'installment': '1',
-                'basketId': str(booking.id),
-                'paymentChannel': iyzipay.PaymentChannel.WEB,
-                'paymentGroup': iyzipay.PaymentGroup.PRODUCT,
-                'callbackUrl': f"{settings.FRONTEND_URL}/payment/callback",
-            }
-            
-            # Buyer information
-            payment_request['buyer'] = {
-                'id': str(user.id),
-                'name': user.first_name,
-                'surname': user.last_name,
-                'email': user.email,
-                'identityNumber': '11111111111',  # Required by iyzico
-                'registrationAddress': booking.pickup_address.full_address,
-                'city': booking.pickup_address.district.name_en,
-                'country': 'Turkey',
-                'ip': ip_address
+            payment_request = self._build_payment_request(transaction, booking, user, payment_data, ip_address)
+        except Exception as e:
+            self._fail_transaction(transaction, str(e))
+            raise
+        return transaction, payment_request
+    
+    def _build_payment_request(self, transaction, booking, user, payment_data, ip_address):
+        # Prepare payment request
+        payment_request = {
+            'locale': 'tr',
+            'conversationId': str(transaction.id),
+            'price': str(booking.subtotal),
+            'paidPrice': str(booking.total),
+            'currency': 'TRY',
+            'installment': '1',
+            'basketId': str(booking.id),
+            'paymentChannel': 'WEB',
+            'paymentGroup': 'PRODUCT',
+            'callbackUrl': f"{settings.FRONTEND_URL}/payment/callback",
+        }
+        
+        # Buyer information
+        payment_request['buyer'] = {
+            'id': str(user.id),
+            'name': user.first_name,
+            'surname': user.last_name,
+            'email': user.email,
+            'identityNumber': '11111111111',  # Required by iyzico
+            'registrationAddress': booking.pickup_address.full_address,
+            'city': booking.pickup_address.district.name,
+            'country': 'Turkey',
+            'ip': ip_address
+        }
+        
+        # Shipping address
+        payment_request['shippingAddress'] = {
+            'contactName': user.get_full_name(),
+            'city': booking.pickup_address.district.name,
+            'country': 'Turkey',
+            'address': booking.pickup_address.full_address,
+        }
+        
+        # Billing address (same as shipping)
+        payment_request['billingAddress'] = payment_request['shippingAddress'].copy()
+        
+        # Basket items
+        basket_items = []
+        for item in booking.items.select_related('subtype__category'):
+            basket_items.append({
+                'id': str(item.id),
+                'name': item.subtype.name,
+                'category1': item.subtype.category.name,
+                'itemType': 'PHYSICAL',
+                'price': str(item.line_total)
+            })
+        
+        payment_request['basketItems'] = basket_items
+        
+        # Payment card
+        if payment_data.get('payment_method_id'):
+            # Use saved card
+            saved_method = PaymentMethod.objects.get(
+                id=payment_data['payment_method_id'],
+                user=user,
+                is_active=True
+            )
+            payment_request['paymentCard'] = {
+                'cardToken': saved_method.card_token,
             }
-            
-            # Shipping address
-            payment_request['shippingAddress'] = {
-                'contactName': user.get_full_name(),
-                'city': booking.pickup_address.district.name_en,
-                'country': 'Turkey',
-                'address': booking.pickup_address.full_address,
+        else:
+            # New card
+            payment_request['paymentCard'] = {
+                'cardHolderName': payment_data['card_holder'],
+                'cardNumber': payment_data['card_number'],
+                'expireMonth': payment_data['expiry_month'],
+                'expireYear': payment_data['expiry_year'],
+                'cvc': payment_data['cvv'],
             }
+        
+        return payment_request
+    
+    def _finish_payment(self, transaction, user, payment_data, payment):
+        """Store the 3DS initialize result on the transaction."""
+        if payment.get('status') == 'success':
+            # Store gateway transaction ID
+            transaction.gateway_transaction_id = payment.get('paymentId', '')
+            transaction.gateway_response = payload_store.summarize('transaction', payment)
+            transaction.save()
+            payload_store.archive('transaction', transaction.id, payment)
             
-            # Billing address (same as shipping)
-            payment_request['billingAddress'] = payment_request['shippingAddress'].copy()
-            
-            # Basket items
-            basket_items = []
-            for item in booking.items.all():
-                basket_items.append({
-                    'id': str(item.id),
-                    'name': item.subtype.name_en,
-                    'category1': item.subtype.category.name_en,
-                    'itemType': iyzipay.BasketItemType.PHYSICAL,
-                    'price': str(item.line_total)
-                })
-            
-            payment_request['basketItems'] = basket_items
-            
-            # Payment card
-            if payment_data.get('payment_method_id'):
-                # Use saved card
-                saved_method = PaymentMethod.objects.get(
-                    id=payment_data['payment_method_id'],
-                    user=user,
-                    is_active=True
-                )
-                payment_request['paymentCard'] = {
-                    'cardToken': saved_method.card_token,
-                }
-            else:
-                # New card
-                payment_request['paymentCard'] = {
-                    'cardHolderName': payment_data['card_holder'],
-                    'cardNumber': payment_data['card_number'],
-                    'expireMonth': payment_data['expiry_month'],
-                    'expireYear': payment_data['expiry_year'],
-                    'cvc': payment_data['cvv'],
-                }
-            
-            # Initialize 3D Secure payment
-            payment = iyzipay.ThreedsInitialize().create(payment_request, self.options)
+            # If saving card, tokenize it
+            if payment_data.get('save_card') and not payment_data.get('payment_method_id') and payment.get('cardToken'):
+                self._save_card_token(user, payment_data, payment['cardToken'])
             
-            if payment.status == 'success':
-                # Store gateway transaction ID
-                transaction.gateway_transaction_id = payment.payment_id
-                transaction.gateway_response = payment.read().decode('utf-8')
-                transaction.save()
-                
-                # If saving card, tokenize it
-                if payment_data.get('save_card') and not payment_data.get('payment_method_id'):
-                    self._save_card_token(user, payment_data, payment.card_token)
-                
-                return {
-                    'success': True,
-                    'transaction_id': str(transaction.id),
-                    'three_ds_url': payment.threeds_html_content  # iyzico returns HTML for 3D Secure
-                }
-            else:
-                transaction.status = 'failed'
-                transaction.error_message = payment.error_message
-                transaction.save()
-                
-                return {
-                    'success': False,
-                    'error': payment.error_message
-                }
-                
-        except Exception as e:
-            transaction.status = 'failed'
-            transaction.error_message = str(e)
-            transaction.save()
-            raise
+            return {
+                'success': True,
+                'transaction_id': str(transaction.id),
+                'three_ds_url': payment.get('threeDSHtmlContent')  # iyzico returns HTML for 3D Secure
+            }
+        
+        self._fail_transaction(transaction, payment.get('errorMessage', ''))
+        return {
+            'success': False,
+            'error': payment.get('errorMessage')
+        }
+    
+    def _fail_transaction(self, transaction, error_message):
+        transaction.status = 'failed'
+        transaction.error_message = error_message
+        transaction.save()
     
     def handle_3ds_callback(self, callback_data):
         """Handle 3D Secure callback."""
         # Verify payment result
-        conversation_id = callback_data.get('conversationId')
+        transaction = self._get_callback_transaction(callback_data)
+        if transaction is None:
+            return {
+                'success': False,
+                'error': 'Transaction not found'
+            }
         
-        try:
-            transaction = Transaction.objects.get(id=conversation_id)
-            
-            # Retrieve payment result
-            request = {
-                'locale': 'tr',
-                'conversationId': conversation_id,
-                'paymentId': callback_data.get('paymentId')
+        # Retrieve payment result
+        payment_result = get_client().auth_3ds(self._auth_request(callback_data))
+        return self._complete_3ds(transaction, payment_result)
+    
+    async def ahandle_3ds_callback(self, callback_data):
+        """Async variant of ``handle_3ds_callback``."""
+        transaction = await sync_to_async(self._get_callback_transaction)(callback_data)
+        if transaction is None:
+            return {
+                'success': False,
+                'error': 'Transaction not found'
             }
+        
+        payment_result = await get_async_client().auth_3ds(self._auth_request(callback_data))
+        return await sync_to_async(self._complete_3ds)(transaction, payment_result)
+    
+    def _get_callback_transaction(self, callback_data):
+        try:
+            return Transaction.objects.select_related('booking').get(id=callback_data.get('conversationId'))
+        except Transaction.DoesNotExist:
+            return None
+    
+    def _auth_request(self, callback_data):
+        return {
+            'locale': 'tr',
+            'conversationId': callback_data.get('conversationId'),
+            'paymentId': callback_data.get('paymentId')
+        }
+    
+    def _complete_3ds(self, transaction, payment_result):
+        """Apply the 3DS auth result to the transaction and its booking."""
+        with db_transaction.atomic():
+            transaction = (
+                Transaction.objects.select_for_update(of=('self',)).select_related('booking')
+                .get(pk=transaction.pk)
+            )
+            if transaction.status not in OPEN_STATUSES:
+                # Already finished by reconciliation, whose auth made ours a
+                # rejected duplicate: report the stored outcome instead
+                if transaction.status == 'completed':
+                    return {'success': True, 'booking_id': str(transaction.booking_id)}
+                return {'success': False, 'error': transaction.error_message}
             
-            payment_result = iyzipay.ThreedsPayment().retrieve(request, self.options)
-            
-            if payment_result.status == 'success':
+            if payment_result.get('status') == 'success':
                 transaction.status = 'completed'
                 transaction.completed_at = timezone.now()
                 transaction.save()
                 
-                # Update booking status
                 booking = transaction.booking
-                booking.status = 'confirmed'
-                booking.confirmed_at = timezone.now()
-                booking.save()
+                confirm_booking(booking, notes='Ödeme alındı')
                 
                 return {
                     'success': True,
                     'booking_id': str(booking.id)
                 }
-            else:
-                transaction.status = 'failed'
-                transaction.error_message = payment_result.error_message
-                transaction.save()
-                
-                return {
-                    'success': False,
-                    'error': payment_result.error_message
-                }
-                
-        except Transaction.DoesNotExist:
-            return {
-                'success': False,
-                'error': 'Transaction not found'
-            }
+            
+            self._fail_transaction(transaction, payment_result.get('errorMessage', ''))
+        return {
+            'success': False,
+            'error': payment_result.get('errorMessage')
+        }
     
     def handle_webhook(self, webhook_data, webhook_log):
         """Handle iyzico webhooks."""
@@ -0,0 +1,8 @@
+"""Background tasks for payments."""
+from .payload_store import sweep
+
+
+def sweep_payloads():
+    """Delete archived gateway payloads past PAYLOAD_RETENTION_DAYS."""
+    deleted = sweep()
+    return f"Deleted {deleted} expired payloads"
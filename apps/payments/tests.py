@@ -0,0 +1,530 @@
+import base64
+import hashlib
+import hmac
+import io
+import json
+import threading
+import time
+import uuid
+from datetime import date, timedelta
+from decimal import Decimal
+from http.server import ThreadingHTTPServer
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import AsyncClient
+from django.utils import timezone
+from freezegun import freeze_time
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.payments.gateway import (
+    AUTH_3DS_PATH,
+    INITIALIZE_3DS_PATH,
+    RETRIEVE_PAYMENT_PATH,
+    AsyncIyzicoClient,
+    GatewayError,
+    IyzicoClient,
+    sign,
+)
+from apps.accounts.models import Address, User
+from apps.bookings.models import Booking, BookingStatusHistory
+from apps.notifications.models import UserNotification
+from apps.payments import payload_store, reconciliation, webhooks
+from apps.payments.management.commands.fake_iyzico import FakeIyzicoHandler
+from apps.payments.models import PayloadArchive, Transaction, WebhookLog
+from apps.payments.services import IyzicoPaymentService
+from apps.services.models import District
+
+PAYMENT = {'locale': 'tr', 'conversationId': 'c-1', 'paymentConversationId': 'c-1', 'paymentId': '123'}
+
+
+class CountingHandler(FakeIyzicoHandler):
+    requests = 0
+    paths = ()
+
+    def do_POST(self):
+        type(self).requests += 1
+        type(self).paths += (self.path,)
+        super().do_POST()
+
+    def handle_one_request(self):
+        try:
+            super().handle_one_request()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The client gave up waiting (timeout tests)
+
+
+@pytest.fixture
+def fake_iyzico(settings):
+    """The fake gateway on a free port; tune it through the returned handler class."""
+    handler = type('Handler', (CountingHandler,), {'requests': 0, 'paths': (), 'latency': 0, 'failure_rate': 0})
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    settings.IYZICO_BASE_URL = f'http://127.0.0.1:{server.server_port}'
+    settings.IYZICO_CIRCUIT_FAILURES = 2
+    settings.IYZICO_CIRCUIT_RESET_TIMEOUT = 1
+    cache.clear()
+    yield handler
+    server.shutdown()
+    server.server_close()
+    cache.clear()
+
+
+def test_sign():
+    header = sign('/payment/detail', '{"a": 1}', 'api-key', 'secret', 'rnd')
+
+    scheme, _, encoded = header.partition(' ')
+    assert scheme == 'IYZWSv2'
+    signature = hmac.new(b'secret', b'rnd/payment/detail{"a": 1}', hashlib.sha256).hexdigest()
+    assert base64.b64decode(encoded).decode() == f'apiKey:api-key&randomKey:rnd&signature:{signature}'
+
+
+def test_signed_request_is_accepted(fake_iyzico):
+    client = IyzicoClient()
+
+    body, headers = client.build_request(RETRIEVE_PAYMENT_PATH, PAYMENT)
+    result = client.retrieve_payment(PAYMENT)
+
+    assert json.loads(body) == PAYMENT
+    assert headers['x-iyzi-rnd'] != client.build_request(RETRIEVE_PAYMENT_PATH, PAYMENT)[1]['x-iyzi-rnd']
+    assert result['status'] == 'success'
+    assert result['paymentId'] == '123'
+
+
+def test_signature_covers_the_body(fake_iyzico):
+    client = IyzicoClient()
+    body, headers = client.build_request(RETRIEVE_PAYMENT_PATH, PAYMENT)
+
+    response = client.session.post(RETRIEVE_PAYMENT_PATH, content=body.replace('123', '124'), headers=headers)
+
+    assert client.parse_response(response)['errorMessage'] == 'Invalid signature'
+
+
+def test_async_client_signs_requests(fake_iyzico):
+    async def retrieve():
+        client = AsyncIyzicoClient()
+        try:
+            return await client.retrieve_payment(PAYMENT)
+        finally:
+            await client.session.aclose()
+
+    assert async_to_sync(retrieve)()['status'] == 'success'
+
+
+def test_read_timeout(fake_iyzico, settings):
+    fake_iyzico.latency = 0.5
+    settings.IYZICO_READ_TIMEOUT = 0.1
+    client = IyzicoClient()
+
+    start = time.monotonic()
+    with pytest.raises(GatewayError, match='timed out'):
+        client.retrieve_payment(PAYMENT)
+
+    assert time.monotonic() - start < 0.5
+    assert cache.get(client.breaker.failures_key) == 1
+
+
+def test_unreachable_gateway(settings):
+    cache.clear()
+    settings.IYZICO_BASE_URL = 'http://127.0.0.1:9'
+    settings.IYZICO_CONNECT_TIMEOUT = 0.1
+    settings.IYZICO_READ_TIMEOUT = 2
+    client = IyzicoClient()
+
+    assert client.session.timeout == httpx.Timeout(2, connect=0.1)
+    with pytest.raises(GatewayError, match='iyzico request failed'):
+        client.retrieve_payment(PAYMENT)
+
+
+def test_circuit_opens_after_consecutive_failures(fake_iyzico):
+    fake_iyzico.failure_rate = 1
+    client = IyzicoClient()
+
+    for _ in range(2):
+        with pytest.raises(GatewayError, match='HTTP 503'):
+            client.retrieve_payment(PAYMENT)
+    with pytest.raises(GatewayError, match='unavailable'):
+        client.retrieve_payment(PAYMENT)
+
+    # Open: failed fast without calling the gateway
+    assert fake_iyzico.requests == 2
+
+
+def test_half_open_failure_reopens_circuit(fake_iyzico):
+    fake_iyzico.failure_rate = 1
+    client = IyzicoClient()
+    for _ in range(2):
+        with pytest.raises(GatewayError):
+            client.retrieve_payment(PAYMENT)
+
+    time.sleep(1.1)
+    # Half-open: one call goes through, its failure reopens the circuit at once
+    with pytest.raises(GatewayError, match='HTTP 503'):
+        client.retrieve_payment(PAYMENT)
+    with pytest.raises(GatewayError, match='unavailable'):
+        client.retrieve_payment(PAYMENT)
+    assert fake_iyzico.requests == 3
+
+
+def test_half_open_success_closes_circuit(fake_iyzico):
+    fake_iyzico.failure_rate = 1
+    client = IyzicoClient()
+    for _ in range(2):
+        with pytest.raises(GatewayError):
+            client.retrieve_payment(PAYMENT)
+
+    time.sleep(1.1)
+    fake_iyzico.failure_rate = 0
+    assert client.retrieve_payment(PAYMENT)['status'] == 'success'
+
+    # Closed with the failure count reset: one new failure does not open it
+    fake_iyzico.failure_rate = 1
+    with pytest.raises(GatewayError, match='HTTP 503'):
+        client.retrieve_payment(PAYMENT)
+    fake_iyzico.failure_rate = 0
+    assert client.retrieve_payment(PAYMENT)['status'] == 'success'
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('body', ['[]', '"x"', '1', 'null'])
+def test_webhook_rejects_non_object_payload(client, body):
+    response = client.post('/api/payments/webhook/iyzico/', body, content_type='application/json')
+
+    assert response.status_code == 400
+    assert response.json()['status'] == 'error'
+    assert not WebhookLog.objects.exists()
+
+
+@pytest.mark.django_db
+def test_webhook_is_stored_once(client):
+    payload = {'iyziReferenceCode': 'ref-1', 'iyziEventType': 'CHECKOUT_FORM_AUTH', 'paymentConversationId': 'c-1'}
+
+    for _ in range(2):
+        response = client.post('/api/payments/webhook/iyzico/', payload, content_type='application/json')
+        assert response.status_code == 200
+
+    log = WebhookLog.objects.get()
+    assert (log.event_id, log.ordering_key, log.next_attempt_at) == ('ref-1', 'c-1', None)
+
+
+@pytest.fixture
+def handler(monkeypatch, settings):
+    """Replace handle_event: records handled event ids, fails those in ``.failing``."""
+    settings.WEBHOOK_RETRY_DELAY = 30
+    settings.WEBHOOK_RETRY_MAX_DELAY = 100
+    settings.WEBHOOK_MAX_ATTEMPTS = 5
+    state = SimpleNamespace(failing=set(), handled=[])
+
+    def handle_event(log):
+        if log.event_id in state.failing:
+            raise RuntimeError('boom')
+        state.handled.append(log.event_id)
+
+    monkeypatch.setattr(webhooks, 'handle_event', handle_event)
+    return state
+
+
+def make_event(event_id, ordering_key=''):
+    return WebhookLog.objects.create(
+        gateway='iyzico', event_id=event_id, event_type='test', ordering_key=ordering_key, payload={}
+    )
+
+
+def test_retry_delay(settings):
+    settings.WEBHOOK_RETRY_DELAY = 30
+    settings.WEBHOOK_RETRY_MAX_DELAY = 100
+
+    assert [webhooks.retry_delay(n).total_seconds() for n in (1, 2, 3, 4)] == [30, 60, 100, 100]
+
+
+@pytest.mark.django_db
+def test_failed_event_backs_off(handler):
+    handler.failing.add('e1')
+    with freeze_time() as frozen:
+        make_event('e1')
+
+        assert webhooks.process_pending_webhooks() == 0
+        log = WebhookLog.objects.get()
+        assert log.attempts == 1
+        assert log.next_attempt_at == timezone.now() + timedelta(seconds=30)
+
+        # Not due yet: not attempted again
+        frozen.tick(timedelta(seconds=29))
+        webhooks.process_pending_webhooks()
+        assert WebhookLog.objects.get().attempts == 1
+
+        frozen.tick(timedelta(seconds=2))
+        webhooks.process_pending_webhooks()
+        log = WebhookLog.objects.get()
+        assert log.attempts == 2
+        assert log.next_attempt_at == timezone.now() + timedelta(seconds=60)
+
+        handler.failing.clear()
+        frozen.tick(timedelta(seconds=61))
+        assert webhooks.process_pending_webhooks() == 1
+        log = WebhookLog.objects.get()
+        assert log.processed
+        assert log.next_attempt_at is None
+
+
+@pytest.mark.django_db
+def test_backing_off_event_holds_later_events_of_its_booking(handler, monkeypatch):
+    monkeypatch.setattr(webhooks, 'booking_ids_for', lambda keys: {key: 'b1' for key in keys if key.startswith('b1-')})
+    handler.failing.add('first')
+    with freeze_time() as frozen:
+        make_event('first', 'b1-t1')
+        frozen.tick()
+        webhooks.process_pending_webhooks()
+
+        frozen.tick()
+        make_event('second', 'b1-t2')
+        make_event('other', 'b2-t1')
+        make_event('unknown')
+        assert webhooks.process_pending_webhooks() == 2
+        assert handler.handled == ['other', 'unknown']
+
+        handler.failing.clear()
+        frozen.tick(timedelta(seconds=31))
+        assert webhooks.process_pending_webhooks() == 2
+        assert handler.handled[2:] == ['first', 'second']
+
+
+@pytest.mark.django_db
+def test_replay_clears_backoff(handler):
+    handler.failing.add('e1')
+    make_event('e1')
+    webhooks.process_pending_webhooks()
+
+    assert webhooks.replay(WebhookLog.objects.all()) == 1
+
+    log = WebhookLog.objects.get()
+    assert (log.attempts, log.next_attempt_at, log.error_message) == (0, None, '')
+
+
+@pytest.fixture
+def booking():
+    user = User.objects.create_user(
+        email='customer@example.com', password='secret', first_name='Ayşe', last_name='Yılmaz'
+    )
+    address = Address.objects.create(
+        user=user, title='Ev', district=District.objects.create(name='Kadıköy'), full_address='Moda Cd. 1'
+    )
+    return Booking.objects.create(
+        user=user, pickup_address=address, pickup_date=date.today(), subtotal=Decimal('250.00'), total=0
+    )
+
+
+def make_transaction(booking, age=timedelta(0), **fields):
+    transaction = Transaction.objects.create(
+        booking=booking, user=booking.user, payment_gateway='iyzico', amount=booking.total,
+        **{'status': 'processing', **fields}
+    )
+    if age:
+        Transaction.objects.filter(pk=transaction.pk).update(created_at=timezone.now() - age)
+        transaction.refresh_from_db()
+    return transaction
+
+
+@pytest.fixture
+def transaction(booking):
+    return make_transaction(booking)
+
+
+@pytest.mark.django_db
+def test_reconciled_booking_is_confirmed_like_after_a_callback(transaction):
+    response = {'status': 'success', 'paymentStatus': 'SUCCESS', 'paymentId': '123'}
+    transaction.gateway_response = response
+
+    assert reconciliation.apply_transitions([transaction], [], {transaction.id: response}) == (1, 0)
+
+    booking = Booking.objects.get()
+    assert booking.status == 'confirmed'
+    assert booking.confirmed_at is not None
+    history = BookingStatusHistory.objects.get(booking=booking)
+    assert (history.old_status, history.new_status) == ('pending', 'confirmed')
+    notification = UserNotification.objects.get(user=booking.user)
+    assert notification.notification_type == 'order_confirmed'
+
+
+@pytest.mark.django_db
+def test_run_periodic_tasks_sweeps_payloads(settings):
+    settings.PAYLOAD_RETENTION_DAYS = 30
+    old = timezone.now() - timedelta(days=31)
+    payload_store.archive_many([
+        payload_store.build('webhook', uuid.uuid4(), {'status': 'success'}, created_at=created_at)
+        for created_at in (old, old, timezone.now())
+    ])
+    out = io.StringIO()
+
+    call_command('run_periodic_tasks', task='sweep_payloads', stdout=out)
+
+    assert 'Deleted 2 expired payloads' in out.getvalue()
+    assert PayloadArchive.objects.count() == 1
+
+
+@pytest.mark.parametrize('result, gateway_id, abandoned, expected', [
+    ({'status': 'success', 'paymentStatus': 'SUCCESS'}, '1', False, 'completed'),
+    ({'status': 'success', 'paymentStatus': 'FAILURE'}, '1', False, 'failed'),
+    # 3DS page never completed: failed only once abandoned
+    ({'status': 'success', 'paymentStatus': 'INIT_THREEDS'}, '1', False, None),
+    ({'status': 'success', 'paymentStatus': 'INIT_THREEDS'}, '1', True, 'failed'),
+    # "Not found" is trusted only for abandoned payments the gateway never gave an id
+    ({'status': 'failure', 'errorMessage': 'Not found'}, '', False, None),
+    ({'status': 'failure', 'errorMessage': 'Not found'}, '', True, 'failed'),
+    ({'status': 'failure', 'errorMessage': 'Not found'}, '1', True, None),
+])
+def test_outcome(result, gateway_id, abandoned, expected):
+    now = timezone.now()
+    transaction = Transaction(created_at=now - timedelta(hours=2), gateway_transaction_id=gateway_id)
+    abandon_before = now - timedelta(hours=1 if abandoned else 3)
+
+    assert reconciliation.outcome(transaction, result, abandon_before) == expected
+
+
+@pytest.mark.django_db
+def test_stuck_transactions_keyset_batches(booking):
+    old = timezone.now() - timedelta(hours=1)
+    stuck = [make_transaction(booking) for _ in range(5)]
+    # Ties on created_at are ordered by id
+    Transaction.objects.filter(pk__in=[t.pk for t in stuck[:3]]).update(created_at=old)
+    Transaction.objects.filter(pk__in=[t.pk for t in stuck[3:]]).update(created_at=old + timedelta(minutes=1))
+    make_transaction(booking, status='completed', age=timedelta(hours=1))
+    make_transaction(booking)  # Too recent
+
+    batches = reconciliation.stuck_transactions(timedelta(minutes=15), batch_size=2)
+    first = next(batches)
+    # Rows finished meanwhile do not shift the following pages
+    Transaction.objects.filter(pk=first[0].pk).update(status='completed')
+    seen = first + [t for batch in batches for t in batch]
+
+    expected = sorted(stuck, key=lambda t: (t.pk not in {s.pk for s in stuck[:3]}, str(t.pk)))
+    assert [t.pk for t in seen] == [t.pk for t in expected]
+
+
+@pytest.mark.django_db
+def test_dry_run_writes_nothing(fake_iyzico, booking):
+    fake_iyzico.payment_status = staticmethod(
+        lambda conversation_id: 'CALLBACK_THREEDS' if conversation_id == str(awaiting.id) else 'SUCCESS'
+    )
+    awaiting = make_transaction(booking, age=timedelta(hours=2), gateway_transaction_id='1')
+    paid = make_transaction(booking, age=timedelta(hours=2), gateway_transaction_id='2')
+
+    report = reconciliation.reconcile_transactions(dry_run=True)
+
+    assert (report.scanned, report.completed, report.finish_3ds) == (2, 1, 1)
+    assert set(fake_iyzico.paths) == {RETRIEVE_PAYMENT_PATH}
+    assert set(Transaction.objects.values_list('status', flat=True)) == {'processing'}
+    assert Booking.objects.get().status == 'pending'
+    assert not PayloadArchive.objects.exists()
+    assert not BookingStatusHistory.objects.exists()
+
+    report = reconciliation.reconcile_transactions()
+
+    assert (report.completed, report.finish_3ds) == (2, 0)
+    assert AUTH_3DS_PATH in fake_iyzico.paths
+    assert {awaiting.pk, paid.pk} == set(Transaction.objects.filter(status='completed').values_list('pk', flat=True))
+
+
+@pytest.mark.django_db
+def test_late_callback_keeps_reconciled_transaction_completed(transaction):
+    response = {'status': 'success', 'paymentStatus': 'SUCCESS', 'paymentId': '123'}
+    transaction.gateway_response = response
+    reconciliation.apply_transitions([transaction], [], {transaction.id: response})
+
+    # The gateway rejects the callback's auth: the payment was captured already
+    result = IyzicoPaymentService()._complete_3ds(
+        transaction, {'status': 'failure', 'errorMessage': 'Payment already authorized'}
+    )
+
+    assert result == {'success': True, 'booking_id': str(transaction.booking_id)}
+    transaction.refresh_from_db()
+    assert (transaction.status, transaction.error_message) == ('completed', '')
+    assert BookingStatusHistory.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_callback_completes_open_transaction(transaction):
+    result = IyzicoPaymentService()._complete_3ds(transaction, {'status': 'success', 'paymentId': '123'})
+
+    assert result == {'success': True, 'booking_id': str(transaction.booking_id)}
+    transaction.refresh_from_db()
+    assert transaction.status == 'completed'
+    assert Booking.objects.get().status == 'confirmed'
+
+
+CARD = {
+    'card_holder': 'Ayşe Yılmaz', 'card_number': '5528790000000008',
+    'expiry_month': '12', 'expiry_year': '2030', 'cvv': '123',
+}
+
+
+def api_post(path, user, data):
+    """POST through the ASGI handler, as the async views run under SERVER_MODE=asgi."""
+    async def post():
+        access = RefreshToken.for_user(user).access_token
+        return await AsyncClient().post(
+            path, data, content_type='application/json', headers={'Authorization': f'Bearer {access}'}
+        )
+    return async_to_sync(post)()
+
+
+@pytest.mark.django_db
+def test_initiate_and_callback(fake_iyzico, booking):
+    response = api_post('/api/payments/payment/initiate/', booking.user, {'booking_id': str(booking.id), **CARD})
+
+    assert response.status_code == 200
+    data = response.json()['data']
+    assert base64.b64decode(data['three_ds_url']) == b'<html>fake 3DS</html>'
+    transaction = Transaction.objects.get(pk=data['transaction_id'])
+    assert transaction.status == 'processing'
+    assert transaction.gateway_transaction_id
+
+    response = api_post('/api/payments/payment/callback/', booking.user, {
+        'conversationId': str(transaction.id), 'paymentId': transaction.gateway_transaction_id,
+    })
+
+    assert response.status_code == 200
+    assert response.json() == {'success': True, 'message': 'Payment completed', 'booking_id': str(booking.id)}
+    assert fake_iyzico.paths == (INITIALIZE_3DS_PATH, AUTH_3DS_PATH)
+    transaction.refresh_from_db()
+    assert transaction.status == 'completed'
+    assert Booking.objects.get().status == 'confirmed'
+
+
+@pytest.mark.django_db
+def test_initiate_rejects_booking_not_pending(fake_iyzico, booking):
+    Booking.objects.filter(pk=booking.pk).update(status='confirmed')
+
+    response = api_post('/api/payments/payment/initiate/', booking.user, {'booking_id': str(booking.id), **CARD})
+
+    assert response.status_code == 400
+    assert response.json() == {'success': False, 'error': 'Booking is not in pending status'}
+    assert fake_iyzico.requests == 0
+    assert not Transaction.objects.exists()
+
+
+@pytest.mark.django_db
+def test_initiate_with_gateway_down(fake_iyzico, booking):
+    fake_iyzico.failure_rate = 1
+
+    response = api_post('/api/payments/payment/initiate/', booking.user, {'booking_id': str(booking.id), **CARD})
+
+    assert response.status_code == 503
+    assert response.json()['success'] is False
+    assert Transaction.objects.get().status == 'failed'
+
+
+@pytest.mark.django_db
+def test_callback_for_unknown_transaction(fake_iyzico, booking):
+    response = api_post('/api/payments/payment/callback/', booking.user, {
+        'conversationId': str(uuid.uuid4()), 'paymentId': '1',
+    })
+
+    assert response.status_code == 400
+    assert response.json() == {'success': False, 'error': 'Transaction not found'}
+    assert fake_iyzico.requests == 0
@@ -1,12 +1,17 @@
+from collections.abc import Mapping
+
+from adrf.viewsets import ViewSet as AsyncViewSet
 from rest_framework import viewsets, status, views
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from django.shortcuts import get_object_or_404
-from .models import Transaction, Refund, WebhookLog
+from django.http import Http404
+from . import webhooks
+from .models import Transaction, Refund
 from .serializers import TransactionSerializer, RefundSerializer, PaymentInitiateSerializer
 from apps.bookings.models import Booking
-from .services import IyzicoPaymentService
+from apps.core.transports import get_transport
+from .gateway import GatewayError
 
 
 class TransactionViewSet(viewsets.ReadOnlyModelViewSet):
@@ -19,18 +24,29 @@ class TransactionViewSet(viewsets.ReadOnlyModelViewSet):
         return Transaction.objects.filter(user=self.request.user).order_by('-created_at')
 
 
-class PaymentViewSet(viewsets.ViewSet):
-    """Payment operations."""
+class PaymentViewSet(AsyncViewSet):
+    """
+    Payment operations.
+
+    Async so that under ASGI a slow gateway call waits without holding a
+    worker; gateway calls use the async iyzico client.
+    """
     
     permission_classes = (IsAuthenticated,)
+    throttle_scopes = {'initiate': 'payment'}
     
     @action(detail=False, methods=['post'])
-    def initiate(self, request):
+    async def initiate(self, request):
         """Initiate payment for a booking."""
         serializer = PaymentInitiateSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
-        booking = get_object_or_404(Booking, id=serializer.validated_data['booking_id'], user=request.user)
+        try:
+            booking = await Booking.objects.aget(
+                id=serializer.validated_data['booking_id'], user=request.user
+            )
+        except Booking.DoesNotExist:
+            raise Http404
         
         if booking.status != 'pending':
             return Response({
@@ -39,10 +55,10 @@ class PaymentViewSet(viewsets.ViewSet):
             }, status=status.HTTP_400_BAD_REQUEST)
         
         # Initialize payment service (iyzico)
-        payment_service = IyzicoPaymentService()
+        payment_service = get_transport('iyzico')()
         
         try:
-            result = payment_service.process_payment(
+            result = await payment_service.aprocess_payment(
                 booking=booking,
                 user=request.user,
                 payment_data=serializer.validated_data,
@@ -65,6 +81,11 @@ class PaymentViewSet(viewsets.ViewSet):
                     'error': result.get('error', 'Payment failed')
                 }, status=status.HTTP_400_BAD_REQUEST)
                 
+        except GatewayError as e:
+            return Response({
+                'success': False,
+                'error': str(e)
+            }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
         except Exception as e:
             return Response({
                 'success': False,
@@ -72,11 +93,17 @@ class PaymentViewSet(viewsets.ViewSet):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
     @action(detail=False, methods=['post'])
-    def callback(self, request):
+    async def callback(self, request):
         """3D Secure callback endpoint."""
         # Handle 3D Secure callback
-        payment_service = IyzicoPaymentService()
-        result = payment_service.handle_3ds_callback(request.data)
+        payment_service = get_transport('iyzico')()
+        try:
+            result = await payment_service.ahandle_3ds_callback(request.data)
+        except GatewayError as e:
+            return Response({
+                'success': False,
+                'error': str(e)
+            }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
         
         if result['success']:
             return Response({
@@ -92,34 +119,27 @@ class PaymentViewSet(viewsets.ViewSet):
 
 
 class WebhookView(views.APIView):
-    """Payment gateway webhooks."""
+    """
+    Payment gateway webhooks.
+
+    Only records the event (deduplicated on the gateway event id) and
+    acknowledges; ``manage.py process_webhooks`` processes it.
+    """
     
     permission_classes = (AllowAny,)
+    authentication_classes = ()
+    # Retries are deduplicated; throttling would only make gateways retry more
+    throttle_classes = ()
     
     def post(self, request, gateway):
         """Handle incoming webhooks."""
-        # Log webhook
-        webhook_log = WebhookLog.objects.create(
-            gateway=gateway,
-            event_type=request.data.get('event_type', 'unknown'),
-            payload=request.data,
-            headers=dict(request.headers)
-        )
+        if gateway not in webhooks.GATEWAYS:
+            return Response({'status': 'error'}, status=status.HTTP_404_NOT_FOUND)
+        if not isinstance(request.data, Mapping):
+            return Response({
+                'status': 'error',
+                'error': 'Payload must be a JSON object'
+            }, status=status.HTTP_400_BAD_REQUEST)
         
-        try:
-            if gateway == 'iyzico':
-                payment_service = IyzicoPaymentService()
-                payment_service.handle_webhook(request.data, webhook_log)
-            elif gateway == 'stripe':
-                # TODO: Implement Stripe webhook handling
-                pass
-            
-            webhook_log.processed = True
-            webhook_log.save()
-            
-            return Response({'status': 'success'}, status=status.HTTP_200_OK)
-            
-        except Exception as e:
-            webhook_log.error_message = str(e)
-            webhook_log.save()
-            return Response({'status': 'error'}, status=status.HTTP_400_BAD_REQUEST)
+        webhooks.ingest(gateway, request.data, dict(request.headers))
+        return Response({'status': 'success'}, status=status.HTTP_200_OK)
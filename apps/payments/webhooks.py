@@ -0,0 +1,193 @@
+"""
+Webhook ingestion and processing.
+
+``ingest`` stores an incoming event with idempotent inserts keyed on
+(gateway, event_id), so provider retries are acknowledged without being
+stored or processed twice. The row keeps a payload summary; the full
+payload and headers go to the compressed payload archive. ``process_pending_webhooks`` runs in a worker
+(``manage.py process_webhooks``) and handles the events of each booking in
+arrival order; failed events are retried with exponential backoff
+(``WEBHOOK_RETRY_DELAY``) up to ``WEBHOOK_MAX_ATTEMPTS`` times and can be
+replayed with ``manage.py replay_webhooks``.
+"""
+import hashlib
+import json
+import logging
+import uuid
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction as db_transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.core.transports import get_transport
+from . import payload_store
+from .models import Transaction, WebhookLog
+
+logger = logging.getLogger(__name__)
+
+GATEWAYS = ('iyzico', 'stripe')
+WEBHOOK_NAMESPACE = uuid.UUID('5b0e2a64-8c1f-4d3e-9a57-2f6c1d8e4b90')
+
+
+def webhook_event_id(gateway, payload):
+    """Provider event id, or a hash of the payload when the provider sends none."""
+    if gateway == 'iyzico' and payload.get('iyziReferenceCode'):
+        return str(payload['iyziReferenceCode'])
+    if payload.get('event_id') or payload.get('id'):
+        return str(payload.get('event_id') or payload.get('id'))
+    body = json.dumps(payload, sort_keys=True, default=str)
+    return 'sha256:' + hashlib.sha256(body.encode('utf-8')).hexdigest()
+
+
+def ingest(gateway, payload, headers):
+    """
+    Store a webhook event unless it was already received.
+
+    The log id is derived from the event id, so a retried event conflicts on
+    both inserts (INSERT ... ON CONFLICT DO NOTHING) and nothing is written.
+    """
+    event_id = webhook_event_id(gateway, payload)
+    log = WebhookLog(
+        id=uuid.uuid5(WEBHOOK_NAMESPACE, f'{gateway}:{event_id}'),
+        gateway=gateway,
+        event_id=event_id,
+        event_type=payload.get('iyziEventType') or payload.get('event_type', 'unknown'),
+        # iyzico sends our Transaction id as the conversation id
+        ordering_key=str(payload.get('paymentConversationId') or payload.get('conversationId') or ''),
+        payload=payload_store.summarize('webhook', payload),
+    )
+    WebhookLog.objects.bulk_create([log], ignore_conflicts=True)
+    payload_store.archive_many(
+        [payload_store.build('webhook', log.id, {'payload': payload, 'headers': headers})], replace=False
+    )
+
+
+def full_payload(log):
+    """The complete event payload; the summary once the archive has expired."""
+    archived = payload_store.load('webhook', log.id)
+    return archived['payload'] if archived else log.payload
+
+
+def handle_event(log):
+    """Run the gateway handler for a stored event."""
+    if log.gateway == 'iyzico':
+        get_transport('iyzico')().handle_webhook(full_payload(log), log)
+    # stripe: not implemented yet, events are only recorded
+
+
+def retry_delay(attempts):
+    """Backoff before the next attempt of an event that failed ``attempts`` times."""
+    delay = settings.WEBHOOK_RETRY_DELAY * 2 ** (attempts - 1)
+    return timedelta(seconds=min(delay, settings.WEBHOOK_RETRY_MAX_DELAY))
+
+
+def process_pending_webhooks(limit=100):
+    """
+    Process up to ``limit`` pending events that are due.
+
+    Events are grouped per booking (per event when the booking is unknown)
+    and each group is processed in arrival order under an advisory lock, so
+    concurrent workers never handle two events of one booking at once. A
+    failing event stops its group until its retry succeeds or it runs out
+    of attempts; later events of the booking wait for it.
+    Returns: number of events processed successfully
+    """
+    now = timezone.now()
+    unfinished = WebhookLog.objects.filter(processed=False, attempts__lt=settings.WEBHOOK_MAX_ATTEMPTS)
+    pending = list(
+        unfinished.filter(Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now))
+        .order_by('created_at')
+        .values_list('id', 'ordering_key', 'created_at')[:limit]
+    )
+    if not pending:
+        return 0
+    backing_off = list(
+        unfinished.filter(next_attempt_at__gt=now).exclude(ordering_key='')
+        .values_list('ordering_key', 'created_at')
+    )
+
+    bookings = booking_ids_for(
+        [key for _, key, _ in pending if key] + [key for key, _ in backing_off]
+    )
+    # Oldest event of each booking that is waiting for its retry
+    held_since = {}
+    for key, created_at in backing_off:
+        if key in bookings:
+            group_key = f'booking:{bookings[key]}'
+            held_since[group_key] = min(created_at, held_since.get(group_key, created_at))
+
+    groups = OrderedDict()
+    for log_id, key, created_at in pending:
+        group_key = f'booking:{bookings[key]}' if key in bookings else f'event:{log_id}'
+        if group_key in held_since and created_at > held_since[group_key]:
+            continue
+        groups.setdefault(group_key, []).append(log_id)
+
+    processed = 0
+    for group_key, log_ids in groups.items():
+        processed += process_group(group_key, log_ids)
+    return processed
+
+
+def booking_ids_for(conversation_ids):
+    """Map conversation ids (Transaction ids) to booking ids in one query."""
+    valid_ids = []
+    for value in set(conversation_ids):
+        try:
+            valid_ids.append(uuid.UUID(value))
+        except ValueError:
+            continue
+    return {
+        str(transaction_id): booking_id
+        for transaction_id, booking_id in Transaction.objects.filter(id__in=valid_ids).values_list('id', 'booking_id')
+    }
+
+
+def process_group(group_key, log_ids):
+    with db_transaction.atomic():
+        if not try_advisory_xact_lock(group_key):
+            return 0  # another worker owns this booking right now
+
+        logs = WebhookLog.objects.select_for_update().filter(
+            id__in=log_ids, processed=False
+        ).order_by('created_at')
+        processed = 0
+        for log in logs:
+            try:
+                with db_transaction.atomic():
+                    handle_event(log)
+            except Exception as e:
+                logger.warning('Webhook %s (%s) failed', log.id, log.event_type, exc_info=True)
+                log.attempts += 1
+                log.error_message = str(e)
+                log.next_attempt_at = timezone.now() + retry_delay(log.attempts)
+                log.save(update_fields=['attempts', 'error_message', 'next_attempt_at'])
+                break  # keep later events of this booking waiting
+
+            log.processed = True
+            log.processed_at = timezone.now()
+            log.attempts += 1
+            log.error_message = ''
+            log.next_attempt_at = None
+            log.save(update_fields=['processed', 'processed_at', 'attempts', 'error_message', 'next_attempt_at'])
+            processed += 1
+        return processed
+
+
+def try_advisory_xact_lock(key):
+    if connection.vendor != 'postgresql':
+        return True
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_try_advisory_xact_lock(hashtext(%s))', [key])
+        return cursor.fetchone()[0]
+
+
+def replay(queryset):
+    """
+    Reset failed events so the worker picks them up again.
+    Returns: number of events queued
+    """
+    return queryset.filter(processed=False).update(attempts=0, error_message='', next_attempt_at=None)
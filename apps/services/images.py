@@ -0,0 +1,211 @@
+"""
+Resized WebP/AVIF variants of catalog images.
+
+Category and subtype images are stored as uploaded; the catalog serves
+``srcset`` variants of them instead. ``manage.py process_images --loop`` (the
+``images`` worker) renders every image whose variants are missing or were
+made from a previous image, in the widths ``IMAGE_VARIANT_WIDTHS`` and the
+formats ``IMAGE_VARIANT_FORMATS``: ``webp`` and/or ``avif``, which needs the
+``pillow-avif-plugin`` package.
+
+A model's ``image_variants`` records the image they were made from:
+
+    {"source": "categories/<uuid>.jpg", "width": 2400, "height": 1600,
+     "webp": {"320": "categories/<uuid>-320w.webp", ...}}
+
+so variants of a replaced image are never served, and an image that cannot
+be decoded is recorded with an ``error`` instead of being retried. Other
+failures (e.g. storage unavailable) are recorded with the number of
+``attempts`` and a ``retry_at`` that doubles with every attempt.
+"""
+import io
+import logging
+import math
+import posixpath
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.base import ContentFile
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from PIL import Image, ImageOps
+
+from .models import Category, SubType
+
+logger = logging.getLogger(__name__)
+
+MODELS = (Category, SubType)
+
+ORIENTATION_TAG = 0x0112
+
+RETRY_DELAY = 60  # seconds before retrying a failed image, doubled per attempt
+MAX_RETRY_DELAY = 6 * 3600
+
+SAVE_OPTIONS = {
+    'webp': {'format': 'WEBP', 'method': 4},
+    'avif': {'format': 'AVIF', 'speed': 8},
+}
+
+
+def variant_formats():
+    formats = settings.IMAGE_VARIANT_FORMATS
+    for fmt in formats:
+        if fmt not in SAVE_OPTIONS:
+            raise ImproperlyConfigured(f'Unknown IMAGE_VARIANT_FORMATS entry: {fmt}')
+    if 'avif' in formats:
+        try:
+            import pillow_avif  # noqa: F401  (registers the AVIF plugin)
+        except ImportError:
+            raise ImproperlyConfigured('IMAGE_VARIANT_FORMATS=avif requires the pillow-avif-plugin package')
+    return formats
+
+
+def render_variants(source, widths=None, formats=None, quality=None):
+    """
+    Decode an image file and encode its resized variants.
+    Returns: (width, height, [(format, width, bytes), ...])
+    """
+    widths = widths or settings.IMAGE_VARIANT_WIDTHS
+    formats = formats or variant_formats()
+    quality = quality or settings.IMAGE_VARIANT_QUALITY
+
+    with Image.open(source) as image:
+        original_size = image.size
+        # JPEGs decode at 1/2, 1/4 or 1/8 scale when the largest variant allows it
+        rotated = image.getexif().get(ORIENTATION_TAG) in (5, 6, 7, 8)
+        scale = min(1, max(widths) / (image.height if rotated else image.width))
+        image.draft('RGB', (math.ceil(image.width * scale), math.ceil(image.height * scale)))
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info or image.mode in ('LA', 'PA') else 'RGB')
+
+        rendered = []
+        width, height = original_size[::-1] if rotated else original_size
+        # Never upscale: widths beyond the original collapse into the original width
+        for variant_width in sorted({min(variant_width, width) for variant_width in widths}):
+            variant_height = max(1, round(height * variant_width / width))
+            resized = image.resize((variant_width, variant_height), Image.Resampling.LANCZOS, reducing_gap=3.0)
+            for fmt in formats:
+                buffer = io.BytesIO()
+                resized.save(buffer, quality=quality, **SAVE_OPTIONS[fmt])
+                rendered.append((fmt, variant_width, buffer.getvalue()))
+        return width, height, rendered
+
+
+def variant_name(source_name, width, fmt):
+    return f'{posixpath.splitext(source_name)[0]}-{width}w.{fmt}'
+
+
+def _variant_names(variants):
+    return {name for fmt in SAVE_OPTIONS for name in variants.get(fmt, {}).values()}
+
+
+def is_stale(obj):
+    return bool(obj.image) and obj.image_variants.get('source') != obj.image.name
+
+
+def _with_images(model):
+    return model.objects.exclude(image='').exclude(image__isnull=True).only('pk', 'image', 'image_variants')
+
+
+def is_due_retry(obj, now=None):
+    retry_at = obj.image_variants.get('retry_at')
+    return retry_at is not None and parse_datetime(retry_at) <= (now or timezone.now())
+
+
+def pending(model):
+    """
+    Objects of ``model`` whose image has no current variants, or whose
+    failure is due for a retry (catalog tables are small).
+    """
+    now = timezone.now()
+    return [obj for obj in _with_images(model) if is_stale(obj) or is_due_retry(obj, now)]
+
+
+def process(obj):
+    """
+    Render and store the variants of one object's image.
+    Returns: False if the image was replaced in the meantime
+    """
+    source = obj.image.name
+    storage = obj.image.storage
+    try:
+        with storage.open(source, 'rb') as f:
+            width, height, rendered = render_variants(io.BytesIO(f.read()))
+    except (OSError, Image.DecompressionBombError) as e:
+        logger.warning('Image %s of %s %s not processed: %s', source, type(obj).__name__, obj.pk, e)
+        variants = {'source': source, 'error': type(e).__name__}
+    else:
+        variants = {'source': source, 'width': width, 'height': height}
+        for fmt, variant_width, content in rendered:
+            name = storage.save(variant_name(source, variant_width, fmt), ContentFile(content))
+            variants.setdefault(fmt, {})[str(variant_width)] = name
+
+    # Only if the image is still the one rendered
+    updated = type(obj).objects.filter(pk=obj.pk, image=source).update(image_variants=variants)
+    obsolete = _variant_names(obj.image_variants) - _variant_names(variants) if updated else _variant_names(variants)
+    for name in obsolete:
+        storage.delete(name)
+    return bool(updated)
+
+
+def process_pending(force=False):
+    """
+    Render variants of every image that needs them (all images with ``force``).
+    Returns: number of images processed
+    """
+    processed = 0
+    for model in MODELS:
+        for obj in (list(_with_images(model)) if force else pending(model)):
+            try:
+                processed += process(obj)
+            except Exception as e:
+                # e.g. storage unavailable
+                logger.exception('Variants of %s %s not rendered', model.__name__, obj.pk)
+                record_failure(obj, e)
+    return processed
+
+
+def record_failure(obj, error):
+    """
+    Record a failed attempt so the image is retried after a growing delay
+    instead of on every run.
+    """
+    source = obj.image.name
+    previous = obj.image_variants
+    if previous.get('source') == source and 'error' not in previous:
+        return  # re-rendered with --force, the current variants stay served
+    attempts = (previous.get('attempts', 0) if previous.get('source') == source else 0) + 1
+    delay = min(RETRY_DELAY * 2 ** (attempts - 1), MAX_RETRY_DELAY)
+    failed = {
+        'source': source, 'error': type(error).__name__, 'attempts': attempts,
+        'retry_at': (timezone.now() + timedelta(seconds=delay)).isoformat(),
+    }
+    # Variants of a previous image stay listed, they are deleted once rendering succeeds
+    failed.update((fmt, previous[fmt]) for fmt in SAVE_OPTIONS if fmt in previous)
+    try:
+        type(obj).objects.filter(pk=obj.pk, image=source).update(image_variants=failed)
+    except Exception:
+        logger.exception('Failure of %s %s not recorded', type(obj).__name__, obj.pk)
+
+
+def srcset(obj, request=None):
+    """``{format: "<url> 320w, <url> 640w"}`` of an object's variants, None until they are rendered."""
+    variants = obj.image_variants
+    if not obj.image or variants.get('source') != obj.image.name or 'error' in variants:
+        return None
+
+    storage = obj.image.storage
+    result = {}
+    for fmt in SAVE_OPTIONS:
+        if fmt not in variants:
+            continue
+        entries = []
+        for width, name in sorted(variants[fmt].items(), key=lambda item: int(item[0])):
+            url = storage.url(name)
+            if request is not None:
+                url = request.build_absolute_uri(url)
+            entries.append(f'{url} {width}w')
+        result[fmt] = ', '.join(entries)
+    return result
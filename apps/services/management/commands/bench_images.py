@@ -0,0 +1,90 @@
+"""
+Measure how many catalog images one worker renders per second.
+
+    python manage.py bench_images --count 20 --size 3000x2000
+    python manage.py bench_images --file photo.jpg --formats webp,avif
+
+Renders the variants of a synthetic photo-like JPEG (or ``--file``) with the
+configured IMAGE_VARIANT_* settings, single-threaded like one worker, and
+reports time per image and bytes saved against the original.
+"""
+import io
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from PIL import Image, ImageFilter
+
+from apps.services.images import render_variants, variant_formats
+
+
+class Command(BaseCommand):
+    help = 'Benchmark catalog image variant rendering per worker'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--count',
+            type=int,
+            default=10,
+            help='Images to render (default: 10)'
+        )
+        parser.add_argument(
+            '--size',
+            default='3000x2000',
+            help='Size of the synthetic source image (default: 3000x2000)'
+        )
+        parser.add_argument(
+            '--file',
+            help='Use this image as the source instead'
+        )
+        parser.add_argument(
+            '--formats',
+            help='Comma-separated formats (default: IMAGE_VARIANT_FORMATS)'
+        )
+
+    def handle(self, *args, **options):
+        if options['formats']:
+            settings.IMAGE_VARIANT_FORMATS = options['formats'].split(',')
+        formats = variant_formats()
+
+        if options['file']:
+            with open(options['file'], 'rb') as f:
+                source = f.read()
+        else:
+            try:
+                width, height = (int(value) for value in options['size'].lower().split('x'))
+            except ValueError:
+                raise CommandError('--size must look like 3000x2000')
+            source = self.synthetic_jpeg(width, height)
+
+        render_variants(io.BytesIO(source), formats=formats)  # warm up codecs
+        timings = []
+        for _ in range(options['count']):
+            start = time.perf_counter()
+            width, height, rendered = render_variants(io.BytesIO(source), formats=formats)
+            timings.append(time.perf_counter() - start)
+
+        timings.sort()
+        mean = sum(timings) / len(timings)
+        self.stdout.write(
+            f"{width}x{height} source ({len(source) / 1024:.0f} KB), widths {settings.IMAGE_VARIANT_WIDTHS}, "
+            f"formats {','.join(formats)}, quality {settings.IMAGE_VARIANT_QUALITY}"
+        )
+        self.stdout.write(
+            f"{len(timings)} images: {mean * 1000:.0f} ms mean, {timings[len(timings) // 2] * 1000:.0f} ms p50, "
+            f"{timings[-1] * 1000:.0f} ms max -> {1 / mean:.2f} images/s per worker"
+        )
+        for fmt, variant_width, content in rendered:
+            self.stdout.write(
+                f"  {fmt:>4} {variant_width:>5}w: {len(content) / 1024:7.1f} KB "
+                f"({len(content) * 100 / len(source):.1f}% of the original)"
+            )
+
+    def synthetic_jpeg(self, width, height):
+        """A noisy gradient compresses roughly like a photo, unlike a flat color."""
+        noise = Image.effect_noise((width, height), 64).filter(ImageFilter.GaussianBlur(2))
+        gradient = Image.linear_gradient('L').resize((width, height))
+        image = Image.merge('RGB', (noise, gradient, Image.blend(noise, gradient, 0.5)))
+        buffer = io.BytesIO()
+        image.save(buffer, format='JPEG', quality=90)
+        return buffer.getvalue()
@@ -0,0 +1,61 @@
+"""
+Render resized WebP/AVIF variants of category and subtype images.
+
+    python manage.py process_images            # once, e.g. from cron
+    python manage.py process_images --loop     # long-running worker (Procfile "images")
+    python manage.py process_images --force    # re-render everything, e.g. after changing IMAGE_VARIANT_WIDTHS
+
+Images are picked up after every upload (admin or direct upload); until
+their variants exist the catalog serves the original only. Images that
+cannot be decoded are skipped; other failures (e.g. storage unavailable)
+are retried after a minute, doubling up to 6 hours.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.services.images import process_pending, variant_formats
+
+
+class Command(BaseCommand):
+    help = 'Render resized variants of catalog images'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling for new images'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='Seconds to wait when there is nothing to process (default: 5)'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Re-render the variants of every image'
+        )
+
+    def handle(self, *args, **options):
+        variant_formats()  # fail fast on a misconfigured format
+        if not options['loop']:
+            processed = process_pending(force=options['force'])
+            self.stdout.write(self.style.SUCCESS(f'✓ {processed} images processed'))
+            return
+
+        if options['force']:
+            self.stdout.write(f"{process_pending(force=True)} images processed")
+        self.stdout.write(f"Processing images every {options['interval']}s")
+        try:
+            while True:
+                close_old_connections()
+                processed = process_pending()
+                if processed:
+                    self.stdout.write(f'{processed} images processed')
+                else:
+                    time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
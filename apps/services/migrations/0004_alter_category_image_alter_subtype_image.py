@@ -0,0 +1,24 @@
+# Generated by Django 4.2.9 on 2026-10-19 05:23
+
+import apps.core.uploads
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0003_alter_bookingsettings_options_alter_category_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='category',
+            name='image',
+            field=models.ImageField(blank=True, null=True, upload_to=apps.core.uploads.UploadTo('categories/'), verbose_name='Resim'),
+        ),
+        migrations.AlterField(
+            model_name='subtype',
+            name='image',
+            field=models.ImageField(blank=True, null=True, upload_to=apps.core.uploads.UploadTo('subtypes/'), verbose_name='Resim'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.9 on 2026-10-19 05:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0004_alter_category_image_alter_subtype_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Resim Varyantları'),
+        ),
+        migrations.AddField(
+            model_name='subtype',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Resim Varyantları'),
+        ),
+    ]
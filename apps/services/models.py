@@ -3,6 +3,8 @@ from django.utils.translation import gettext_lazy as _
 from django.core.validators import MinValueValidator
 from decimal import Decimal
 
+from apps.core.uploads import UploadTo
+
 
 class District(models.Model):
     """Istanbul districts where service is available."""
@@ -42,7 +44,8 @@ class Category(models.Model):
     slug = models.SlugField(unique=True, verbose_name="Kısa Ad")
     description = models.TextField(blank=True, verbose_name="Açıklama")
     icon = models.CharField(max_length=50, blank=True, help_text='Icon class or emoji', verbose_name="İkon")
-    image = models.ImageField(upload_to='categories/', blank=True, null=True, verbose_name="Resim")
+    image = models.ImageField(upload_to=UploadTo('categories/'), blank=True, null=True, verbose_name="Resim")
+    image_variants = models.JSONField(default=dict, blank=True, editable=False, verbose_name="Resim Varyantları")
     pricing_type = models.CharField(max_length=20, choices=PRICING_TYPE_CHOICES, verbose_name="Fiyatlandırma Tipi")
     is_active = models.BooleanField(default=True, verbose_name="Aktif")
     order_priority = models.IntegerField(default=0, help_text='Lower numbers appear first', verbose_name="Sıralama Önceliği")
@@ -84,7 +87,8 @@ class SubType(models.Model):
     slug = models.SlugField(verbose_name="Kısa Ad")
     description = models.TextField(blank=True, verbose_name="Açıklama")
     icon = models.CharField(max_length=50, blank=True, help_text='Icon class or emoji', verbose_name="İkon")
-    image = models.ImageField(upload_to='subtypes/', blank=True, null=True, verbose_name="Resim")
+    image = models.ImageField(upload_to=UploadTo('subtypes/'), blank=True, null=True, verbose_name="Resim")
+    image_variants = models.JSONField(default=dict, blank=True, editable=False, verbose_name="Resim Varyantları")
     is_active = models.BooleanField(default=True, verbose_name="Aktif")
     order_priority = models.IntegerField(default=0, verbose_name="Sıralama Önceliği")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Oluşturulma Tarihi")
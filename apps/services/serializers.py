@@ -1,7 +1,18 @@
 from rest_framework import serializers
+from .images import srcset
 from .models import District, Category, SubType, Pricing, WorkingHours, Holiday, BookingSettings
 
 
+class ImageSrcsetField(serializers.ReadOnlyField):
+    """Resized WebP/AVIF variants of ``image`` as ``{format: srcset}``; null until rendered."""
+    
+    def __init__(self, **kwargs):
+        super().__init__(source='*', **kwargs)
+    
+    def to_representation(self, obj):
+        return srcset(obj, self.context.get('request'))
+
+
 class DistrictSerializer(serializers.ModelSerializer):
     """District serializer."""
     
@@ -33,20 +44,21 @@ class SubTypeSerializer(serializers.ModelSerializer):
     
     pricing = PricingSerializer(many=True, read_only=True)
     current_price = serializers.SerializerMethodField()
+    image_srcset = ImageSrcsetField()
     
     class Meta:
         model = SubType
         fields = (
-            'id', 'name', 'slug', 'description', 'icon', 'image',
+            'id', 'name', 'slug', 'description', 'icon', 'image', 'image_srcset',
             'is_active', 'pricing', 'current_price'
         )
     
     def get_current_price(self, obj):
-        """Get currently active pricing."""
-        from django.utils import timezone
-        active_pricing = obj.pricing.filter(
-            is_active=True,
-        ).first()
+        """Get currently active pricing (uses prefetched pricing when available)."""
+        active_pricing = next(
+            (pricing for pricing in obj.pricing.all() if pricing.is_active),
+            None
+        )
         
         if active_pricing:
             return PricingSerializer(active_pricing).data
@@ -57,12 +69,13 @@ class CategorySerializer(serializers.ModelSerializer):
     """Category serializer."""
     
     subtypes = SubTypeSerializer(many=True, read_only=True)
+    image_srcset = ImageSrcsetField()
     
     class Meta:
         model = Category
         fields = (
             'id', 'name', 'slug', 'description',
-            'icon', 'image', 'pricing_type', 'is_active', 'subtypes',
+            'icon', 'image', 'image_srcset', 'pricing_type', 'is_active', 'subtypes',
             'requires_time_selection', 'requires_pickup_delivery', 'min_days_between_pickup_delivery'
         )
 
@@ -0,0 +1,124 @@
+import io
+from datetime import timedelta
+from unittest import mock
+
+import pytest
+from django.core.files.base import ContentFile
+from django.utils import timezone
+from freezegun import freeze_time
+from PIL import Image
+
+from apps.services import images
+from apps.services.models import Category
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def image_settings(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    settings.IMAGE_VARIANT_WIDTHS = [16, 32, 200]
+    settings.IMAGE_VARIANT_FORMATS = ['webp']
+
+
+def image_file(name, size=(64, 48), fmt='JPEG'):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, 'red').save(buffer, format=fmt)
+    return ContentFile(buffer.getvalue(), name=name)
+
+
+@pytest.fixture
+def category():
+    category = Category(name='Halı', slug='hali', pricing_type='per_sqm')
+    category.image.save('photo.jpg', image_file('photo.jpg'))
+    return category
+
+
+def variant_files(category):
+    return set(category.image_variants['webp'].values())
+
+
+def test_process_renders_variants(category):
+    assert images.is_stale(category)
+    assert images.srcset(category) is None
+
+    assert images.process_pending() == 1
+
+    category.refresh_from_db()
+    variants = category.image_variants
+    assert (variants['source'], variants['width'], variants['height']) == (category.image.name, 64, 48)
+    # Never upscaled: 200 collapses into the original width
+    assert set(variants['webp']) == {'16', '32', '64'}
+    for width, name in variants['webp'].items():
+        with category.image.storage.open(name) as f, Image.open(f) as variant:
+            assert (variant.format, variant.width) == ('WEBP', int(width))
+    assert not images.is_stale(category)
+    assert images.srcset(category)['webp'] == ', '.join(
+        f"{category.image.storage.url(variants['webp'][width])} {width}w" for width in ('16', '32', '64')
+    )
+    assert images.process_pending() == 0
+
+
+def test_replaced_image_is_not_served(category):
+    images.process_pending()
+    category.refresh_from_db()
+    old_files = variant_files(category)
+
+    category.image.save('photo.png', image_file('photo.png', size=(20, 10), fmt='PNG'))
+
+    assert images.is_stale(category)
+    assert images.srcset(category) is None
+    assert images.process_pending() == 1
+    category.refresh_from_db()
+    assert set(category.image_variants['webp']) == {'16', '20'}
+    storage = category.image.storage
+    assert not any(storage.exists(name) for name in old_files)
+
+
+def test_image_replaced_while_rendering(category):
+    rendering = Category.objects.get(pk=category.pk)
+    category.image.save('photo.png', image_file('photo.png'))
+
+    assert not images.process(rendering)
+
+    category.refresh_from_db()
+    assert category.image_variants == {}
+    # The variants rendered from the previous image were deleted
+    _, files = category.image.storage.listdir('categories')
+    assert not [name for name in files if name.endswith('.webp')]
+
+
+def test_undecodable_image_records_error(category):
+    category.image.save('broken.jpg', ContentFile(b'not an image', name='broken.jpg'))
+
+    assert images.process_pending() == 1  # recorded, never retried
+
+    category.refresh_from_db()
+    assert category.image_variants == {'source': category.image.name, 'error': 'UnidentifiedImageError'}
+    assert images.srcset(category) is None
+    assert images.pending(Category) == []
+
+
+def test_failures_are_retried_with_backoff(category):
+    start = timezone.now()
+    with freeze_time(start), mock.patch.object(images, 'render_variants', side_effect=RuntimeError('storage down')):
+        assert images.process_pending() == 0
+        category.refresh_from_db()
+        assert category.image_variants['attempts'] == 1
+        assert category.image_variants['error'] == 'RuntimeError'
+        assert images.srcset(category) is None
+        assert images.pending(Category) == []
+
+    due = start + timedelta(seconds=images.RETRY_DELAY)
+    with freeze_time(due), mock.patch.object(images, 'render_variants', side_effect=RuntimeError('storage down')):
+        assert images.pending(Category) == [category]
+        images.process_pending()
+        category.refresh_from_db()
+        assert category.image_variants['attempts'] == 2
+        assert category.image_variants['retry_at'] == (due + timedelta(seconds=2 * images.RETRY_DELAY)).isoformat()
+
+    with freeze_time(due + timedelta(seconds=2 * images.RETRY_DELAY)):
+        assert images.process_pending() == 1
+    category.refresh_from_db()
+    assert 'error' not in category.image_variants
+    assert images.srcset(category) is not None
@@ -3,6 +3,7 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
 from django_filters.rest_framework import DjangoFilterBackend
+from apps.core.renderers import ORJSONRenderer
 from .models import District, Category, SubType, Pricing, WorkingHours, Holiday, BookingSettings
 from .serializers import (
     DistrictSerializer,
@@ -18,6 +19,7 @@ from .serializers import (
 class DistrictViewSet(viewsets.ReadOnlyModelViewSet):
     """Districts where service is available."""
     
+    read_replica = 'anonymous'
     queryset = District.objects.filter(is_active=True)
     serializer_class = DistrictSerializer
     permission_classes = (AllowAny,)
@@ -36,9 +38,12 @@ class DistrictViewSet(viewsets.ReadOnlyModelViewSet):
 class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
     """Service categories."""
     
+    query_budget = 10
+    read_replica = 'anonymous'
     queryset = Category.objects.filter(is_active=True).prefetch_related('subtypes__pricing')
     serializer_class = CategorySerializer
     permission_classes = (AllowAny,)
+    renderer_classes = [ORJSONRenderer]
     lookup_field = 'slug'
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name_en', 'name_tr']
@@ -54,9 +59,12 @@ class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
 class SubTypeViewSet(viewsets.ReadOnlyModelViewSet):
     """Service subtypes."""
     
+    query_budget = 10
+    read_replica = 'anonymous'
     queryset = SubType.objects.filter(is_active=True).select_related('category').prefetch_related('pricing')
     serializer_class = SubTypeSerializer
     permission_classes = (AllowAny,)
+    renderer_classes = [ORJSONRenderer]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
     filterset_fields = ['category', 'category__slug']
     search_fields = ['name_en', 'name_tr']
@@ -9,10 +9,13 @@ https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 
 import os
 
+from config import startup  # imported first to time application loading
+
 from django.core.asgi import get_asgi_application
 from channels.routing import ProtocolTypeRouter, URLRouter
 from channels.auth import AuthMiddlewareStack
 from channels.security.websocket import AllowedHostsOriginValidator
+from config.streaming import DisconnectMiddleware
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
@@ -21,7 +24,7 @@ django_asgi_app = get_asgi_application()
 from apps.bookings import routing as bookings_routing
 
 application = ProtocolTypeRouter({
-    "http": django_asgi_app,
+    "http": DisconnectMiddleware(django_asgi_app),
     "websocket": AllowedHostsOriginValidator(
         AuthMiddlewareStack(
             URLRouter(
@@ -30,3 +33,5 @@ application = ProtocolTypeRouter({
         )
     ),
 })
+
+startup.application_ready()
@@ -0,0 +1,121 @@
+"""
+Response compression.
+
+``CompressionMiddleware`` compresses API responses with brotli (when the
+``brotli`` package is installed and the client accepts ``br``) or gzip:
+
+- only bodies of at least ``RESPONSE_COMPRESSION_MIN_SIZE`` bytes, whose
+  content type is in ``COMPRESSIBLE_TYPES``;
+- never streaming responses (notification streams, files served by
+  whitenoise, which sends its own precompressed ``.br``/``.gz`` copies) or
+  responses that already have a ``Content-Encoding``;
+- never HTML: admin pages carry CSRF tokens next to reflected input, the
+  setup BREACH attacks compression of.
+
+Levels are tuned for dynamic responses; compare them with
+``manage.py bench_compression``.
+"""
+import gzip
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+COMPRESSIBLE_TYPES = frozenset({
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml',
+    'text/css',
+    'text/csv',
+    'text/javascript',
+    'text/plain',
+    'text/xml',
+})
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+
+
+def accepted_encodings(header):
+    """Codings of an ``Accept-Encoding`` header that are not refused with ``q=0``."""
+    accepted = set()
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        quality = params.strip()
+        if quality.startswith('q='):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if coding:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def compress(content, encoding):
+    if encoding == 'br':
+        return brotli.compress(content, mode=brotli.MODE_TEXT, quality=BROTLI_QUALITY)
+    return gzip.compress(content, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def choose_encoding(accepted):
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted or '*' in accepted:
+        return 'gzip'
+    return None
+
+
+class CompressionMiddleware:
+    """Compress responses with brotli or gzip."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.min_size = settings.RESPONSE_COMPRESSION_MIN_SIZE
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def process_response(self, request, response):
+        if (
+            response.streaming
+            or response.has_header('Content-Encoding')
+            or len(response.content) < self.min_size
+            or response.get('Content-Type', '').split(';')[0].strip().lower() not in COMPRESSIBLE_TYPES
+        ):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', '')))
+        if encoding is None:
+            return response
+
+        compressed = compress(response.content, encoding)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response.headers['Content-Length'] = str(len(compressed))
+        response.headers['Content-Encoding'] = encoding
+
+        # A strong ETag no longer matches the bytes sent (RFC 9110 8.8.1)
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        return response
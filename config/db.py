@@ -0,0 +1,295 @@
+"""
+Database connection management helpers.
+
+Connections are persistent (``CONN_MAX_AGE``) with health checks. Web
+requests run under ``DB_STATEMENT_TIMEOUTS['default']`` and views can opt
+into a different endpoint class with ``statement_timeout``; migrations and
+management commands have no timeout (see ``disable_statement_timeout``).
+
+When a ``replica`` database is configured, views marked with
+``read_replica`` read from it (see ``ReplicaRouter``).
+"""
+import logging
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+from config.db_instrumentation import get_view_attribute, wrap_connections
+
+logger = logging.getLogger(__name__)
+
+REPLICA_DATABASE = 'replica'
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Routing state of the request being served, set by ReplicaRoutingMiddleware
+_routing_state = ContextVar('db_routing_state', default=None)
+
+
+def statement_timeout(timeout_class):
+    """
+    Run a view under the statement timeout of ``timeout_class``
+    (a key of ``settings.DB_STATEMENT_TIMEOUTS``).
+
+    Works on function views (place it above ``@api_view``) and view classes;
+    viewsets can also set a ``statement_timeout_class`` attribute.
+    """
+    def decorator(view):
+        view.statement_timeout_class = timeout_class
+        return view
+    return decorator
+
+
+def disable_statement_timeout(using=DEFAULT_DB_ALIAS):
+    """
+    Lift the statement timeout for the rest of this connection's session,
+    for migrations and batch commands that may run a long statement.
+
+    Does nothing outside PostgreSQL and with ``DB_POOLER``: through a
+    transaction pooler the SET would leak to other clients' sessions, so
+    run long commands over a direct connection there.
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql' or settings.DB_POOLER:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('SET statement_timeout = 0')
+
+
+class StatementTimeout:
+    """
+    ``execute_wrapper`` setting a request's statement timeout on a
+    connection right before its first query, so connections the request
+    never uses are neither opened nor sent a SET.
+    """
+
+    def __init__(self, timeout):
+        self.timeout = timeout
+        self.applied = {}  # alias -> timeout set on its session
+
+    def __call__(self, execute, sql, params, many, context):
+        connection = context['connection']
+        if connection.vendor == 'postgresql' and self.applied.get(connection.alias) != self.timeout:
+            # On the driver cursor: not one of the request's queries
+            with connection.wrap_database_errors, connection.connection.cursor() as cursor:
+                cursor.execute('SET statement_timeout = %s', [self.timeout])
+            self.applied[connection.alias] = self.timeout
+        return execute(sql, params, many, context)
+
+    def reset(self):
+        """Restore the session default on the connections that got a SET and are still open."""
+        for alias in self.applied:
+            connection = connections[alias]
+            if connection.connection is None:
+                continue
+            try:
+                with connection.wrap_database_errors, connection.connection.cursor() as cursor:
+                    cursor.execute('SET statement_timeout TO DEFAULT')
+            except DatabaseError:
+                # Never reuse a session whose timeout could not be restored
+                logger.warning('Could not reset statement_timeout, closing connection', exc_info=True)
+                connection.close()
+        self.applied.clear()
+
+
+class StatementTimeoutMiddleware:
+    """
+    Apply statement timeouts to web requests on PostgreSQL.
+
+    Uses a session-level ``SET`` that is reset after the response, so it is
+    skipped when ``DB_POOLER`` is set: with transaction pooling the session
+    may be handed to another client between statements.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if settings.DB_POOLER:
+            return self.get_response(request)
+
+        request._statement_timeout = StatementTimeout(settings.DB_STATEMENT_TIMEOUTS['default'])
+        try:
+            with ExitStack() as stack:
+                wrap_connections(stack, request._statement_timeout)
+                return self.get_response(request)
+        finally:
+            request._statement_timeout.reset()
+
+    async def __acall__(self, request):
+        if settings.DB_POOLER:
+            return await self.get_response(request)
+
+        request._statement_timeout = StatementTimeout(settings.DB_STATEMENT_TIMEOUTS['default'])
+        try:
+            with ExitStack() as stack:
+                # On the connections of the thread running the request's sync code
+                await sync_to_async(wrap_connections)(stack, request._statement_timeout)
+                return await self.get_response(request)
+        finally:
+            await sync_to_async(request._statement_timeout.reset)()
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timeout_class = get_view_attribute(view_func, 'statement_timeout_class')
+        wrapper = getattr(request, '_statement_timeout', None)
+        if timeout_class and wrapper is not None:
+            # Applied to each connection before its next query
+            wrapper.timeout = settings.DB_STATEMENT_TIMEOUTS[timeout_class]
+        return None
+
+
+def read_replica(mode='always'):
+    """
+    Let a read-only view read from the replica database.
+
+    ``mode`` is ``'always'`` or ``'anonymous'`` (only requests without
+    credentials). Viewsets can set a ``read_replica`` attribute instead.
+    Only safe methods are routed; writes always go to the primary.
+    """
+    def decorator(view):
+        view.read_replica = mode
+        return view
+    return decorator
+
+
+def replica_pin_key(user_id):
+    return f'db:primary_pin:{user_id}'
+
+
+class RoutingState:
+    """Per-request routing decision, consulted by ReplicaRouter."""
+
+    def __init__(self, request):
+        self.request = request
+        self.replica_allowed = False
+        self.wrote = False
+        self.pinned = False
+        self.checked_user_id = None
+        self.resolving_user = False
+
+    def use_replica(self):
+        if not self.replica_allowed or self.wrote or self.resolving_user:
+            return False
+
+        # Resolving a lazy request.user may itself query the database;
+        # those reads go to the primary.
+        self.resolving_user = True
+        try:
+            user = getattr(self.request, 'user', None)
+            authenticated = user is not None and user.is_authenticated
+        finally:
+            self.resolving_user = False
+
+        if not authenticated:
+            return True
+        if self.checked_user_id != user.pk:
+            self.checked_user_id = user.pk
+            self.pinned = cache.get(replica_pin_key(user.pk)) is not None
+        return not self.pinned
+
+
+class ReplicaRouter:
+    """
+    Route reads of ``read_replica`` views to the replica database.
+
+    Everything else, including any read after the request has written and
+    reads by users who wrote within ``DB_REPLICA_PIN_SECONDS``, uses the
+    primary, so users always see their own writes.
+    """
+
+    def db_for_read(self, model, **hints):
+        if REPLICA_DATABASE not in settings.DATABASES:
+            return None
+        state = _routing_state.get()
+        if state is None or not state.use_replica():
+            return None
+        return REPLICA_DATABASE
+
+    def db_for_write(self, model, **hints):
+        state = _routing_state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        aliases = {DEFAULT_DB_ALIAS, REPLICA_DATABASE}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == REPLICA_DATABASE:
+            return False
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Track routing state per request for ReplicaRouter and pin users to the
+    primary for ``DB_REPLICA_PIN_SECONDS`` after a request that wrote.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if REPLICA_DATABASE not in settings.DATABASES:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = RoutingState(request)
+        token = _routing_state.set(state)
+        try:
+            response = self.get_response(request)
+            if state.wrote:
+                self.pin_to_primary(request)
+        finally:
+            _routing_state.reset(token)
+        return response
+
+    async def __acall__(self, request):
+        # sync_to_async copies the context, so the router sees this state
+        # from the thread running the request's queries
+        state = RoutingState(request)
+        token = _routing_state.set(state)
+        try:
+            response = await self.get_response(request)
+            if state.wrote:
+                # request.user may still be lazy and need the database
+                await sync_to_async(self.pin_to_primary)(request)
+        finally:
+            _routing_state.reset(token)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        mode = get_view_attribute(view_func, 'read_replica')
+        if not mode or request.method not in SAFE_METHODS:
+            return None
+        if mode == 'anonymous' and 'HTTP_AUTHORIZATION' in request.META:
+            return None
+        _routing_state.get().replica_allowed = True
+        return None
+
+    def pin_to_primary(self, request):
+        # DRF sets the authenticated user back on the underlying HttpRequest
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            cache.set(replica_pin_key(user.pk), 1, settings.DB_REPLICA_PIN_SECONDS)
@@ -0,0 +1,173 @@
+"""
+Per-request database instrumentation.
+
+Records query count, total DB time and repeated SQL fingerprints for every
+request, exposes them as ``X-DB-*`` response headers outside production and
+logs a structured warning when a view runs more queries than its budget.
+"""
+import hashlib
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.dispatch import Signal
+
+logger = logging.getLogger(__name__)
+
+# Sent whenever a request exceeds its query budget (used by config.pytest_plugin).
+query_budget_exceeded = Signal()
+
+_WHITESPACE_RE = re.compile(r'\s+')
+_IN_LIST_RE = re.compile(r'IN \((?:%s, )*%s\)')
+
+
+def query_budget(limit):
+    """
+    Declare the maximum number of queries a view may run per request.
+
+    Works on function views (place it above ``@api_view``) and on view
+    classes; viewsets can also set a ``query_budget`` class attribute.
+    """
+    def decorator(view):
+        view.query_budget = limit
+        return view
+    return decorator
+
+
+def fingerprint(sql):
+    """Return a short stable hash for a parametrised SQL statement."""
+    normalized = _IN_LIST_RE.sub('IN (...)', _WHITESPACE_RE.sub(' ', sql.strip()))
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()[:12]
+
+
+class QueryRecorder:
+    """``execute_wrapper`` callable collecting timings for one request."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    @property
+    def duplicates(self):
+        """Fingerprints executed more than once, most frequent first."""
+        return [(fp, n) for fp, n in self.fingerprints.most_common() if n > 1]
+
+
+def wrap_connections(stack, wrapper):
+    """Install an ``execute_wrapper`` on every configured connection of this thread until ``stack`` closes."""
+    for alias in connections:
+        stack.enter_context(connections[alias].execute_wrapper(wrapper))
+
+
+def get_view_attribute(view_func, name):
+    """Read a declaration from a view function or, for ``as_view()`` views, its class."""
+    value = getattr(view_func, name, None)
+    if value is None:
+        value = getattr(getattr(view_func, 'cls', None), name, None)
+    return value
+
+
+def get_view_budget(view_func):
+    """Resolve the declared budget of a view, falling back to the default."""
+    budget = get_view_attribute(view_func, 'query_budget')
+    if budget is None:
+        budget = getattr(settings, 'QUERY_BUDGET_DEFAULT', None)
+    return budget
+
+
+def get_view_name(view_func):
+    """Dotted name of the view; ``as_view()`` wrappers report their class."""
+    view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+    name = view_class.__name__ if view_class else view_func.__name__
+    return f'{view_func.__module__}.{name}'
+
+
+class QueryInstrumentationMiddleware:
+    """Measure the queries run by each request against every configured database."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        recorder = self.start(request)
+        with ExitStack() as stack:
+            wrap_connections(stack, recorder)
+            response = self.get_response(request)
+        return self.finish(request, response, recorder)
+
+    async def __acall__(self, request):
+        recorder = self.start(request)
+        with ExitStack() as stack:
+            # Connections are per thread: wrap those of the thread the
+            # request's sync code (views, ORM calls) runs in
+            await sync_to_async(wrap_connections)(stack, recorder)
+            response = await self.get_response(request)
+        return self.finish(request, response, recorder)
+
+    def start(self, request):
+        request._query_budget = None
+        request._query_view = None
+        return QueryRecorder()
+
+    def finish(self, request, response, recorder):
+        self.check_budget(request, response, recorder)
+
+        if getattr(settings, 'QUERY_BUDGET_HEADERS', False):
+            response['X-DB-Query-Count'] = str(recorder.count)
+            response['X-DB-Time-Ms'] = f'{recorder.duration * 1000:.2f}'
+            response['X-DB-Duplicate-Queries'] = ', '.join(
+                f'{fp}:{n}' for fp, n in recorder.duplicates[:5]
+            )
+            if request._query_budget is not None:
+                response['X-DB-Query-Budget'] = str(request._query_budget)
+
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._query_budget = get_view_budget(view_func)
+        request._query_view = get_view_name(view_func)
+        return None
+
+    def check_budget(self, request, response, recorder):
+        budget = request._query_budget
+        if budget is None or recorder.count <= budget:
+            return
+
+        report = {
+            'view': request._query_view,
+            'path': request.path,
+            'method': request.method,
+            'status_code': response.status_code,
+            'query_count': recorder.count,
+            'query_budget': budget,
+            'db_time_ms': round(recorder.duration * 1000, 2),
+            'duplicate_queries': dict(recorder.duplicates[:10]),
+        }
+        logger.warning(
+            'Query budget exceeded for %s: %d queries (budget %d)',
+            report['view'], recorder.count, budget,
+            extra={'query_budget': report},
+        )
+        query_budget_exceeded.send(sender=self.__class__, report=report)
@@ -0,0 +1,47 @@
+"""
+pytest plugin enforcing the query budgets declared on API views.
+
+Any test that drives a view from ``apps/*/views.py`` through the Django test
+client fails if that request runs more queries than the view's budget
+(see ``config.db_instrumentation.query_budget``).
+
+Registered in the root ``conftest.py``, so plain ``pytest`` enforces it.
+Individual tests can opt out with ``@pytest.mark.no_query_budget``.
+"""
+import re
+
+import pytest
+
+APP_VIEWS_RE = re.compile(r'^apps\.\w+\.views\.')
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        'markers',
+        'no_query_budget: do not fail the test when a view exceeds its query budget',
+    )
+
+
+@pytest.fixture(autouse=True)
+def _enforce_query_budgets(request):
+    from config.db_instrumentation import query_budget_exceeded
+
+    breaches = []
+
+    def record(sender, report, **kwargs):
+        if report['view'] and APP_VIEWS_RE.match(report['view']):
+            breaches.append(report)
+
+    query_budget_exceeded.connect(record, weak=False)
+    try:
+        yield breaches
+    finally:
+        query_budget_exceeded.disconnect(record)
+
+    if breaches and request.node.get_closest_marker('no_query_budget') is None:
+        lines = [
+            f"{b['method']} {b['path']} ({b['view']}): "
+            f"{b['query_count']} queries, budget {b['query_budget']}"
+            for b in breaches
+        ]
+        pytest.fail('Query budget exceeded:\n' + '\n'.join(lines), pytrace=False)
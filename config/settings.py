@@ -52,8 +52,12 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'config.compression.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'config.db_instrumentation.QueryInstrumentationMiddleware',
+    'config.db.StatementTimeoutMiddleware',
+    'config.db.ReplicaRoutingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.locale.LocaleMiddleware',
@@ -64,6 +68,9 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Responses smaller than this are sent uncompressed (config.compression)
+RESPONSE_COMPRESSION_MIN_SIZE = env.int('RESPONSE_COMPRESSION_MIN_SIZE', default=1024)
+
 ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
@@ -84,7 +91,27 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'config.wsgi.application'
 
+# 'wsgi' (sync gunicorn workers) or 'asgi' (uvicorn workers), see gunicorn.conf.py
+SERVER_MODE = env('SERVER_MODE', default='wsgi')
+
 # Database - PostgreSQL
+# DB_POOLER: '' for direct connections, 'pgbouncer' when connecting through a
+# transaction-pooling proxy (no server-side cursors, no session-level SETs).
+DB_POOLER = env('DB_POOLER', default='')
+
+# Statement timeouts (ms) of web requests per endpoint class, see config.db.statement_timeout.
+# Migrations and management commands run without one.
+DB_STATEMENT_TIMEOUTS = {
+    'default': env.int('DB_STATEMENT_TIMEOUT', default=15000),
+    'report': env.int('DB_REPORT_STATEMENT_TIMEOUT', default=60000),
+}
+
+DB_OPTIONS = {
+    'connect_timeout': env.int('DB_CONNECT_TIMEOUT', default=5),
+}
+if env('DB_OPTIONS', default='').startswith('sslmode=require'):
+    DB_OPTIONS['sslmode'] = 'require'
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
@@ -93,12 +120,61 @@ DATABASES = {
         'PASSWORD': env('DB_PASSWORD'),
         'HOST': env('DB_HOST'),
         'PORT': env('DB_PORT'),
-        'OPTIONS': {
-            'sslmode': 'require',
-        } if env('DB_OPTIONS', default='').startswith('sslmode=require') else {},
+        # Reuse connections across requests instead of a new TLS handshake each time.
+        # Under ASGI each request runs DB work in its own thread, so persistent
+        # connections would never be reused; close them and use DB_POOLER instead.
+        'CONN_MAX_AGE': env.int('DB_CONN_MAX_AGE', default=0 if SERVER_MODE == 'asgi' else 60),
+        'CONN_HEALTH_CHECKS': True,
+        'DISABLE_SERVER_SIDE_CURSORS': DB_POOLER == 'pgbouncer',
+        'OPTIONS': DB_OPTIONS,
     }
 }
 
+# Optional read replica for admin analytics and anonymous catalog reads
+if env('DB_REPLICA_HOST', default=''):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': env('DB_REPLICA_HOST'),
+        'PORT': env('DB_REPLICA_PORT', default=DATABASES['default']['PORT']),
+        'OPTIONS': dict(DB_OPTIONS),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['config.db.ReplicaRouter']
+
+# Seconds a user's reads stay on the primary after one of their writes
+DB_REPLICA_PIN_SECONDS = env.int('DB_REPLICA_PIN_SECONDS', default=10)
+
+# Query instrumentation: per-request query count/DB time, budget warnings.
+# Views declare budgets with config.db_instrumentation.query_budget.
+QUERY_BUDGET_DEFAULT = env.int('QUERY_BUDGET_DEFAULT', default=50)
+QUERY_BUDGET_HEADERS = env.bool('QUERY_BUDGET_HEADERS', default=DEBUG)
+
+# Cache (shared between workers when CACHE_URL points at Redis)
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+
+# Admin dashboard stats are cached briefly; concurrent pollers share one computation
+ADMIN_STATS_CACHE_TIMEOUT = env.int('ADMIN_STATS_CACHE_TIMEOUT', default=5)
+
+# Unread notification counters live in the cache; they expire after this many
+# seconds and run_periodic_tasks --task=reconcile_unread corrects drift
+NOTIFICATION_COUNT_TIMEOUT = env.int('NOTIFICATION_COUNT_TIMEOUT', default=86400)
+
+# Admin notifications older than this are deleted by manage.py purge_admin_notifications
+ADMIN_NOTIFICATION_RETENTION_DAYS = env.int('ADMIN_NOTIFICATION_RETENTION_DAYS', default=180)
+
+# Notification streams (Server-Sent Events, SERVER_MODE=asgi only): heartbeat
+# and maximum lifetime in seconds, client reconnect delay, and how many missed
+# notifications are replayed on resume before asking the client to reload, and
+# how long a stream token (?token= in the stream URL) can open a stream
+NOTIFICATION_STREAM_HEARTBEAT = env.int('NOTIFICATION_STREAM_HEARTBEAT', default=15)
+NOTIFICATION_STREAM_MAX_AGE = env.int('NOTIFICATION_STREAM_MAX_AGE', default=1800)
+NOTIFICATION_STREAM_RETRY_MS = env.int('NOTIFICATION_STREAM_RETRY_MS', default=3000)
+NOTIFICATION_STREAM_BACKLOG = env.int('NOTIFICATION_STREAM_BACKLOG', default=200)
+NOTIFICATION_STREAM_TOKEN_LIFETIME = env.int('NOTIFICATION_STREAM_TOKEN_LIFETIME', default=60)
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -160,13 +236,21 @@ else:
     MEDIA_URL = '/media/'
     MEDIA_ROOT = BASE_DIR / 'media'
 
+# Seconds a presigned direct upload (POST /api/core/uploads/) stays valid
+DIRECT_UPLOAD_EXPIRES = env.int('DIRECT_UPLOAD_EXPIRES', default=600)
+
+# Catalog image variants rendered by manage.py process_images (avif needs pillow-avif-plugin)
+IMAGE_VARIANT_WIDTHS = [int(width) for width in env.list('IMAGE_VARIANT_WIDTHS', default=['320', '640', '1280'])]
+IMAGE_VARIANT_FORMATS = env.list('IMAGE_VARIANT_FORMATS', default=['webp'])
+IMAGE_VARIANT_QUALITY = env.int('IMAGE_VARIANT_QUALITY', default=80)
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.accounts.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -187,6 +271,24 @@ REST_FRAMEWORK = {
         'rest_framework.parsers.MultiPartParser',
     ),
     'EXCEPTION_HANDLER': 'config.exceptions.custom_exception_handler',
+    # Token buckets in the shared cache (apps.core.throttling)
+    'DEFAULT_THROTTLE_CLASSES': (
+        'apps.core.throttling.IPRateThrottle',
+        'apps.core.throttling.UserRateThrottle',
+        'apps.core.throttling.ScopedRateThrottle',
+    ),
+    'DEFAULT_THROTTLE_RATES': {
+        'ip': '300/min',
+        'user': '600/min',
+        'login': '10/min',
+        'register': '5/hour',
+        'booking_create': '20/hour',
+        'payment': '10/min',
+        'fcm_token': '30/hour',
+        **env.dict('THROTTLE_RATES', default={}),
+    },
+    # Proxies in front of the app (Railway: 1); client IPs are read from X-Forwarded-For
+    'NUM_PROXIES': env.int('NUM_PROXIES', default=1),
 }
 
 # JWT Settings
@@ -194,7 +296,10 @@ SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=env.int('JWT_ACCESS_TOKEN_LIFETIME')),
     'REFRESH_TOKEN_LIFETIME': timedelta(minutes=env.int('JWT_REFRESH_TOKEN_LIFETIME')),
     'ROTATE_REFRESH_TOKENS': True,
+    # Used refresh tokens are revoked in the cache-backed token denylist
+    # (apps.accounts.token_denylist), not in token_blacklist tables
     'BLACKLIST_AFTER_ROTATION': True,
+    'TOKEN_REFRESH_SERIALIZER': 'apps.accounts.serializers.DenylistTokenRefreshSerializer',
     'UPDATE_LAST_LOGIN': True,
     'ALGORITHM': 'HS256',
     'SIGNING_KEY': SECRET_KEY,
@@ -202,8 +307,14 @@ SIMPLE_JWT = {
     'AUTH_HEADER_NAME': 'HTTP_AUTHORIZATION',
     'USER_ID_FIELD': 'id',
     'USER_ID_CLAIM': 'user_id',
+    # Tokens carry a hash of the password they were issued for; changing the
+    # password revokes them
+    'CHECK_REVOKE_TOKEN': True,
 }
 
+# Seconds a user resolved from a JWT stays cached (apps.accounts.authentication)
+AUTH_USER_CACHE_TIMEOUT = env.int('AUTH_USER_CACHE_TIMEOUT', default=60)
+
 # CORS
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = True
@@ -250,6 +361,27 @@ TWILIO_PHONE_NUMBER = env('TWILIO_PHONE_NUMBER')
 IYZICO_API_KEY = env('IYZICO_API_KEY')
 IYZICO_SECRET_KEY = env('IYZICO_SECRET_KEY')
 IYZICO_BASE_URL = env('IYZICO_BASE_URL')
+IYZICO_CONNECT_TIMEOUT = env.float('IYZICO_CONNECT_TIMEOUT', default=3)
+IYZICO_READ_TIMEOUT = env.float('IYZICO_READ_TIMEOUT', default=15)
+IYZICO_MAX_CONNECTIONS = env.int('IYZICO_MAX_CONNECTIONS', default=20)
+# Consecutive gateway failures before failing fast, and for how long (seconds)
+IYZICO_CIRCUIT_FAILURES = env.int('IYZICO_CIRCUIT_FAILURES', default=5)
+IYZICO_CIRCUIT_RESET_TIMEOUT = env.int('IYZICO_CIRCUIT_RESET_TIMEOUT', default=30)
+
+# Full gateway responses/webhook payloads are stored compressed and deleted
+# after the retention period (manage.py sweep_payloads)
+PAYLOAD_CODEC = env('PAYLOAD_CODEC', default='gzip')
+PAYLOAD_RETENTION_DAYS = env.int('PAYLOAD_RETENTION_DAYS', default=90)
+
+# Stuck transaction reconciliation (manage.py reconcile_transactions)
+PAYMENT_RECONCILE_AFTER_MINUTES = env.int('PAYMENT_RECONCILE_AFTER_MINUTES', default=15)
+PAYMENT_ABANDON_AFTER_MINUTES = env.int('PAYMENT_ABANDON_AFTER_MINUTES', default=60)
+
+# Processing attempts before a webhook event needs a manual replay
+WEBHOOK_MAX_ATTEMPTS = env.int('WEBHOOK_MAX_ATTEMPTS', default=5)
+# Seconds before retrying a failed webhook event, doubled after every attempt up to the max
+WEBHOOK_RETRY_DELAY = env.int('WEBHOOK_RETRY_DELAY', default=30)
+WEBHOOK_RETRY_MAX_DELAY = env.int('WEBHOOK_RETRY_MAX_DELAY', default=3600)
 
 STRIPE_PUBLIC_KEY = env('STRIPE_PUBLIC_KEY')
 STRIPE_SECRET_KEY = env('STRIPE_SECRET_KEY')
@@ -0,0 +1,40 @@
+"""
+Boot timing for web processes.
+
+Imported first by config.wsgi/config.asgi; records how long loading the
+application took and the latency of the first request served, and exposes
+both through the health check.
+"""
+import logging
+import os
+import time
+
+from django.core.signals import request_finished, request_started
+
+logger = logging.getLogger(__name__)
+
+_loading_started = time.monotonic()
+_first_request_started = None
+
+# Reported by apps.core.health
+timings = {'pid': os.getpid()}
+
+
+def application_ready():
+    """Call once the WSGI/ASGI application object has been built."""
+    timings['load_ms'] = round((time.monotonic() - _loading_started) * 1000, 1)
+    logger.info('Application loaded in %.0f ms (pid %d)', timings['load_ms'], timings['pid'])
+    request_started.connect(_on_first_request_started, dispatch_uid='startup_first_request')
+
+
+def _on_first_request_started(sender, **kwargs):
+    global _first_request_started
+    request_started.disconnect(dispatch_uid='startup_first_request')
+    _first_request_started = time.monotonic()
+    request_finished.connect(_on_first_request_finished, dispatch_uid='startup_first_request')
+
+
+def _on_first_request_finished(sender, **kwargs):
+    request_finished.disconnect(dispatch_uid='startup_first_request')
+    timings['first_request_ms'] = round((time.monotonic() - _first_request_started) * 1000, 1)
+    logger.info('First request served in %.0f ms', timings['first_request_ms'])
@@ -8,8 +8,10 @@ from storages.backends.s3boto3 import S3Boto3Storage
 class MediaStorage(S3Boto3Storage):
     """
     Custom storage backend for media files
-    Stores all files in the 'haliyikama' folder on DigitalOcean Spaces
+    Stores all files in the 'haliyikama' folder on DigitalOcean Spaces.
+    File names are unique UUIDs (apps.core.uploads.UploadTo), so saving
+    does not probe the bucket for a free name.
     """
     location = settings.AWS_LOCATION
-    file_overwrite = False
+    file_overwrite = True
     default_acl = settings.AWS_DEFAULT_ACL
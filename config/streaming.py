@@ -0,0 +1,60 @@
+"""
+Client disconnect detection for long-lived streaming responses.
+
+Django 4.2 never reads from the ASGI connection after the request body, so a
+streaming view keeps running after the client went away (uvicorn silently
+drops the writes). ``DisconnectMiddleware`` wraps the ASGI application and,
+for streaming paths, listens for ``http.disconnect`` once the body has been
+read, exposing it to views as an ``asyncio.Event``::
+
+    disconnected = disconnect_event(request)
+    ...
+    if disconnected.is_set():
+        return
+"""
+import asyncio
+
+STREAM_PATH_SUFFIX = '/stream/'
+SCOPE_KEY = 'client_disconnected'
+
+
+class DisconnectMiddleware:
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not scope['path'].endswith(STREAM_PATH_SUFFIX):
+            return await self.app(scope, receive, send)
+
+        disconnected = asyncio.Event()
+        scope[SCOPE_KEY] = disconnected
+        listener = None
+
+        async def listen():
+            while True:
+                message = await receive()
+                if message['type'] == 'http.disconnect':
+                    disconnected.set()
+                    return
+
+        async def wrapped_receive():
+            nonlocal listener
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                disconnected.set()
+            elif not message.get('more_body') and listener is None:
+                listener = asyncio.ensure_future(listen())
+            return message
+
+        try:
+            await self.app(scope, wrapped_receive, send)
+        finally:
+            if listener is not None:
+                listener.cancel()
+
+
+def disconnect_event(request):
+    """The request's disconnect event; one that never fires outside ``DisconnectMiddleware``."""
+    scope = getattr(request, 'scope', None) or {}
+    return scope.get(SCOPE_KEY) or asyncio.Event()
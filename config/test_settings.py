@@ -0,0 +1,46 @@
+"""
+Settings for the test suite (selected in pytest.ini).
+
+Runs without a .env or any service: SQLite, local media and locmem cache.
+A ``replica`` alias mirrors ``default`` so views marked ``read_replica``
+are routed as in production (see ``config.db``). The replica is a second
+connection, it only sees committed rows: tests that hit those views need
+``@pytest.mark.django_db(transaction=True, databases=['default', 'replica'])``.
+"""
+import os
+
+for name, value in {
+    'SECRET_KEY': 'insecure-test-key-only-used-by-the-test-suite',
+    'ALLOWED_HOSTS': '*',
+    'USE_S3': 'False',
+    'DB_NAME': 'test', 'DB_USER': '', 'DB_PASSWORD': '', 'DB_HOST': '', 'DB_PORT': '',
+    'JWT_ACCESS_TOKEN_LIFETIME': '60', 'JWT_REFRESH_TOKEN_LIFETIME': '1440',
+    'CORS_ALLOWED_ORIGINS': 'http://localhost',
+    'EMAIL_BACKEND': 'django.core.mail.backends.locmem.EmailBackend',
+    'EMAIL_HOST': 'localhost', 'EMAIL_PORT': '25', 'EMAIL_USE_TLS': 'False', 'EMAIL_HOST_USER': '', 'EMAIL_HOST_PASSWORD': '',
+    'DEFAULT_FROM_EMAIL': 'test@example.com',
+    'TWILIO_ACCOUNT_SID': 'test', 'TWILIO_AUTH_TOKEN': 'test', 'TWILIO_PHONE_NUMBER': '+15005550006',
+    'IYZICO_API_KEY': 'test', 'IYZICO_SECRET_KEY': 'test', 'IYZICO_BASE_URL': 'http://iyzico.test',
+    'STRIPE_PUBLIC_KEY': 'test', 'STRIPE_SECRET_KEY': 'test', 'STRIPE_WEBHOOK_SECRET': 'test',
+    'FRONTEND_URL': 'http://localhost:3000',
+    'FIREBASE_PROJECT_ID': '', 'FIREBASE_PRIVATE_KEY': '', 'FIREBASE_CLIENT_EMAIL': '',
+    'CACHE_URL': 'locmemcache://',
+}.items():
+    os.environ.setdefault(name, value)
+
+from config.settings import *  # noqa: E402,F401,F403
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    },
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+        'TEST': {'MIRROR': 'default'},
+    },
+}
+
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage'
@@ -0,0 +1,78 @@
+import gzip
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.http import HttpResponse, JsonResponse
+from django.test import AsyncClient
+from django.urls import path
+
+from config import compression
+
+pytestmark = pytest.mark.urls(__name__)
+
+ITEMS = [{'id': i, 'name': f'Halı yıkama {i}', 'price': '125.00'} for i in range(200)]
+
+
+def large_json(request):
+    return JsonResponse({'results': ITEMS})
+
+
+def small_json(request):
+    return JsonResponse({'ok': True})
+
+
+def html(request):
+    return HttpResponse('<p>' + 'x' * 5000 + '</p>')
+
+
+urlpatterns = [
+    path('large/', large_json),
+    path('small/', small_json),
+    path('html/', html),
+]
+
+
+@pytest.fixture(params=['wsgi', 'asgi'])
+def get(request, client):
+    if request.param == 'asgi':
+        async_client = AsyncClient()
+
+        def get(url, accept_encoding):
+            return async_to_sync(async_client.get)(url, headers={'Accept-Encoding': accept_encoding})
+        return get
+    return lambda url, accept_encoding: client.get(url, HTTP_ACCEPT_ENCODING=accept_encoding)
+
+
+def test_gzip(get):
+    response = get('/large/', 'gzip, deflate')
+
+    assert response['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response['Vary']
+    assert int(response['Content-Length']) == len(response.content)
+    assert gzip.decompress(response.content) == JsonResponse({'results': ITEMS}).content
+
+
+def test_brotli_preferred(get):
+    brotli = pytest.importorskip('brotli')
+
+    response = get('/large/', 'gzip, br')
+
+    assert response['Content-Encoding'] == 'br'
+    assert brotli.decompress(response.content) == JsonResponse({'results': ITEMS}).content
+
+
+@pytest.mark.parametrize('url, accept_encoding', [
+    ('/large/', 'identity'),
+    ('/large/', 'gzip;q=0'),
+    ('/small/', 'gzip'),
+    ('/html/', 'gzip'),
+])
+def test_not_compressed(get, url, accept_encoding):
+    response = get(url, accept_encoding)
+
+    assert not response.has_header('Content-Encoding')
+
+
+def test_accepted_encodings():
+    assert compression.accepted_encodings('gzip;q=1.0, br;q=0, *;q=0.5') == {'gzip', '*'}
+    assert compression.accepted_encodings('') == set()
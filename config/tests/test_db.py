@@ -0,0 +1,147 @@
+import uuid
+from datetime import timedelta
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.db import router
+from django.test import AsyncClient
+from django.urls import path
+from freezegun import freeze_time
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.accounts.models import User
+from apps.services.models import District
+from config import db
+
+pytestmark = [
+    # The replica only sees committed rows (see config.test_settings)
+    pytest.mark.django_db(transaction=True, databases=['default', 'replica']),
+    pytest.mark.urls(__name__),
+]
+
+
+def read_users():
+    return User.objects.order_by('pk').first()._state.db
+
+
+@db.read_replica('always')
+@api_view(['GET', 'POST'])
+@permission_classes([AllowAny])
+def always_view(request):
+    return Response({'db': read_users()})
+
+
+@db.read_replica('anonymous')
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def anonymous_view(request):
+    return Response({'db': read_users()})
+
+
+@db.read_replica('always')
+@api_view(['GET', 'POST'])
+@permission_classes([AllowAny])
+def write_view(request):
+    before = read_users()
+    district = District.objects.create(name=uuid.uuid4().hex)
+    return Response({'before': before, 'write': district._state.db, 'after': read_users()})
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def plain_view(request):
+    return Response({'db': read_users()})
+
+
+urlpatterns = [
+    path('always/', always_view),
+    path('anonymous/', anonymous_view),
+    path('write/', write_view),
+    path('plain/', plain_view),
+]
+
+
+@pytest.fixture(autouse=True)
+def clear_pins():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user(
+        email='customer@example.com', password='secret', first_name='Ayşe', last_name='Yılmaz'
+    )
+
+
+@pytest.fixture
+def auth(user):
+    return {'HTTP_AUTHORIZATION': f'Bearer {RefreshToken.for_user(user).access_token}'}
+
+
+def test_always_reads_from_replica(client, user, auth):
+    assert client.get('/always/').json() == {'db': 'replica'}
+    assert client.get('/always/', **auth).json() == {'db': 'replica'}
+
+
+def test_anonymous_reads_from_replica_only_without_credentials(client, user, auth):
+    assert client.get('/anonymous/').json() == {'db': 'replica'}
+    assert client.get('/anonymous/', **auth).json() == {'db': 'default'}
+
+
+def test_unmarked_views_and_unsafe_methods_read_from_primary(client, user):
+    assert client.get('/plain/').json() == {'db': 'default'}
+    assert client.post('/always/').json() == {'db': 'default'}
+
+
+def test_writes_go_to_primary(client, user):
+    response = client.get('/write/').json()
+
+    assert response == {'before': 'replica', 'write': 'default', 'after': 'default'}
+    assert router.db_for_write(User) == 'default'
+
+
+def test_write_pins_user_to_primary_until_expiry(client, user, auth, settings):
+    settings.DB_REPLICA_PIN_SECONDS = 10
+
+    with freeze_time() as frozen:
+        client.post('/write/', **auth)
+        assert cache.get(db.replica_pin_key(user.pk)) is not None
+        assert client.get('/always/', **auth).json() == {'db': 'default'}
+        # Other clients are not affected
+        assert client.get('/always/').json() == {'db': 'replica'}
+
+        frozen.tick(timedelta(seconds=11))
+        assert cache.get(db.replica_pin_key(user.pk)) is None
+        assert client.get('/always/', **auth).json() == {'db': 'replica'}
+
+
+def test_routing_state_is_reset_between_requests(client, user):
+    assert db._routing_state.get() is None
+
+    client.get('/write/')
+
+    assert db._routing_state.get() is None
+    # The write of the previous request does not keep this one on the primary
+    assert client.get('/always/').json() == {'db': 'replica'}
+    # Outside a request nothing is routed to the replica
+    assert router.db_for_read(User) == 'default'
+
+
+def test_async_requests_are_routed(user, auth):
+    client = AsyncClient()
+    get = async_to_sync(client.get)
+    headers = {'Authorization': auth['HTTP_AUTHORIZATION']}
+
+    assert get('/always/').json() == {'db': 'replica'}
+    assert get('/anonymous/', headers=headers).json() == {'db': 'default'}
+
+    async_to_sync(client.post)('/write/', headers=headers)
+    assert get('/always/', headers=headers).json() == {'db': 'default'}
+    assert get('/always/').json() == {'db': 'replica'}
+    assert db._routing_state.get() is None
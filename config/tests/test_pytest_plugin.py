@@ -0,0 +1,87 @@
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+
+from apps.services.models import Category
+from apps.services.views import CategoryViewSet
+
+# The catalog is read from the replica for anonymous clients
+pytestmark = pytest.mark.django_db(transaction=True, databases=['default', 'replica'])
+
+CATALOG_URL = '/api/services/categories/'
+
+
+@pytest.fixture
+def categories():
+    for slug in ('carpet', 'sofa'):
+        Category.objects.create(name=slug, slug=slug, pricing_type='per_sqm')
+
+
+def test_view_within_budget_passes(client, categories, _enforce_query_budgets):
+    response = client.get(CATALOG_URL)
+
+    assert response.status_code == 200
+    assert _enforce_query_budgets == []
+
+
+@pytest.mark.no_query_budget
+def test_view_over_budget_is_reported(client, categories, monkeypatch, _enforce_query_budgets):
+    monkeypatch.setattr(CategoryViewSet, 'query_budget', 1)
+
+    response = client.get(CATALOG_URL)
+
+    assert response.status_code == 200
+    [breach] = _enforce_query_budgets
+    assert breach['view'] == 'apps.services.views.CategoryViewSet'
+    assert breach['method'] == 'GET'
+    assert breach['path'] == CATALOG_URL
+    assert breach['query_budget'] == 1
+    assert breach['query_count'] > 1
+
+
+def test_over_budget_fails_the_test(pytester, monkeypatch, settings):
+    monkeypatch.setenv('PYTHONPATH', str(settings.BASE_DIR))
+    pytester.makeconftest("pytest_plugins = ['config.pytest_plugin']")
+    pytester.makepyfile("""
+        from config.db_instrumentation import query_budget_exceeded
+
+        REPORT = {
+            'view': 'apps.services.views.CategoryViewSet', 'path': '/api/services/categories/',
+            'method': 'GET', 'query_count': 12, 'query_budget': 10,
+        }
+
+        def test_breach():
+            query_budget_exceeded.send(sender=None, report=REPORT)
+
+        def test_breach_outside_apps():
+            query_budget_exceeded.send(sender=None, report={**REPORT, 'view': 'django.views.Other'})
+    """)
+
+    result = pytester.runpytest_subprocess('-p', 'no:django')
+
+    # Reported when the budget fixture is torn down
+    result.assert_outcomes(passed=2, errors=1)
+    result.stdout.fnmatch_lines([
+        '*Query budget exceeded:*',
+        '*GET /api/services/categories/ (apps.services.views.CategoryViewSet): 12 queries, budget 10*',
+    ])
+
+
+@pytest.mark.parametrize('asgi', [False, True])
+@pytest.mark.parametrize('enabled', [True, False])
+def test_query_budget_headers(client, categories, settings, enabled, asgi):
+    settings.QUERY_BUDGET_HEADERS = enabled
+
+    if asgi:
+        response = async_to_sync(AsyncClient().get)(CATALOG_URL)
+    else:
+        response = client.get(CATALOG_URL)
+
+    if enabled:
+        assert int(response['X-DB-Query-Count']) == 3
+        assert response['X-DB-Query-Budget'] == '10'
+        assert float(response['X-DB-Time-Ms']) >= 0
+        assert 'X-DB-Duplicate-Queries' in response
+    else:
+        for header in ('X-DB-Query-Count', 'X-DB-Query-Budget', 'X-DB-Time-Ms', 'X-DB-Duplicate-Queries'):
+            assert header not in response
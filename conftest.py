@@ -0,0 +1 @@
+pytest_plugins = ['config.pytest_plugin', 'pytester']
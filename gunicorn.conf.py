@@ -0,0 +1,23 @@
+"""
+Gunicorn configuration, loaded automatically from the project root.
+
+SERVER_MODE=wsgi (default) runs config.wsgi with sync workers.
+SERVER_MODE=asgi runs config.asgi with uvicorn workers, so async views
+(payments, FCM) can wait on gateway/Firebase calls without blocking a
+worker. Worker count comes from WEB_CONCURRENCY. SERVER_MODE is read like
+config/settings.py reads it: from the environment, then the .env file.
+"""
+from pathlib import Path
+
+import environ
+
+env = environ.Env()
+environ.Env.read_env(Path(__file__).resolve().parent / '.env')
+
+SERVER_MODE = env('SERVER_MODE', default='wsgi')
+
+if SERVER_MODE == 'asgi':
+    wsgi_app = 'config.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    wsgi_app = 'config.wsgi:application'